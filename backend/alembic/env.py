@@ -15,6 +15,7 @@ from app.core.config import settings
 from app.models import (
     Course,
     Slide,
+    SlidePage,
     Transcript,
     CourseSummary,
     Quiz,
@@ -0,0 +1,37 @@
+"""Slide ingestion status
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 講義背景處理狀態
+    op.add_column(
+        'slides',
+        sa.Column('status', sa.String(20), nullable=False, server_default='processed'),
+    )
+    op.add_column(
+        'slides',
+        sa.Column('processed_pages', sa.Integer(), server_default='0'),
+    )
+    op.add_column(
+        'slides',
+        sa.Column('error_message', sa.Text()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('slides', 'error_message')
+    op.drop_column('slides', 'processed_pages')
+    op.drop_column('slides', 'status')
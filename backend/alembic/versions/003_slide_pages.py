@@ -0,0 +1,33 @@
+"""Slide pages
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 建立slide_pages表
+    op.create_table(
+        'slide_pages',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('slide_id', sa.String(50), nullable=False),
+        sa.Column('page_number', sa.Integer(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False, server_default=''),
+        sa.Column('char_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['slide_id'], ['slides.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint('slide_id', 'page_number', name='uq_slide_pages_slide_page'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('slide_pages')
@@ -0,0 +1,39 @@
+"""Quiz submission grading status
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 作答背景批改狀態
+    op.add_column(
+        'quiz_submissions',
+        sa.Column('status', sa.String(20), nullable=False, server_default='completed'),
+    )
+    op.add_column(
+        'quiz_submissions',
+        sa.Column('error_message', sa.Text()),
+    )
+    op.add_column(
+        'quiz_submissions',
+        sa.Column('graded_at', sa.DateTime()),
+    )
+    op.create_index('ix_quiz_submissions_status', 'quiz_submissions', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_quiz_submissions_status', table_name='quiz_submissions')
+    op.drop_column('quiz_submissions', 'graded_at')
+    op.drop_column('quiz_submissions', 'error_message')
+    op.drop_column('quiz_submissions', 'status')
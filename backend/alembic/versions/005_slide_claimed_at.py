@@ -0,0 +1,24 @@
+"""Slide ingestion lease
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 背景擷取的認領租約，避免多個行程重複處理同一份講義
+    op.add_column('slides', sa.Column('claimed_at', sa.DateTime()))
+
+
+def downgrade() -> None:
+    op.drop_column('slides', 'claimed_at')
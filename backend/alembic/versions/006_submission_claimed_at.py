@@ -0,0 +1,24 @@
+"""Quiz submission grading lease
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 背景批改的認領租約，避免多個行程重複批改同一份作答
+    op.add_column('quiz_submissions', sa.Column('claimed_at', sa.DateTime()))
+
+
+def downgrade() -> None:
+    op.drop_column('quiz_submissions', 'claimed_at')
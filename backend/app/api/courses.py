@@ -1,23 +1,35 @@
 """課程相關 API"""
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Optional
 import uuid
 from datetime import datetime
 
 from app.core.database import get_db
 from app.models.course import Course, CourseStatus
-from app.models.slide import Slide
+from app.models.slide import Slide, SlideStatus
 from app.schemas.course import (
     CourseCreate,
     CourseResponse,
     CourseAnalyzeRequest,
     CourseAnalyzeResponse,
 )
-from app.schemas.slide import SlideUploadResponse
+from app.schemas.slide import (
+    SlideUploadResponse,
+    SlideStatusResponse,
+    SlidePageResponse,
+    SlidePagesResponse,
+)
 from app.schemas.quiz import QuizScopeResponse, QuizScope
-from app.services.slide_service import slide_service, SlideProcessingError
+from app.services.slide_service import (
+    slide_service,
+    SlideProcessingError,
+    SlideQueueFullError,
+    SlideTooLargeError,
+)
+from app.services.slide_ingestion import slide_ingestion_service
+from app.services.course_analysis import course_analysis_service
 from app.services.llm_service import llm_service, LLMServiceError
 from app.models.transcript import Transcript
 
@@ -81,6 +93,7 @@ async def get_course(
 async def upload_slides(
     course_id: str,
     file: UploadFile = File(...),
+    background: bool = Query(False, description="儲存後立即回應，於背景擷取文字"),
     db: AsyncSession = Depends(get_db)
 ):
     """上傳講義"""
@@ -101,16 +114,25 @@ async def upload_slides(
         )
 
     try:
-        # 讀取檔案內容
-        file_content = await file.read()
+        # 以區塊串流寫入暫存檔（同時計算雜湊、超過大小上限立即中止）
+        staged = await slide_service.stage_upload(file, file.filename)
+        file_id = f"file_{uuid.uuid4().hex[:12]}"
 
-        # 處理檔案並擷取文字
-        processed_data = await slide_service.process_file(file_content, file.filename)
+        if background:
+            return await _enqueue_slide_ingestion(db, course_id, file_id, staged)
 
-        # 儲存檔案到本地
-        file_id = f"file_{uuid.uuid4().hex[:12]}"
-        unique_filename = f"{file_id}_{file.filename}"
-        file_path = await slide_service.save_file(file_content, unique_filename)
+        try:
+            # 處理檔案並擷取文字（擷取行程直接讀取暫存檔）
+            processed_data = await slide_service.process_path(
+                staged.path,
+                file.filename,
+                staged.content_hash,
+            )
+
+            # 儲存檔案到本地（相同內容的檔案共用一份）
+            file_path = slide_service.store_staged(staged)
+        finally:
+            slide_service.discard_staged(staged)
 
         # 儲存到資料庫
         slide = Slide(
@@ -123,6 +145,8 @@ async def upload_slides(
         )
 
         db.add(slide)
+        await db.flush()
+        await slide_service.save_pages(db, file_id, processed_data.get('pages', []))
         await db.commit()
         await db.refresh(slide)
 
@@ -135,12 +159,115 @@ async def upload_slides(
             status="processed",
         )
 
+    except SlideTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except SlideQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except SlideProcessingError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"檔案處理失敗: {str(e)}")
 
 
+async def _enqueue_slide_ingestion(
+    db: AsyncSession,
+    course_id: str,
+    file_id: str,
+    staged,
+) -> SlideUploadResponse:
+    """儲存檔案並建立處理中的講義，擷取工作交給背景 worker"""
+    file_path = slide_service.store_staged(staged)
+
+    slide = Slide(
+        id=file_id,
+        course_id=course_id,
+        filename=staged.filename,
+        file_path=file_path,
+        status=SlideStatus.PROCESSING.value,
+        claimed_at=datetime.utcnow(),
+    )
+    db.add(slide)
+    await db.commit()
+
+    try:
+        slide_ingestion_service.enqueue(file_id, file_path, staged.filename, staged.content_hash)
+    except SlideQueueFullError:
+        slide.status = SlideStatus.FAILED.value
+        slide.error_message = "背景處理佇列已滿"
+        await db.commit()
+        raise
+
+    return SlideUploadResponse(
+        file_id=file_id,
+        filename=staged.filename,
+        pages=0,
+        extracted_text_preview="",
+        status=SlideStatus.PROCESSING.value,
+    )
+
+
+@router.get("/{course_id}/slides/{file_id}/status", response_model=SlideStatusResponse)
+async def get_slide_status(
+    course_id: str,
+    file_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """查詢講義處理狀態與進度"""
+    result = await db.execute(
+        select(Slide).where(Slide.id == file_id, Slide.course_id == course_id)
+    )
+    slide = result.scalar_one_or_none()
+
+    if not slide:
+        raise HTTPException(status_code=404, detail="Slide not found")
+
+    # 處理中的進度由背景 worker 定期寫回，不論工作在哪個行程都能查詢
+    return SlideStatusResponse(
+        file_id=slide.id,
+        filename=slide.filename,
+        status=slide.status,
+        total_pages=slide.total_pages,
+        processed_pages=slide.processed_pages or 0,
+        error=slide.error_message,
+    )
+
+
+@router.get("/{course_id}/slides/{file_id}/pages", response_model=SlidePagesResponse)
+async def get_slide_pages(
+    course_id: str,
+    file_id: str,
+    start: int = Query(1, ge=1, description="起始頁碼（包含）"),
+    end: Optional[int] = Query(None, ge=1, description="結束頁碼（包含），不指定則到最後一頁"),
+    db: AsyncSession = Depends(get_db)
+):
+    """取得講義指定頁碼範圍的內容"""
+    result = await db.execute(
+        select(Slide.id, Slide.total_pages).where(Slide.id == file_id, Slide.course_id == course_id)
+    )
+    slide = result.one_or_none()
+
+    if not slide:
+        raise HTTPException(status_code=404, detail="Slide not found")
+
+    if end is not None and end < start:
+        raise HTTPException(status_code=400, detail="結束頁碼不可小於起始頁碼")
+
+    pages = await slide_service.get_pages(db, file_id, start, end)
+
+    return SlidePagesResponse(
+        file_id=file_id,
+        total_pages=slide.total_pages,
+        pages=[
+            SlidePageResponse(
+                page_number=page.page_number,
+                text=page.text,
+                char_count=page.char_count,
+            )
+            for page in pages
+        ],
+    )
+
+
 @router.post("/{course_id}/analyze", response_model=CourseAnalyzeResponse)
 async def analyze_course(
     course_id: str,
@@ -158,32 +285,23 @@ async def analyze_course(
         raise HTTPException(status_code=404, detail="Course not found")
 
     try:
-        # 取得講義內容
-        slides_text = ""
-        if request.include_slides:
-            slides_result = await db.execute(
-                select(Slide).where(Slide.course_id == course_id)
-            )
-            slides = slides_result.scalars().all()
-            slides_text = "\n\n".join([slide.extracted_text for slide in slides if slide.extracted_text])
-
-        # 取得語音轉錄
-        transcript_text = ""
-        if request.include_transcript:
-            transcript_result = await db.execute(
-                select(Transcript).where(Transcript.course_id == course_id).order_by(Transcript.timestamp)
-            )
-            transcripts = transcript_result.scalars().all()
-            transcript_text = "\n".join([f"[{t.timestamp}] {t.text}" for t in transcripts])
+        # 取得逐頁講義與語音轉錄
+        slides, transcripts = await course_analysis_service.load_content(
+            db,
+            course_id,
+            include_slides=request.include_slides,
+            include_transcript=request.include_transcript,
+        )
 
-        if not slides_text and not transcript_text:
+        if not slides and not transcripts:
             raise HTTPException(
                 status_code=400,
                 detail="沒有可分析的內容，請先上傳講義或進行轉錄"
             )
 
-        # 使用 LLM 分析課程內容
-        summary = await llm_service.analyze_course_content(slides_text, transcript_text)
+        # 分段摘要後合併成完整的課程重點，並儲存課程摘要
+        summary = await course_analysis_service.analyze(slides, transcripts)
+        await course_analysis_service.save_summary(db, course_id, summary)
 
         return CourseAnalyzeResponse(
             summary=summary,
@@ -1,12 +1,18 @@
 """題目相關 API"""
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from typing import Any, AsyncIterator, Dict, List
+import json
+import logging
 import uuid
+from contextlib import aclosing
 from datetime import datetime
 
-from app.core.database import get_db
-from app.models.quiz import Quiz, QuizSubmission
+from app.core.database import get_db, AsyncSessionLocal
+from app.models.quiz import Quiz, QuizSubmission, SubmissionStatus
 from app.models.course import Course
 from app.models.slide import Slide
 from app.models.transcript import Transcript
@@ -21,60 +27,77 @@ from app.schemas.quiz import (
     RecommendedReview,
 )
 from app.services.llm_service import llm_service, LLMServiceError
+from app.services.quiz_generation import quiz_generation_service
+from app.services.grading_service import grading_service
+from app.services.grading_worker import grading_worker_service
+from app.services.notification_hub import notification_hub, submission_channel
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# SSE 連線的心跳間隔（秒），避免代理伺服器關閉閒置連線
+SSE_KEEPALIVE_SECONDS = 15
 
-@router.post("/generate", response_model=QuizGenerateResponse)
-async def generate_quiz(
-    request: QuizGenerateRequest,
-    db: AsyncSession = Depends(get_db)
-):
-    """生成題目"""
-    # 驗證課程存在
+
+async def _load_quiz_content(db: AsyncSession, course_id: str) -> str:
+    """驗證課程存在並取得出題用的講義與轉錄內容"""
     course_result = await db.execute(
-        select(Course).where(Course.id == request.course_id)
+        select(Course).where(Course.id == course_id)
     )
     course = course_result.scalar_one_or_none()
 
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
 
-    try:
-        # 取得講義內容
-        slides_result = await db.execute(
-            select(Slide).where(Slide.course_id == request.course_id)
-        )
-        slides = slides_result.scalars().all()
-        slides_text = "\n\n".join([slide.extracted_text for slide in slides if slide.extracted_text])
+    # 取得講義內容
+    slides_result = await db.execute(
+        select(Slide).where(Slide.course_id == course_id)
+    )
+    slides = slides_result.scalars().all()
+    slides_text = "\n\n".join([slide.extracted_text for slide in slides if slide.extracted_text])
 
-        # 取得語音轉錄
-        transcript_result = await db.execute(
-            select(Transcript).where(Transcript.course_id == request.course_id).order_by(Transcript.timestamp)
+    # 取得語音轉錄
+    transcript_result = await db.execute(
+        select(Transcript).where(Transcript.course_id == course_id).order_by(Transcript.timestamp)
+    )
+    transcripts = transcript_result.scalars().all()
+    transcript_text = "\n".join([f"[{t.timestamp}] {t.text}" for t in transcripts])
+
+    # 合併內容
+    content = f"{slides_text}\n\n{transcript_text}"
+
+    if not content.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="沒有可用的內容，請先上傳講義或進行轉錄"
         )
-        transcripts = transcript_result.scalars().all()
-        transcript_text = "\n".join([f"[{t.timestamp}] {t.text}" for t in transcripts])
 
-        # 合併內容
-        content = f"{slides_text}\n\n{transcript_text}"
+    return content
 
-        if not content.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="沒有可用的內容，請先上傳講義或進行轉錄"
-            )
 
-        # 轉換題型格式
-        question_types = {
-            'multiple_choice': request.question_types.multiple_choice,
-            'fill_in_blank': request.question_types.fill_in_blank,
-            'short_answer': request.question_types.short_answer,
-        }
+def _question_types(request: QuizGenerateRequest) -> Dict[str, int]:
+    """轉換題型格式"""
+    return {
+        'multiple_choice': request.question_types.multiple_choice,
+        'fill_in_blank': request.question_types.fill_in_blank,
+        'short_answer': request.question_types.short_answer,
+    }
+
+
+@router.post("/generate", response_model=QuizGenerateResponse)
+async def generate_quiz(
+    request: QuizGenerateRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """生成題目"""
+    content = await _load_quiz_content(db, request.course_id)
 
-        # 使用 LLM 生成題目
-        questions_data = await llm_service.generate_questions(
+    try:
+        # 依題型與內容段落分片並行生成題目
+        questions_data = await quiz_generation_service.generate(
             content,
-            question_types,
+            _question_types(request),
             request.difficulty
         )
 
@@ -103,6 +126,81 @@ async def generate_quiz(
         raise HTTPException(status_code=500, detail=f"題目生成失敗: {str(e)}")
 
 
+def _ndjson(payload: Dict[str, Any]) -> str:
+    """序列化為一行 NDJSON"""
+    return json.dumps(payload, ensure_ascii=False) + "\n"
+
+
+async def _stream_quiz(
+    request: QuizGenerateRequest,
+    content: str,
+) -> AsyncIterator[str]:
+    """逐題回傳生成的題目，串流結束後儲存題目"""
+    questions: List[Dict[str, Any]] = []
+
+    try:
+        # 用戶端中斷時立即關閉 LLM 串流，釋放排程名額
+        async with aclosing(llm_service.stream_questions(
+            content,
+            _question_types(request),
+            request.difficulty
+        )) as stream:
+            async for question_data in stream:
+                try:
+                    question = Question(**question_data)
+                except ValidationError as e:
+                    logger.warning(f"略過格式不正確的題目: {str(e)}")
+                    continue
+
+                questions.append(question.dict())
+                yield _ndjson({"event": "question", "question": question.dict()})
+
+        if not questions:
+            raise LLMServiceError("沒有生成任何有效的題目")
+
+        # 請求的資料庫 Session 在串流開始前就會關閉，另開 Session 儲存
+        quiz_id = f"quiz_{uuid.uuid4().hex[:12]}"
+        async with AsyncSessionLocal() as db:
+            db.add(Quiz(
+                id=quiz_id,
+                course_id=request.course_id,
+                scope_id=request.scope_id,
+                questions_json=questions,
+            ))
+            await db.commit()
+
+        yield _ndjson({
+            "event": "completed",
+            "quiz_id": quiz_id,
+            "total_questions": len(questions),
+            "created_at": datetime.utcnow().isoformat(),
+        })
+
+    except Exception as e:
+        logger.error(f"串流題目生成失敗: {str(e)}")
+        yield _ndjson({"event": "error", "detail": str(e)})
+
+
+@router.post("/generate/stream")
+async def generate_quiz_stream(
+    request: QuizGenerateRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    串流生成題目（NDJSON）
+
+    每完成一題回傳一行 {"event": "question", "question": {...}}，
+    全部完成並儲存後回傳 {"event": "completed", "quiz_id": ...}，
+    失敗時回傳 {"event": "error", "detail": ...}。
+    """
+    content = await _load_quiz_content(db, request.course_id)
+
+    return StreamingResponse(
+        _stream_quiz(request, content),
+        media_type="application/x-ndjson",
+    )
+
+
 @router.post("/{quiz_id}/submit", response_model=QuizSubmitResponse)
 async def submit_quiz(
     quiz_id: str,
@@ -120,25 +218,51 @@ async def submit_quiz(
         raise HTTPException(status_code=404, detail="Quiz not found")
 
     submission_id = f"sub_{uuid.uuid4().hex[:12]}"
+    user_id = "default_user"  # TODO: 從認證系統取得
+    answers = [answer.dict() for answer in request.answers]
+
+    # 選擇題與填充題在請求中本地批改，簡答題交給背景 worker
+    results, pending = grading_service.grade_local(quiz.questions_json, answers)
 
-    # 儲存提交記錄
     submission = QuizSubmission(
         id=submission_id,
         quiz_id=quiz_id,
-        user_id="default_user",  # TODO: 從認證系統取得
-        answers_json=[answer.dict() for answer in request.answers],
+        user_id=user_id,
+        answers_json=answers,
     )
 
+    if pending:
+        for index, question, user_answer in pending:
+            results[index] = grading_service.pending_result(question, user_answer)
+        submission.results_json = results
+        submission.status = SubmissionStatus.GRADING.value
+        # 由本行程的背景 worker 批改
+        submission.claimed_at = datetime.utcnow()
+    else:
+        graded = grading_service.summarize(results)
+        review = grading_service.build_review(quiz.questions_json, results)
+        submission.results_json = results
+        submission.score = graded["score"]
+        submission.status = SubmissionStatus.COMPLETED.value
+        submission.graded_at = datetime.utcnow()
+        await grading_service.record_user_stats(db, user_id, graded["score"], review["weak_concepts"])
+
+    # 儲存提交記錄
     db.add(submission)
     await db.commit()
 
-    # TODO: 背景任務批改（使用 Celery）
-    # 這裡應該觸發批改任務
+    if pending:
+        grading_worker_service.enqueue(submission_id)
+        return QuizSubmitResponse(
+            submission_id=submission_id,
+            status=SubmissionStatus.GRADING.value,
+            estimated_time="5 seconds",
+        )
 
     return QuizSubmitResponse(
         submission_id=submission_id,
-        status="grading",
-        estimated_time="5 seconds",
+        status=SubmissionStatus.COMPLETED.value,
+        estimated_time="0 seconds",
     )
 
 
@@ -161,29 +285,119 @@ async def get_quiz_result(
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
 
-    # TODO: 如果還在批改中，回傳狀態
-    # 這裡應該檢查批改任務狀態
+    if submission.results_json is None:
+        raise HTTPException(status_code=409, detail="批改尚未完成")
 
-    # 暫時回傳示例數據
-    results = [
-        QuizResult(
-            question_id="q1",
-            is_correct=True,
-            user_answer="每個節點最多有兩個子節點",
-            feedback="正確！",
-        )
-    ]
+    quiz_result = await db.execute(
+        select(Quiz).where(Quiz.id == quiz_id)
+    )
+    quiz = quiz_result.scalar_one_or_none()
+    questions = quiz.questions_json if quiz else []
+
+    # 背景批改中時 status 為 grading，results 只有本地批改完成的題目有分數
+    results = [QuizResult(**r) for r in submission.results_json]
+    review = grading_service.build_review(questions, submission.results_json)
 
     return QuizResultResponse(
         quiz_id=quiz_id,
         submission_id=submission_id,
-        total_questions=1,
-        correct_count=1,
-        score=100,
+        status=submission.status,
+        error_message=submission.error_message,
+        total_questions=len(results),
+        correct_count=sum(1 for r in results if r.is_correct),
+        score=submission.score or 0,
         results=results,
-        weak_concepts=[],
+        weak_concepts=review["weak_concepts"],
         recommended_review=RecommendedReview(
-            slide_pages=[],
-            video_timestamps=[],
+            slide_pages=review["slide_pages"],
+            video_timestamps=review["video_timestamps"],
         ),
     )
+
+
+def _sse(event: str, payload: Dict[str, Any]) -> str:
+    """序列化為一則 SSE 事件"""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def _final_event(submission: QuizSubmission) -> Dict[str, Any]:
+    """已結束批改的作答的最終事件"""
+    if submission.status == SubmissionStatus.FAILED.value:
+        return {
+            "type": "failed",
+            "submission_id": submission.id,
+            "error_message": submission.error_message,
+        }
+
+    results = submission.results_json or []
+    return {
+        "type": "completed",
+        "submission_id": submission.id,
+        "score": submission.score or 0,
+        "correct_count": sum(1 for r in results if r.get("is_correct")),
+        "total_questions": len(results),
+    }
+
+
+async def _submission_events(submission_id: str) -> AsyncIterator[str]:
+    """推送作答的批改進度：目前狀態、每題結果、最終結果"""
+    # 先訂閱再讀取目前狀態，避免遺漏兩者之間發布的結果
+    async with notification_hub.subscribe(submission_channel(submission_id)) as subscription:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(QuizSubmission).where(QuizSubmission.id == submission_id)
+            )
+            submission = result.scalar_one_or_none()
+
+        if not submission:
+            return
+
+        yield _sse("snapshot", {
+            "type": "snapshot",
+            "submission_id": submission_id,
+            "status": submission.status,
+            "results": submission.results_json or [],
+        })
+
+        if submission.status != SubmissionStatus.GRADING.value:
+            final = _final_event(submission)
+            yield _sse(final["type"], final)
+            return
+
+        while True:
+            message = await subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+
+            yield _sse(message["type"], message)
+            if message["type"] in ("completed", "failed"):
+                return
+
+
+@router.get("/{quiz_id}/submissions/{submission_id}/events")
+async def stream_submission_events(
+    quiz_id: str,
+    submission_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    以 SSE 推送批改結果（取代輪詢 /result）
+
+    事件依序為 snapshot（目前狀態與已完成的結果）、question_result（每題批改完成）、
+    completed 或 failed（最終結果，之後關閉連線）。
+    """
+    result = await db.execute(
+        select(QuizSubmission.id).where(
+            QuizSubmission.id == submission_id,
+            QuizSubmission.quiz_id == quiz_id,
+        )
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    return StreamingResponse(
+        _submission_events(submission_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
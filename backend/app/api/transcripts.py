@@ -2,15 +2,18 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
+from collections import deque
 import logging
 import asyncio
 
+from app.core.config import settings
 from app.core.database import AsyncSessionLocal
-from app.models.transcript import Transcript
 from app.models.teacher_hint import TeacherHint
 from app.schemas.transcript import TranscriptResponse
 from app.services.speech_service import speech_service, SpeechServiceError
 from app.services.hint_service import hint_service
+from app.services.hint_analysis import hint_analysis_service, HintJob
+from app.services.transcript_writer import transcript_writer
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -35,6 +38,18 @@ async def websocket_transcribe(
     start_time = datetime.now()
     logger.info(f"WebSocket connected for course: {course_id}")
 
+    # 最近的最終轉錄，作為提示分析的上下文
+    recent_texts = deque(maxlen=settings.HINT_CONTEXT_SEGMENTS)
+
+    async def send_enrichment(analysis):
+        await websocket.send_json({
+            "type": "teacher_hint_enriched",
+            "hint_id": analysis["hint_id"],
+            "concept": analysis["concept"],
+            "slide_page": analysis.get("slide_page"),
+            "confidence": analysis["confidence"],
+        })
+
     try:
         # 建立音訊串流生成器
         async def audio_stream_generator():
@@ -51,67 +66,67 @@ async def websocket_transcribe(
             elapsed = datetime.now() - start_time
             timestamp = str(timedelta(seconds=int(elapsed.total_seconds())))
 
-            # 準備回應
-            response_data = {
-                "type": "transcript",
-                "timestamp": timestamp,
-                "text": result["text"],
-                "confidence": result["confidence"],
-                "is_final": result["is_final"],
-            }
-
-            # 如果是最終結果，儲存到資料庫
-            if result["is_final"]:
-                async with AsyncSessionLocal() as db:
-                    try:
-                        # 儲存轉錄
-                        transcript = Transcript(
-                            course_id=course_id,
-                            timestamp=timestamp,
-                            text=result["text"],
-                            confidence=result["confidence"],
-                        )
-                        db.add(transcript)
-
-                        # 檢查是否包含老師提示語
-                        hint_type = hint_service.detect_hint(result["text"])
-                        if hint_type:
-                            logger.info(f"檢測到提示語: {hint_type}")
-
-                            # 分析提示內容
-                            hint_analysis = await hint_service.analyze_hint(
-                                result["text"],
-                                timestamp
-                            )
-
-                            # 儲存老師提示
+            # 先送出轉錄結果，資料庫與提示處理不延遲字幕
+            if result["text"]:
+                await websocket.send_json({
+                    "type": "transcript",
+                    "timestamp": timestamp,
+                    "text": result["text"],
+                    "confidence": result["confidence"],
+                    "is_final": result["is_final"],
+                })
+
+            # 發言中途提前確定的片段只送給用戶端，整段發言結束後才儲存與偵測提示語，
+            # 避免關鍵字被切在兩個片段之間
+            if result["is_final"] and result.get("segment_final", True):
+                segment_text = result.get("segment_text", result["text"])
+                transcript_writer.add(
+                    course_id=course_id,
+                    timestamp=timestamp,
+                    text=segment_text,
+                    confidence=result["confidence"],
+                )
+
+                # 老師提示語先以暫定內容儲存，LLM 分析完成後再補上概念與頁碼
+                hint_type = hint_service.detect_hint(segment_text)
+                teacher_hint = None
+                if hint_type:
+                    logger.info(f"檢測到提示語: {hint_type}")
+                    async with AsyncSessionLocal() as db:
+                        try:
                             teacher_hint = TeacherHint(
                                 course_id=course_id,
                                 timestamp=timestamp,
-                                hint_text=result["text"],
+                                hint_text=segment_text,
                                 hint_type=hint_type,
-                                related_concept=hint_analysis["concept"],
-                                slide_page=hint_analysis.get("slide_page"),
-                                confidence=hint_analysis["confidence"],
                             )
                             db.add(teacher_hint)
-
-                            # 發送提示通知
-                            await websocket.send_json({
-                                "type": "teacher_hint",
-                                "timestamp": timestamp,
-                                "hint_type": hint_type,
-                                "text": result["text"],
-                            })
-
-                        await db.commit()
-
-                    except Exception as e:
-                        logger.error(f"資料庫操作失敗: {str(e)}")
-                        await db.rollback()
-
-            # 發送轉錄結果
-            await websocket.send_json(response_data)
+                            await db.commit()
+                        except Exception as e:
+                            logger.error(f"資料庫操作失敗: {str(e)}")
+                            await db.rollback()
+                            teacher_hint = None
+
+                if teacher_hint is not None:
+                    # 發送暫定提示通知
+                    await websocket.send_json({
+                        "type": "teacher_hint",
+                        "hint_id": teacher_hint.id,
+                        "timestamp": timestamp,
+                        "hint_type": hint_type,
+                        "text": segment_text,
+                        "provisional": True,
+                    })
+
+                    hint_analysis_service.enqueue(course_id, HintJob(
+                        hint_id=teacher_hint.id,
+                        text=segment_text,
+                        timestamp=timestamp,
+                        context="".join(recent_texts),
+                        on_enriched=send_enrichment,
+                    ))
+
+                recent_texts.append(segment_text)
 
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for course: {course_id}")
@@ -0,0 +1,52 @@
+"""Celery worker
+
+docker-compose 的 celery-worker 服務以 `celery -A app.celery_worker worker` 啟動。
+GRADING_BACKEND=celery 時，作答批改工作經由 Redis broker 送到此 worker 處理。
+"""
+import asyncio
+import logging
+
+from celery import Celery
+
+from app.core.config import settings
+from app.core.logging_config import setup_logging
+from app.services.grading_worker import process_submission
+
+logger = logging.getLogger(__name__)
+
+celery_app = Celery(
+    "courseai",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+)
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    # worker 異常結束時工作會重新派送
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # 批改工作耗時不一，每次只預取一個工作
+    worker_prefetch_multiplier=1,
+)
+
+# 非同步資料庫連線池綁定在事件迴圈上，每個 worker 行程重複使用同一個迴圈
+_loop = None
+
+
+def _run(coro):
+    global _loop
+    if _loop is None:
+        setup_logging()
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+@celery_app.task(name="grading.grade_submission", bind=True, max_retries=3, default_retry_delay=10)
+def grade_submission_task(self, submission_id: str):
+    """批改一份作答"""
+    try:
+        return _run(process_submission(submission_id))
+    except Exception as e:
+        logger.error(f"Celery 批改工作失敗: {submission_id}, 錯誤: {str(e)}")
+        raise self.retry(exc=e)
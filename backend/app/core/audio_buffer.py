@@ -0,0 +1,97 @@
+"""音訊環形緩衝區
+
+累積 16-bit PCM 音訊供語音辨識分段處理。預先配置固定容量的 NumPy 陣列，
+每次寫入只複製該音框（O(frame)），取出的視窗為陣列的 view 不需複製。
+陣列配置兩倍容量並將每個樣本同時寫入 i 與 i + capacity（鏡像），
+任何不超過容量的視窗在記憶體中都是連續的。
+"""
+from typing import Union
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """固定容量的 16-bit PCM 環形緩衝區（容量即每個連線的記憶體上限）"""
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity: 可保留的樣本數上限，寫入超過時捨棄最舊的樣本
+        """
+        if capacity <= 0:
+            raise ValueError("capacity 必須大於 0")
+
+        self.capacity = capacity
+        self._data = np.zeros(capacity * 2, dtype=np.int16)
+        self._start = 0
+        self._size = 0
+        # 上一個音框留下的不完整樣本（奇數位元組）
+        self._pending = b""
+
+        # 統計資訊
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, chunk: Union[bytes, bytearray, memoryview]):
+        """寫入 PCM 音框，緩衝區已滿時覆蓋最舊的樣本"""
+        if self._pending:
+            chunk = self._pending + bytes(chunk)
+            self._pending = b""
+        if len(chunk) % 2:
+            self._pending = bytes(chunk[-1:])
+            chunk = chunk[:-1]
+
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        if len(samples) > self.capacity:
+            self.dropped += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+
+        count = len(samples)
+        if count == 0:
+            return
+
+        overflow = self._size + count - self.capacity
+        if overflow > 0:
+            self._start = (self._start + overflow) % self.capacity
+            self._size -= overflow
+            self.dropped += overflow
+
+        end = (self._start + self._size) % self.capacity
+        first = min(count, self.capacity - end)
+        self._put(end, samples[:first])
+        if first < count:
+            self._put(0, samples[first:])
+        self._size += count
+
+    def _put(self, position: int, samples: np.ndarray):
+        """寫入主區與鏡像區"""
+        self._data[position:position + len(samples)] = samples
+        mirror = position + self.capacity
+        self._data[mirror:mirror + len(samples)] = samples
+
+    def peek(self, count: int) -> np.ndarray:
+        """
+        取得最舊的 count 個樣本（連續的 view，不複製）
+
+        回傳的 view 在下次寫入後可能被覆蓋，需保留時請先複製（例如 astype）。
+        """
+        count = min(count, self._size)
+        return self._data[self._start:self._start + count]
+
+    def window(self, count: int) -> memoryview:
+        """以 memoryview 取得最舊的 count 個樣本（位元組，不複製）"""
+        return memoryview(self.peek(count)).cast("B")
+
+    def consume(self, count: int):
+        """移除最舊的 count 個樣本"""
+        count = min(count, self._size)
+        self._start = (self._start + count) % self.capacity
+        self._size -= count
+
+    def clear(self):
+        """清空緩衝區"""
+        self._start = 0
+        self._size = 0
+        self._pending = b""
@@ -52,20 +52,84 @@ class Settings(BaseSettings):
     LLM_MODEL: str = "gpt-4"
     LLM_TEMPERATURE: float = 0.7
     LLM_MAX_TOKENS: int = 2000
+    LLM_CACHE_ENABLED: bool = True  # 快取相同提示的 LLM 回應
+    LLM_CACHE_TTL: int = 3600  # 快取有效時間（秒）
+    LLM_CACHE_MAX_ENTRIES: int = 1024  # 行程內快取項目上限
+    LLM_CACHE_USE_REDIS: bool = False  # 使用 REDIS_URL 作為跨行程的第二層快取
+    LLM_MAX_IN_FLIGHT: int = 8  # 同時進行的 LLM 請求上限
+    LLM_TOKENS_PER_MINUTE: int = 0  # 每分鐘 token 預算（0 表示不限制）
+    LLM_GRADING_BATCH_SIZE: int = 10  # 簡答題批次批改每個提示的題數上限
+
+    # 課程分析設定
+    ANALYSIS_CHUNK_TOKENS: int = 3000  # 每個分析區塊的 token 上限
+    ANALYSIS_TRANSCRIPT_WINDOW: int = 600  # 轉錄切分的時間窗（秒）
+    ANALYSIS_CHUNK_CACHE_TTL: int = 86400  # 區塊摘要快取時間（秒）
+
+    # 題目生成設定
+    QUIZ_SHARD_MAX_QUESTIONS: int = 5  # 每個生成分片的題數上限
+    QUIZ_SECTION_CHARS: int = 3000  # 出題內容段落的字元上限
+    QUIZ_DEDUPE_THRESHOLD: float = 0.85  # 題目相似度達此值視為重複
+    QUIZ_TOPUP_ROUNDS: int = 1  # 去重後題數不足時的補生成輪數
 
     # Whisper 設定
     WHISPER_MODEL: str = "base"
+    AUDIO_BUFFER_SECONDS: int = 30  # 每個連線的音訊緩衝上限（秒）
+    VAD_ENERGY_THRESHOLD: float = 300.0  # 語音偵測的 RMS 能量門檻（16-bit PCM）
+    VAD_SILENCE_MS: int = 600  # 靜音持續此長度即結束一段發言（毫秒）
+    VAD_MIN_SPEECH_MS: int = 300  # 語音少於此長度的片段視為雜音（毫秒）
+    VAD_MAX_SEGMENT_SECONDS: float = 15.0  # 單一發言區段的長度上限（秒）
+    VAD_PRE_ROLL_MS: int = 200  # 發言開頭保留的前置音訊（毫秒）
+    WHISPER_BATCH_SIZE: int = 8  # 跨連線批次推論的區段數上限
+    WHISPER_BATCH_WAIT_MS: int = 50  # 湊批次的最長等待時間（毫秒）
+    WHISPER_INTERIM_RESULTS: bool = True  # 發言進行中輸出暫定結果
+    WHISPER_INTERIM_INTERVAL_MS: int = 1000  # 暫定結果的重新辨識間隔（毫秒音訊）
+    WHISPER_INTERIM_WINDOW_SECONDS: float = 10.0  # 暫定辨識的音訊長度上限（只辨識發言結尾，秒）
     USE_GOOGLE_SPEECH: bool = True
 
+    # 語音 worker 設定
+    SPEECH_BACKEND: str = "local"  # local（API 行程內載入模型）或 worker（轉送到 app.speech_worker）
+    SPEECH_WORKERS: int = 2  # 語音 worker 行程數
+    SPEECH_WORKER_SOCKET_DIR: str = "/tmp/courseai-speech"  # 語音 worker 的 Unix socket 目錄
+    SPEECH_WORKER_HEALTH_INTERVAL: float = 5.0  # 健康檢查間隔（秒）
+    SPEECH_WORKER_HEALTH_TIMEOUT: float = 120.0  # 超過此時間無回應即重啟 worker（秒，含模型載入時間）
+
     # Celery 設定
     CELERY_BROKER_URL: str = "redis://localhost:6379/1"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/2"
 
+    # 作答批改設定
+    GRADING_BACKEND: str = "memory"  # memory（API 行程內 worker）或 celery
+    GRADING_WORKERS: int = 2  # 行程內批改 worker 數
+    GRADING_LEASE_SECONDS: int = 300  # 批改中作答的認領租約，過期後由其他行程接手（秒）
+    NOTIFY_USE_REDIS: bool = False  # 以 REDIS_URL 的 pub/sub 跨行程推送通知（GRADING_BACKEND=celery 時需開啟）
+
+    # 老師提示設定
+    HINT_QUEUE_SIZE: int = 20  # 每個課程待分析提示的佇列上限
+    HINT_CONTEXT_SEGMENTS: int = 3  # 提示分析附帶的前文轉錄段數
+
+    # 轉錄寫入設定
+    TRANSCRIPT_BATCH_SIZE: int = 200  # 累積此筆數即批次寫入
+    TRANSCRIPT_FLUSH_INTERVAL_MS: int = 500  # 批次寫入間隔（毫秒）
+    TRANSCRIPT_MAX_BUFFER: int = 20000  # 資料庫無法寫入時緩衝區保留的筆數上限
+
     # 檔案上傳設定
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: List[str] = ["pdf", "ppt", "pptx", "doc", "docx"]
     UPLOAD_DIR: str = "uploads"
 
+    # 講義擷取設定
+    SLIDE_EXTRACTION_WORKERS: int = 2  # 擷取行程數量
+    SLIDE_EXTRACTION_MAX_PENDING: int = 8  # 同時處理 + 排隊的上傳上限
+    SLIDE_EXTRACTION_TIMEOUT: int = 120  # 單一擷取工作逾時（秒）
+    SLIDE_EXTRACTION_MAX_JOBS_PER_WORKER: int = 50  # 工作行程處理 N 個工作後重啟
+    SLIDE_PDF_PAGES_PER_JOB: int = 25  # PDF 分頁平行擷取時，每個工作最少處理的頁數
+    SLIDE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 擷取結果快取容量上限
+    SLIDE_UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 串流上傳每次讀取的區塊大小
+    SLIDE_INGESTION_WORKERS: int = 2  # 背景擷取 worker 數量
+    SLIDE_INGESTION_QUEUE_SIZE: int = 32  # 背景擷取佇列上限
+    SLIDE_INGESTION_LEASE_SECONDS: int = 300  # 處理中講義的認領租約，過期後由其他行程接手（秒）
+    SLIDE_INGESTION_PROGRESS_INTERVAL: float = 2.0  # 處理進度寫回資料庫的間隔（秒）
+
     # WebSocket 設定
     WS_HEARTBEAT_INTERVAL: int = 30
     WS_MAX_CONNECTIONS: int = 1000
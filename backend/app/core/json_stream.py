@@ -0,0 +1,106 @@
+"""增量 JSON 陣列解析
+
+LLM 串流回應以任意大小的片段送達，解析器逐段讀入，
+最外層陣列中的每個元素（物件或陣列）一結束就立即回傳，不必等整個回應完成。
+陣列之前的文字（例如 ```json）會被略過。
+"""
+import json
+import logging
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JSONArrayStreamParser:
+    """逐段解析 JSON 陣列並回傳已完整的元素"""
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+
+        self._started = False  # 已讀到最外層的 '['
+        self._expect_element = False  # '[' 之後還未讀到第一個非空白字元
+        self._finished = False  # 已讀到最外層的 ']'
+
+        self._depth = 0  # 元素內的巢狀深度
+        self._in_string = False
+        self._escape = False
+        self._element_start: Optional[int] = None
+
+    @property
+    def finished(self) -> bool:
+        """是否已讀到陣列結尾"""
+        return self._finished
+
+    def feed(self, text: str) -> List[Any]:
+        """
+        讀入一段文字
+
+        Args:
+            text: 串流回應的片段
+
+        Returns:
+            此次讀入後新完成的陣列元素
+        """
+        if self._finished:
+            return []
+
+        buffer = self._buffer + text
+        items: List[Any] = []
+        i = self._pos
+
+        while i < len(buffer) and not self._finished:
+            ch = buffer[i]
+
+            if not self._started:
+                if ch == '[':
+                    self._started = True
+                    self._expect_element = True
+                i += 1
+                continue
+
+            if self._expect_element:
+                if ch.isspace():
+                    i += 1
+                    continue
+                self._expect_element = False
+                if ch not in '{[]':
+                    # 不是題目陣列（例如說明文字中的方括號），繼續尋找
+                    self._started = False
+                    continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                if self._depth == 0:
+                    self._element_start = i
+                self._depth += 1
+            elif ch in '}]':
+                if self._depth == 0:
+                    self._finished = ch == ']'
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        raw = buffer[self._element_start:i + 1]
+                        self._element_start = None
+                        try:
+                            items.append(json.loads(raw))
+                        except json.JSONDecodeError as e:
+                            logger.warning(f"略過無法解析的陣列元素: {str(e)}")
+            i += 1
+
+        # 只保留尚未完成的元素，避免緩衝區隨回應長度成長
+        keep_from = self._element_start if self._element_start is not None else i
+        self._buffer = buffer[keep_from:]
+        self._pos = i - keep_from
+        if self._element_start is not None:
+            self._element_start = 0
+
+        return items
@@ -0,0 +1,84 @@
+"""Single-flight 請求合併
+
+同一個鍵同時只執行一次工作，期間其他相同鍵的呼叫等待同一個結果
+（包含例外）。個別呼叫者被取消不影響其他等待者；所有等待者都離開時才取消工作。
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    """執行中的工作與等待者數量"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """合併相同鍵的並行呼叫"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+
+        # 統計資訊
+        self.executed = 0
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        """目前執行中的工作數"""
+        return len(self._calls)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        執行 func()，相同 key 的並行呼叫共用同一次執行結果
+
+        Args:
+            key: 合併用的鍵
+            func: 回傳 awaitable 的函式（只會被第一個呼叫者執行）
+
+        Returns:
+            func() 的結果
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            self.executed += 1
+            call.task.add_done_callback(lambda task: self._finish(key, call))
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # 沒有任何等待者時取消工作，並讓之後的呼叫重新執行
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _finish(self, key: str, call: _Call):
+        """工作完成後移除，並取出例外避免「未取得例外」警告"""
+        self._forget(key, call)
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """取得合併統計"""
+        return {
+            "in_flight": self.in_flight,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,63 @@
+"""語音 worker 行程間通訊協定
+
+API 行程與語音 worker 之間以 Unix socket 傳送訊框：
+1 位元組類型（J = JSON 控制訊息、A = 音訊）+ 4 位元組長度（big-endian）+ 內容。
+
+串流流程：
+    client -> {"type": "start", "language": "zh"}、音訊訊框…、{"type": "end"}
+    worker -> {"type": "result", "text", "confidence", "is_final", ...}…、{"type": "done"}
+              或 {"type": "error", "message"}
+健康檢查：
+    client -> {"type": "ping"}；worker -> {"type": "pong", "active_streams", "stats"}
+"""
+import asyncio
+import json
+import struct
+from typing import Any, Dict, Tuple
+
+FRAME_JSON = b"J"
+FRAME_AUDIO = b"A"
+
+_HEADER = struct.Struct(">cI")
+
+# 單一訊框的大小上限，避免異常長度耗盡記憶體
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+
+class SpeechIPCError(Exception):
+    """通訊協定錯誤"""
+    pass
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[bytes, Any]:
+    """
+    讀取一個訊框
+
+    Returns:
+        (類型, 內容)；JSON 訊框的內容為解析後的物件，音訊訊框為 bytes
+
+    Raises:
+        asyncio.IncompleteReadError: 連線已關閉
+        SpeechIPCError: 訊框格式錯誤
+    """
+    header = await reader.readexactly(_HEADER.size)
+    kind, length = _HEADER.unpack(header)
+    if kind not in (FRAME_JSON, FRAME_AUDIO) or length > MAX_FRAME_SIZE:
+        raise SpeechIPCError(f"無效的訊框: {kind!r}, 長度 {length}")
+
+    payload = await reader.readexactly(length)
+    if kind == FRAME_JSON:
+        return kind, json.loads(payload)
+    return kind, payload
+
+
+def write_json(writer: asyncio.StreamWriter, message: Dict[str, Any]):
+    """寫入 JSON 控制訊息（呼叫端負責 drain）"""
+    payload = json.dumps(message, ensure_ascii=False).encode("utf-8")
+    writer.write(_HEADER.pack(FRAME_JSON, len(payload)) + payload)
+
+
+def write_audio(writer: asyncio.StreamWriter, audio: bytes):
+    """寫入音訊訊框（呼叫端負責 drain）"""
+    writer.write(_HEADER.pack(FRAME_AUDIO, len(audio)))
+    writer.write(audio)
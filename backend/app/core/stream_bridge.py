@@ -0,0 +1,99 @@
+"""同步串流 API 的非同步橋接
+
+同步的雙向串流 API（例如 Google SpeechClient.streaming_recognize）
+接收請求迭代器並回傳阻塞的回應迭代器。直接在協程中迭代會阻塞事件迴圈，
+這裡改在專用執行緒中執行：請求經由執行緒安全的佇列送入，回應經由 asyncio 佇列送回。
+"""
+import asyncio
+import logging
+import queue
+import threading
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# 佇列中的控制訊號
+_END = object()
+_ITEM = "item"
+_ERROR = "error"
+_DONE = "done"
+
+
+async def bridge_stream(
+    call: Callable[[Iterator[Any]], Iterable[Any]],
+    requests: AsyncIterator[Any],
+    name: str = "stream-bridge",
+) -> AsyncIterator[Any]:
+    """
+    在專用執行緒中執行同步串流呼叫
+
+    每個串流佔用一個執行緒（串流期間執行緒持續阻塞在網路 I/O，
+    不適合佔用有限的預設執行緒池），事件迴圈不會被阻塞，多個串流可在同一行程並行。
+
+    Args:
+        call: 接收同步請求迭代器、回傳同步回應迭代器的函式
+        requests: 非同步請求來源
+        name: 執行緒名稱
+
+    Yields:
+        call 回傳的回應；call 拋出的例外會在此重新拋出
+    """
+    loop = asyncio.get_running_loop()
+    request_queue: queue.Queue = queue.Queue()
+    results: asyncio.Queue = asyncio.Queue()
+    closed = threading.Event()
+
+    def post(kind: str, value: Any = None):
+        try:
+            loop.call_soon_threadsafe(results.put_nowait, (kind, value))
+        except RuntimeError:
+            # 事件迴圈已關閉
+            pass
+
+    def request_iterator() -> Iterator[Any]:
+        while True:
+            item = request_queue.get()
+            if item is _END:
+                return
+            yield item
+
+    def run():
+        try:
+            for response in call(request_iterator()):
+                if closed.is_set():
+                    break
+                post(_ITEM, response)
+        except Exception as e:
+            post(_ERROR, e)
+        else:
+            post(_DONE)
+
+    async def pump():
+        try:
+            async for item in requests:
+                request_queue.put(item)
+        finally:
+            request_queue.put(_END)
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    pump_task = asyncio.create_task(pump())
+
+    try:
+        while True:
+            kind, value = await results.get()
+            if kind == _ERROR:
+                raise value
+            if kind == _DONE:
+                break
+            yield value
+
+        if pump_task.done() and not pump_task.cancelled():
+            # 請求來源的例外（例如讀取音訊失敗）
+            pump_task.result()
+    finally:
+        # 呼叫端提前結束時停止送入請求，讓執行緒中的串流自然結束
+        closed.set()
+        request_queue.put(_END)
+        pump_task.cancel()
+        await asyncio.gather(pump_task, return_exceptions=True)
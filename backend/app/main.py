@@ -8,6 +8,15 @@ from app.core.config import settings
 from app.core.database import init_db, close_db
 from app.core.logging_config import setup_logging
 from app.api import courses, quizzes, transcripts, teacher_hints
+from app.services.slide_service import slide_service
+from app.services.slide_ingestion import slide_ingestion_service
+from app.services.llm_service import llm_service
+from app.services.grading_worker import grading_worker_service
+from app.services.notification_hub import notification_hub
+from app.services.hint_analysis import hint_analysis_service
+from app.services.transcript_writer import transcript_writer
+from app.services.speech_service import speech_service
+from app.services.speech_pool import speech_worker_pool
 
 logger = logging.getLogger(__name__)
 
@@ -20,11 +29,27 @@ async def lifespan(app: FastAPI):
     logger.info("Starting CourseAI API Server...")
     await init_db()
     logger.info("Database initialized")
+    slide_ingestion_service.start()
+    await slide_ingestion_service.recover()
+    transcript_writer.start()
+    if settings.SPEECH_BACKEND == "worker":
+        speech_worker_pool.start()
+    grading_worker_service.start()
+    await grading_worker_service.recover()
 
     yield
 
     # 關閉時執行
     logger.info("Shutting down CourseAI API Server...")
+    await slide_ingestion_service.stop()
+    await grading_worker_service.stop()
+    await speech_worker_pool.stop()
+    await hint_analysis_service.stop()
+    await transcript_writer.stop()
+    logger.info("Transcript buffer flushed")
+    await notification_hub.close()
+    slide_service.shutdown()
+    logger.info("Slide extraction pool stopped")
     await close_db()
     logger.info("Database connections closed")
 
@@ -61,6 +86,23 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """服務內部統計（快取命中率、佇列深度等）"""
+    return {
+        "slide_extraction": slide_service.pool.stats(),
+        "slide_cache": slide_service.cache.stats(),
+        "llm_cache": llm_service.cache.stats() if llm_service.cache else None,
+        "llm_inflight": llm_service.inflight.stats(),
+        "llm_scheduler": llm_service.scheduler.stats(),
+        "grading": grading_worker_service.stats(),
+        "notifications": notification_hub.stats(),
+        "hints": hint_analysis_service.stats(),
+        "transcript_writer": transcript_writer.stats(),
+        "speech": speech_service.stats() if speech_service else None,
+    }
+
+
 @app.get("/")
 async def root():
     """根路徑"""
@@ -1,6 +1,7 @@
 """資料庫模型"""
 from .course import Course
 from .slide import Slide
+from .slide_page import SlidePage
 from .transcript import Transcript
 from .course_summary import CourseSummary
 from .quiz import Quiz, QuizSubmission
@@ -10,6 +11,7 @@ from .user_stats import UserStats
 __all__ = [
     "Course",
     "Slide",
+    "SlidePage",
     "Transcript",
     "CourseSummary",
     "Quiz",
@@ -1,12 +1,20 @@
 """題庫模型"""
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
+import enum
 
 from app.core.database import Base
 
 
+class SubmissionStatus(str, enum.Enum):
+    """作答批改狀態枚舉"""
+    GRADING = "grading"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class Quiz(Base):
     """題庫資料表"""
     __tablename__ = "quizzes"
@@ -35,7 +43,11 @@ class QuizSubmission(Base):
     answers_json = Column(JSONB, nullable=False)
     results_json = Column(JSONB)  # 批改結果
     score = Column(Integer)
+    status = Column(String(20), default=SubmissionStatus.COMPLETED.value, nullable=False, index=True)
+    error_message = Column(Text)  # 批改失敗原因
+    claimed_at = Column(DateTime)  # 背景批改的認領時間（租約，批改期間定期更新）
     submitted_at = Column(DateTime, default=datetime.utcnow)
+    graded_at = Column(DateTime)
 
     # 關聯
     quiz = relationship("Quiz", back_populates="submissions")
@@ -2,10 +2,18 @@
 from datetime import datetime
 from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
+import enum
 
 from app.core.database import Base
 
 
+class SlideStatus(str, enum.Enum):
+    """講義處理狀態枚舉"""
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
+
 class Slide(Base):
     """講義檔案資料表"""
     __tablename__ = "slides"
@@ -16,10 +24,20 @@ class Slide(Base):
     file_path = Column(String(500), nullable=False)
     total_pages = Column(Integer)
     extracted_text = Column(Text)
+    status = Column(String(20), default=SlideStatus.PROCESSED.value, nullable=False)
+    processed_pages = Column(Integer, default=0)  # 背景處理進度
+    error_message = Column(Text)  # 處理失敗原因
+    claimed_at = Column(DateTime)  # 背景處理的認領時間（租約，處理期間定期更新）
     uploaded_at = Column(DateTime, default=datetime.utcnow)
 
     # 關聯
     course = relationship("Course", back_populates="slides")
+    pages = relationship(
+        "SlidePage",
+        back_populates="slide",
+        cascade="all, delete-orphan",
+        order_by="SlidePage.page_number",
+    )
 
     def __repr__(self):
         return f"<Slide {self.id}: {self.filename}>"
@@ -0,0 +1,27 @@
+"""講義逐頁內容模型"""
+from sqlalchemy import Column, String, Integer, Text, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+
+
+class SlidePage(Base):
+    """講義逐頁內容資料表"""
+    __tablename__ = "slide_pages"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    slide_id = Column(String(50), ForeignKey("slides.id", ondelete="CASCADE"), nullable=False)
+    page_number = Column(Integer, nullable=False)  # 從 1 開始
+    text = Column(Text, nullable=False, default="")
+    char_count = Column(Integer, nullable=False, default=0)
+
+    # 關聯
+    slide = relationship("Slide", back_populates="pages")
+
+    # 以 (slide_id, page_number) 唯一索引支援頁碼範圍查詢
+    __table_args__ = (
+        UniqueConstraint('slide_id', 'page_number', name='uq_slide_pages_slide_page'),
+    )
+
+    def __repr__(self):
+        return f"<SlidePage {self.slide_id} p.{self.page_number}>"
@@ -5,7 +5,12 @@ from .course import (
     CourseAnalyzeRequest,
     CourseAnalyzeResponse,
 )
-from .slide import SlideUploadResponse
+from .slide import (
+    SlideUploadResponse,
+    SlideStatusResponse,
+    SlidePageResponse,
+    SlidePagesResponse,
+)
 from .transcript import TranscriptItem, TranscriptResponse
 from .quiz import (
     QuizScopeResponse,
@@ -23,6 +28,9 @@ __all__ = [
     "CourseAnalyzeRequest",
     "CourseAnalyzeResponse",
     "SlideUploadResponse",
+    "SlideStatusResponse",
+    "SlidePageResponse",
+    "SlidePagesResponse",
     "TranscriptItem",
     "TranscriptResponse",
     "QuizScopeResponse",
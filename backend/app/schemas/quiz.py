@@ -102,6 +102,8 @@ class QuizResultResponse(BaseModel):
     """批改結果響應"""
     quiz_id: str
     submission_id: str
+    status: str = "completed"  # grading, completed, failed
+    error_message: Optional[str] = None
     total_questions: int
     correct_count: int
     score: int
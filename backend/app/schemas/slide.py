@@ -1,4 +1,5 @@
 """講義相關 Schemas"""
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -9,3 +10,30 @@ class SlideUploadResponse(BaseModel):
     pages: int
     extracted_text_preview: str
     status: str = "processed"
+
+
+class SlideStatusResponse(BaseModel):
+    """講義處理狀態響應"""
+    file_id: str
+    filename: str
+    status: str  # processing, processed, failed
+    total_pages: Optional[int] = None
+    processed_pages: int = 0
+    error: Optional[str] = None
+
+
+class SlidePageResponse(BaseModel):
+    """講義單頁內容"""
+    page_number: int
+    text: str
+    char_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class SlidePagesResponse(BaseModel):
+    """講義頁碼範圍內容響應"""
+    file_id: str
+    total_pages: Optional[int] = None
+    pages: List[SlidePageResponse]
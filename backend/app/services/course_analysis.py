@@ -0,0 +1,385 @@
+"""課程內容 map-reduce 分析
+
+講義依頁、語音轉錄依固定時間窗切成有 token 上限的區塊，
+各區塊在 LLM 排程器的並行上限下同時摘要（map），再合併成課程摘要（reduce）。
+區塊切分只取決於頁碼與時間窗，新增轉錄時既有區塊的提示不變，
+區塊摘要可直接命中 LLM 回應快取，只有新的區塊需要重新摘要。
+"""
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.course_summary import CourseSummary
+from app.models.slide import Slide
+from app.models.transcript import Transcript
+from app.services.llm_scheduler import estimate_tokens
+from app.services.llm_service import llm_service, LLMServiceError
+from app.services.slide_service import slide_service
+
+logger = logging.getLogger(__name__)
+
+# (檔名, [(頁碼, 內容)])
+SlidePages = Tuple[str, List[Tuple[int, str]]]
+# (時間戳記, 內容)
+TranscriptLine = Tuple[str, str]
+
+
+class ContentChunk:
+    """分析用的內容區塊"""
+
+    def __init__(self, label: str, text: str):
+        self.label = label
+        self.text = text
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text, 0)
+
+    def __repr__(self):
+        return f"<ContentChunk {self.label}>"
+
+
+def parse_timestamp(timestamp: str) -> int:
+    """將 HH:MM:SS（或 MM:SS）轉為秒數，格式錯誤時回傳 0"""
+    try:
+        seconds = 0
+        for part in timestamp.strip().split(":"):
+            seconds = seconds * 60 + int(float(part))
+        return seconds
+    except ValueError:
+        return 0
+
+
+def format_timestamp(seconds: int) -> str:
+    """將秒數轉為 HH:MM:SS"""
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _max_chars(max_tokens: int) -> int:
+    """token 上限換算為字元數（與 estimate_tokens 的粗估一致）"""
+    return max(1, max_tokens * 2)
+
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """將過長的文字依行切分，單行仍過長時硬切"""
+    parts: List[str] = []
+    current = ""
+    for line in text.splitlines():
+        while len(line) > max_chars:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:max_chars])
+            line = line[max_chars:]
+        if current and len(current) + len(line) + 1 > max_chars:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        parts.append(current)
+    return parts
+
+
+def chunk_slide_pages(filename: str, pages: List[Tuple[int, str]], max_tokens: int) -> List[ContentChunk]:
+    """
+    將講義依頁合併成區塊，區塊不拆開單頁（單頁過長時才切分）
+
+    Args:
+        filename: 講義檔名
+        pages: 依頁碼排序的 (頁碼, 內容)
+        max_tokens: 每個區塊的 token 上限
+
+    Returns:
+        內容區塊列表
+    """
+    max_chars = _max_chars(max_tokens)
+    chunks: List[ContentChunk] = []
+    buffer: List[str] = []
+    buffer_chars = 0
+    first_page = last_page = None
+
+    def flush():
+        nonlocal buffer, buffer_chars, first_page
+        if buffer:
+            pages_label = f"{first_page}" if first_page == last_page else f"{first_page}-{last_page}"
+            chunks.append(ContentChunk(f"講義 {filename} 第 {pages_label} 頁", "\n\n".join(buffer)))
+        buffer = []
+        buffer_chars = 0
+        first_page = None
+
+    for page_number, text in pages:
+        text = (text or "").strip()
+        if not text:
+            continue
+
+        page_text = f"[第 {page_number} 頁]\n{text}"
+        if len(page_text) > max_chars:
+            flush()
+            parts = split_text(text, max_chars)
+            for index, part in enumerate(parts, start=1):
+                chunks.append(ContentChunk(
+                    f"講義 {filename} 第 {page_number} 頁（{index}/{len(parts)}）",
+                    f"[第 {page_number} 頁]\n{part}",
+                ))
+            continue
+
+        if buffer and buffer_chars + len(page_text) > max_chars:
+            flush()
+        if first_page is None:
+            first_page = page_number
+        last_page = page_number
+        buffer.append(page_text)
+        buffer_chars += len(page_text) + 2
+
+    flush()
+    return chunks
+
+
+def chunk_transcripts(lines: List[TranscriptLine], window_seconds: int, max_tokens: int) -> List[ContentChunk]:
+    """
+    將語音轉錄依固定的時間窗切成區塊（時間窗內過長時再依 token 上限切段）
+
+    時間窗以絕對時間對齊（例如每 10 分鐘），新增的轉錄只會影響最後的區塊。
+
+    Args:
+        lines: 依時間排序的 (時間戳記, 內容)
+        window_seconds: 時間窗長度（秒）
+        max_tokens: 每個區塊的 token 上限
+
+    Returns:
+        內容區塊列表
+    """
+    window_seconds = max(1, window_seconds)
+    max_chars = _max_chars(max_tokens)
+
+    windows: Dict[int, List[str]] = {}
+    for timestamp, text in lines:
+        text = (text or "").strip()
+        if not text:
+            continue
+        window = parse_timestamp(timestamp) // window_seconds
+        windows.setdefault(window, []).append(f"[{timestamp}] {text}")
+
+    chunks: List[ContentChunk] = []
+    for window in sorted(windows):
+        start = window * window_seconds
+        label = f"轉錄 {format_timestamp(start)}-{format_timestamp(start + window_seconds)}"
+        parts = split_text("\n".join(windows[window]), max_chars)
+        for index, part in enumerate(parts, start=1):
+            # 段落編號只往後增加，既有段落的標籤不會因新增轉錄而改變
+            chunk_label = label if index == 1 else f"{label}（第 {index} 段）"
+            chunks.append(ContentChunk(chunk_label, part))
+    return chunks
+
+
+def summary_tokens(summary: Dict[str, Any]) -> int:
+    """摘要放入合併提示時的 token 數（與 merge_summaries 的序列化方式一致）"""
+    return estimate_tokens(json.dumps(summary, ensure_ascii=False), 0)
+
+
+def fit_summary(summary: Dict[str, Any], max_tokens: int) -> Dict[str, Any]:
+    """
+    將摘要縮減到 token 上限內
+
+    依序捨棄後段的概念、公式與重點（各至少保留一項），仍過長時截短所有文字。
+    """
+    if summary_tokens(summary) <= max_tokens:
+        return summary
+
+    summary = dict(summary)
+    for key in ("concepts", "formulas", "key_points"):
+        items = list(summary.get(key) or [])
+        while len(items) > 1 and summary_tokens({**summary, key: items}) > max_tokens:
+            items.pop()
+        summary[key] = items
+        if summary_tokens(summary) <= max_tokens:
+            return summary
+
+    max_chars = max(1, _max_chars(max_tokens) // 4)
+
+    def clip(value: Any) -> Any:
+        if isinstance(value, str):
+            return value[:max_chars]
+        if isinstance(value, list):
+            return [clip(item) for item in value]
+        if isinstance(value, dict):
+            return {key: clip(item) for key, item in value.items()}
+        return value
+
+    return clip(summary)
+
+
+class CourseAnalysisService:
+    """課程內容 map-reduce 分析服務"""
+
+    def __init__(
+        self,
+        chunk_tokens: int = 3000,
+        transcript_window: int = 600,
+        chunk_cache_ttl: int = 86400,
+    ):
+        self.chunk_tokens = chunk_tokens
+        self.transcript_window = transcript_window
+        self.chunk_cache_ttl = chunk_cache_ttl
+
+    async def load_content(
+        self,
+        db: AsyncSession,
+        course_id: str,
+        include_slides: bool = True,
+        include_transcript: bool = True,
+    ) -> Tuple[List[SlidePages], List[TranscriptLine]]:
+        """
+        讀取課程的逐頁講義與語音轉錄
+
+        Returns:
+            (講義列表, 轉錄列表)
+        """
+        slides: List[SlidePages] = []
+        if include_slides:
+            result = await db.execute(
+                select(Slide).where(Slide.course_id == course_id).order_by(Slide.uploaded_at)
+            )
+            for slide in result.scalars().all():
+                pages = [
+                    (page.page_number, page.text)
+                    for page in await slide_service.get_pages(db, slide.id)
+                ]
+                if not pages and slide.extracted_text:
+                    # 逐頁資料表建立前上傳的講義只有全文
+                    pages = [(1, slide.extracted_text)]
+                if pages:
+                    slides.append((slide.filename, pages))
+
+        transcripts: List[TranscriptLine] = []
+        if include_transcript:
+            result = await db.execute(
+                select(Transcript).where(Transcript.course_id == course_id).order_by(Transcript.timestamp)
+            )
+            transcripts = [(t.timestamp, t.text) for t in result.scalars().all()]
+
+        return slides, transcripts
+
+    def build_chunks(self, slides: List[SlidePages], transcripts: List[TranscriptLine]) -> List[ContentChunk]:
+        """將講義與轉錄切成分析區塊"""
+        chunks: List[ContentChunk] = []
+        for filename, pages in slides:
+            chunks.extend(chunk_slide_pages(filename, pages, self.chunk_tokens))
+        chunks.extend(chunk_transcripts(transcripts, self.transcript_window, self.chunk_tokens))
+        return chunks
+
+    async def analyze(self, slides: List[SlidePages], transcripts: List[TranscriptLine]) -> Dict[str, Any]:
+        """
+        分析完整課程內容
+
+        內容在單一區塊上限內時直接分析，否則以 map-reduce 分析。
+
+        Returns:
+            課程摘要（key_points, concepts, formulas）
+        """
+        chunks = self.build_chunks(slides, transcripts)
+        if not chunks:
+            raise LLMServiceError("沒有可分析的內容")
+
+        if sum(chunk.tokens for chunk in chunks) <= self.chunk_tokens:
+            slides_text = "\n\n".join(
+                f"[第 {number} 頁]\n{text}" for _, pages in slides for number, text in pages if text
+            )
+            transcript_text = "\n".join(f"[{timestamp}] {text}" for timestamp, text in transcripts)
+            return await llm_service.analyze_course_content(slides_text, transcript_text)
+
+        partials = await self._map(chunks)
+        return await self._reduce(partials)
+
+    async def _map(self, chunks: List[ContentChunk]) -> List[Dict[str, Any]]:
+        """並行摘要各區塊（並行數由 LLM 排程器限制）"""
+        results = await asyncio.gather(
+            *(
+                llm_service.summarize_chunk(chunk.label, chunk.text, cache_ttl=self.chunk_cache_ttl)
+                for chunk in chunks
+            ),
+            return_exceptions=True,
+        )
+
+        partials = []
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"略過摘要失敗的區塊: {chunk.label}, 錯誤: {str(result)}")
+                continue
+            partials.append(result)
+
+        if not partials:
+            raise LLMServiceError("所有內容區塊摘要皆失敗")
+        return partials
+
+    async def _reduce(self, partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        合併區塊摘要，超過 token 上限時分層合併
+
+        每份摘要先縮減到上限的一半以內，每組至少合併兩份，
+        每一層的摘要數都會減少，最後一次合併的提示不超過上限。
+        """
+        limit = max(1, self.chunk_tokens // 2)
+        partials = [fit_summary(partial, limit) for partial in partials]
+
+        while len(partials) > 1:
+            groups = self._group(partials)
+            if len(groups) == 1:
+                break
+            merged = await asyncio.gather(*(
+                llm_service.merge_summaries(group, final=False) if len(group) > 1 else group[0]
+                for group in groups
+            ))
+            partials = [fit_summary(partial, limit) for partial in merged]
+
+        return await llm_service.merge_summaries(partials, final=True)
+
+    def _group(self, partials: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """依 token 上限將摘要分組（保持原本順序，每組至少兩份以確保合併有進展）"""
+        groups: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        current_tokens = 0
+        for partial in partials:
+            tokens = summary_tokens(partial)
+            if len(current) > 1 and current_tokens + tokens > self.chunk_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(partial)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
+
+    async def save_summary(self, db: AsyncSession, course_id: str, summary: Dict[str, Any]) -> CourseSummary:
+        """寫入（或更新）課程摘要"""
+        result = await db.execute(
+            select(CourseSummary).where(CourseSummary.course_id == course_id)
+        )
+        course_summary = result.scalar_one_or_none()
+
+        if course_summary:
+            course_summary.summary_json = summary
+        else:
+            course_summary = CourseSummary(
+                id=f"summary_{uuid.uuid4().hex[:12]}",
+                course_id=course_id,
+                summary_json=summary,
+            )
+            db.add(course_summary)
+
+        await db.commit()
+        return course_summary
+
+
+# 建立全域實例
+course_analysis_service = CourseAnalysisService(
+    chunk_tokens=settings.ANALYSIS_CHUNK_TOKENS,
+    transcript_window=settings.ANALYSIS_TRANSCRIPT_WINDOW,
+    chunk_cache_ttl=settings.ANALYSIS_CHUNK_CACHE_TTL,
+)
@@ -0,0 +1,188 @@
+"""講義擷取行程池
+
+將 PyPDF2 / python-pptx / python-docx 等 CPU 密集的解析工作移到獨立行程執行，
+避免阻塞事件迴圈（例如同一個 worker 上的即時轉錄 WebSocket）。
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionPoolError(Exception):
+    """擷取行程池錯誤"""
+    pass
+
+
+class ExtractionQueueFullError(ExtractionPoolError):
+    """等待中的擷取工作已達上限"""
+    pass
+
+
+class ExtractionTimeoutError(ExtractionPoolError):
+    """擷取工作逾時"""
+    pass
+
+
+class ExtractionPool:
+    """
+    可設定的擷取行程池
+
+    - max_workers: 工作行程數量
+    - max_pending: 同時允許的上傳數（執行中 + 排隊中），超過即拒絕
+    - job_timeout: 單一工作的逾時秒數，逾時的行程會被回收
+    - max_jobs_per_worker: 每個工作行程處理 N 個工作後重啟，以限制記憶體成長
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_pending: int = 8,
+        job_timeout: float = 120.0,
+        max_jobs_per_worker: int = 50,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self.job_timeout = job_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending_jobs: Dict[ProcessPoolExecutor, Set[asyncio.Future]] = {}
+        self._admitted = 0
+        self._reapers: Set[asyncio.Task] = set()
+
+        # 統計資訊
+        self.completed_jobs = 0
+        self.failed_jobs = 0
+        self.timed_out_jobs = 0
+        self.rejected_uploads = 0
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """建立新的行程池，並設定工作行程回收"""
+        kwargs: Dict[str, Any] = {"max_workers": self.max_workers}
+        if self.max_jobs_per_worker > 0:
+            # max_tasks_per_child 不支援 fork 啟動方式
+            kwargs["mp_context"] = multiprocessing.get_context("spawn")
+            kwargs["max_tasks_per_child"] = self.max_jobs_per_worker
+        return ProcessPoolExecutor(**kwargs)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """取得目前的行程池（延遲建立）"""
+        if self._executor is None:
+            self._executor = self._create_executor()
+            self._pending_jobs[self._executor] = set()
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        """目前執行中 + 排隊中的上傳數"""
+        return self._admitted
+
+    @asynccontextmanager
+    async def admit(self):
+        """
+        取得一個處理名額，超過佇列上限時直接拒絕
+
+        一次上傳可能拆成多個工作（例如依頁數平行處理），因此名額以上傳為單位計算。
+        """
+        if self._admitted >= self.max_pending:
+            self.rejected_uploads += 1
+            raise ExtractionQueueFullError(
+                f"講義處理佇列已滿（上限 {self.max_pending}），請稍後再試"
+            )
+
+        self._admitted += 1
+        try:
+            yield
+        finally:
+            self._admitted -= 1
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """在行程池中執行 func(*args)，並套用逾時"""
+        executor = self._get_executor()
+
+        try:
+            future = asyncio.wrap_future(executor.submit(func, *args))
+        except BrokenProcessPool:
+            # 行程池已損毀（例如工作行程被 OOM killer 終止），重建後再試一次
+            self._retire(executor)
+            executor = self._get_executor()
+            future = asyncio.wrap_future(executor.submit(func, *args))
+
+        pending = self._pending_jobs[executor]
+        pending.add(future)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout=self.job_timeout)
+            self.completed_jobs += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timed_out_jobs += 1
+            pending.discard(future)
+            logger.warning(f"擷取工作逾時（{self.job_timeout} 秒），回收行程池")
+            self._retire(executor)
+            raise ExtractionTimeoutError(f"講義處理逾時（超過 {self.job_timeout} 秒）")
+        except BrokenProcessPool as e:
+            self.failed_jobs += 1
+            self._retire(executor)
+            raise ExtractionPoolError(f"擷取行程異常終止: {str(e)}")
+        except Exception:
+            self.failed_jobs += 1
+            raise
+        finally:
+            pending.discard(future)
+
+    def _retire(self, executor: ProcessPoolExecutor):
+        """
+        停用行程池：新工作改送到新的行程池，
+        舊行程池在其他工作完成後終止（包含卡住的工作行程）
+        """
+        if self._executor is executor:
+            self._executor = None
+
+        others = [f for f in self._pending_jobs.get(executor, set()) if not f.done()]
+
+        async def _terminate_when_idle():
+            if others:
+                await asyncio.wait(others, timeout=self.job_timeout)
+            self._terminate(executor)
+
+        try:
+            task = asyncio.get_running_loop().create_task(_terminate_when_idle())
+        except RuntimeError:
+            self._terminate(executor)
+        else:
+            self._reapers.add(task)
+            task.add_done_callback(self._reapers.discard)
+
+    def _terminate(self, executor: ProcessPoolExecutor):
+        """強制終止行程池的所有工作行程"""
+        self._pending_jobs.pop(executor, None)
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def shutdown(self):
+        """關閉所有行程池"""
+        for executor in list(self._pending_jobs):
+            self._terminate(executor)
+        self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """取得行程池統計"""
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._admitted,
+            "completed_jobs": self.completed_jobs,
+            "failed_jobs": self.failed_jobs,
+            "timed_out_jobs": self.timed_out_jobs,
+            "rejected_uploads": self.rejected_uploads,
+        }
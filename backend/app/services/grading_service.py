@@ -0,0 +1,351 @@
+"""測驗批改服務
+
+選擇題與填充題在本地比對答案（正規化全半形、大小寫、空白與選項代號），
+只有簡答題送交 LLM 批改，沒有簡答題的作答可在提交請求中立即完成批改。
+"""
+import asyncio
+import logging
+import re
+import unicodedata
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.user_stats import UserStats
+from app.services.llm_service import llm_service
+
+logger = logging.getLogger(__name__)
+
+# 本地批改的題型
+OBJECTIVE_TYPES = ("multiple_choice", "fill_in_blank")
+
+# 簡答題達此分數視為答對
+SHORT_ANSWER_PASS_SCORE = 60
+
+# 使用者統計保留的弱點概念數
+MAX_WEAK_CONCEPTS = 20
+
+# 單題批改完成回呼：(題目索引, 批改結果)
+ResultCallback = Callable[[int, Dict[str, Any]], Awaitable[None]]
+
+# 選項代號，例如 A、(B)、C.、D)、Ｅ、
+_OPTION_LABEL = re.compile(r"^[\(\[]?([a-z])[\)\]\.:、]?$")
+# 選項開頭的代號，例如「A. 二元樹」
+_OPTION_PREFIX = re.compile(r"^[\(\[]?[a-z][\)\]\.:、]\s*")
+# 答案前後可忽略的標點
+_EDGE_PUNCTUATION = "。．.，,、；;：:！!？?\"'「」『』"
+
+
+def normalize_answer(text: Any) -> str:
+    """正規化答案：全半形統一（NFKC）、轉小寫、移除空白與前後標點"""
+    text = unicodedata.normalize("NFKC", str(text or "")).lower()
+    text = re.sub(r"\s+", "", text)
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def _option_index(answer: Any, options: List[str]) -> Optional[int]:
+    """將答案對應到選項索引（可為選項文字或選項代號），無法對應時回傳 None"""
+    normalized = normalize_answer(answer)
+    if not normalized:
+        return None
+
+    normalized_options = [normalize_answer(option) for option in options]
+    if normalized in normalized_options:
+        return normalized_options.index(normalized)
+
+    # 選項文字本身帶有代號（例如「A. 二元樹」），比對去掉代號後的文字
+    for index, option in enumerate(options):
+        text = unicodedata.normalize("NFKC", str(option)).lower().strip()
+        if normalize_answer(_OPTION_PREFIX.sub("", text, count=1)) == normalized:
+            return index
+
+    match = _OPTION_LABEL.match(normalized)
+    if match:
+        index = ord(match.group(1)) - ord("a")
+        if index < len(options):
+            return index
+
+    return None
+
+
+def _numbers_equal(a: str, b: str) -> bool:
+    """數值答案比對（例如 0.50 與 0.5）"""
+    try:
+        return float(a) == float(b)
+    except ValueError:
+        return False
+
+
+class GradingError(Exception):
+    """批改錯誤"""
+    pass
+
+
+class GradingService:
+    """測驗批改服務"""
+
+    def is_correct(self, question: Dict[str, Any], user_answer: str) -> bool:
+        """判斷選擇題或填充題是否答對"""
+        correct_answer = question.get("correct_answer", "")
+
+        if question.get("type") == "multiple_choice" and question.get("options"):
+            options = question["options"]
+            correct_index = _option_index(correct_answer, options)
+            user_index = _option_index(user_answer, options)
+            if correct_index is not None and user_index is not None:
+                return correct_index == user_index
+
+        expected = normalize_answer(correct_answer)
+        actual = normalize_answer(user_answer)
+        if not actual:
+            return False
+        return actual == expected or _numbers_equal(actual, expected)
+
+    def grade_objective(self, question: Dict[str, Any], user_answer: str) -> Dict[str, Any]:
+        """批改選擇題或填充題"""
+        correct = self.is_correct(question, user_answer)
+
+        if correct:
+            feedback = "正確！"
+        else:
+            feedback = f"正確答案：{question.get('correct_answer', '')}"
+            if question.get("explanation"):
+                feedback += f"。{question['explanation']}"
+
+        return {
+            "question_id": question.get("question_id"),
+            "is_correct": correct,
+            "user_answer": user_answer,
+            "score": 100 if correct else 0,
+            "feedback": feedback,
+        }
+
+    def grade_local(
+        self,
+        questions: List[Dict[str, Any]],
+        answers: List[Dict[str, Any]],
+    ) -> Tuple[List[Optional[Dict[str, Any]]], List[Tuple[int, Dict[str, Any], str]]]:
+        """
+        本地批改選擇題與填充題
+
+        Args:
+            questions: Quiz.questions_json
+            answers: 作答列表（question_id, user_answer）
+
+        Returns:
+            (依題目順序的批改結果（簡答題為 None）, 待 LLM 批改的簡答題 [(索引, 題目, 作答)])
+        """
+        answer_map = {a.get("question_id"): a.get("user_answer", "") for a in answers}
+
+        results: List[Optional[Dict[str, Any]]] = []
+        pending: List[Tuple[int, Dict[str, Any], str]] = []
+        for index, question in enumerate(questions):
+            user_answer = answer_map.get(question.get("question_id"), "") or ""
+
+            if question.get("type") in OBJECTIVE_TYPES:
+                results.append(self.grade_objective(question, user_answer))
+            elif not normalize_answer(user_answer):
+                # 未作答的簡答題不需要送交 LLM
+                results.append({
+                    "question_id": question.get("question_id"),
+                    "is_correct": False,
+                    "user_answer": user_answer,
+                    "score": 0,
+                    "feedback": "未作答",
+                })
+            else:
+                results.append(None)
+                pending.append((index, question, user_answer))
+
+        return results, pending
+
+    def pending_result(self, question: Dict[str, Any], user_answer: str) -> Dict[str, Any]:
+        """尚在背景批改中的簡答題結果"""
+        return {
+            "question_id": question.get("question_id"),
+            "is_correct": False,
+            "user_answer": user_answer,
+            "score": None,
+            "feedback": "批改中",
+        }
+
+    async def grade_short_answers(
+        self,
+        pending: List[Tuple[int, Dict[str, Any], str]],
+        on_result: Optional[ResultCallback] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        以 LLM 批次批改簡答題
+
+        Args:
+            pending: 待批改的簡答題 [(索引, 題目, 作答)]
+            on_result: 每個批次完成時對其中每題呼叫 on_result(索引, 批改結果)
+
+        Returns:
+            與 pending 順序相同的批改結果
+
+        Raises:
+            GradingError: 有簡答題未能由 LLM 批改（不以 0 分計入成績）
+        """
+        if not pending:
+            return []
+
+        batch_size = max(1, settings.LLM_GRADING_BATCH_SIZE)
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        failed = 0
+
+        async def grade_batch(batch: List[Tuple[int, Dict[str, Any], str]]) -> List[Dict[str, Any]]:
+            grades = await llm_service.grade_short_answers_batch([
+                {
+                    "question_text": question.get("question_text", ""),
+                    "model_answer": question.get("correct_answer", ""),
+                    "user_answer": user_answer,
+                    "evaluation_criteria": question.get("evaluation_criteria", []),
+                }
+                for _, question, user_answer in batch
+            ], batch_size=batch_size)
+
+            nonlocal failed
+            failed += sum(1 for grade in grades if grade.get("score") is None)
+            results = [
+                self._short_answer_result(question, user_answer, grade)
+                for (_, question, user_answer), grade in zip(batch, grades)
+            ]
+            if on_result is not None:
+                for (index, _, _), result in zip(batch, results):
+                    await on_result(index, result)
+            return results
+
+        graded = await asyncio.gather(*(grade_batch(batch) for batch in batches))
+        if failed:
+            raise GradingError(f"{failed}/{len(pending)} 題簡答題批改失敗，請稍後重新批改")
+        return [result for batch_results in graded for result in batch_results]
+
+    def _short_answer_result(
+        self,
+        question: Dict[str, Any],
+        user_answer: str,
+        grade: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """將 LLM 批改結果轉為作答結果"""
+        score = grade.get("score")
+        if score is None:
+            feedback = "批改失敗，請稍後重新批改"
+        else:
+            feedback = grade.get("feedback", "")
+        return {
+            "question_id": question.get("question_id"),
+            "is_correct": score is not None and score >= SHORT_ANSWER_PASS_SCORE,
+            "user_answer": user_answer,
+            "score": round(score) if score is not None else 0,
+            "feedback": feedback,
+            "improvement_suggestions": grade.get("improvement_suggestions") or None,
+        }
+
+    async def grade_submission(
+        self,
+        questions: List[Dict[str, Any]],
+        answers: List[Dict[str, Any]],
+        on_result: Optional[ResultCallback] = None,
+    ) -> Dict[str, Any]:
+        """
+        批改整份作答
+
+        Args:
+            questions: Quiz.questions_json
+            answers: 作答列表
+            on_result: 簡答題批改完成時的回呼（用於即時推送）
+
+        Returns:
+            {"results": 依題目順序的批改結果, "score": 總分（0-100）, "correct_count": 答對題數}
+        """
+        results, pending = self.grade_local(questions, answers)
+
+        short_answer_results = await self.grade_short_answers(pending, on_result)
+        for (index, _, _), result in zip(pending, short_answer_results):
+            results[index] = result
+
+        return self.summarize(results)
+
+    def summarize(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """計算總分與答對題數"""
+        score = round(sum(r.get("score") or 0 for r in results) / len(results)) if results else 0
+        return {
+            "results": results,
+            "score": score,
+            "correct_count": sum(1 for r in results if r.get("is_correct")),
+        }
+
+    def build_review(
+        self,
+        questions: List[Dict[str, Any]],
+        results: List[Dict[str, Any]],
+    ) -> Dict[str, List[Any]]:
+        """依答錯的題目整理弱點概念與建議複習的講義頁碼、影片時間點"""
+        question_map = {q.get("question_id"): q for q in questions}
+        weak_concepts: List[str] = []
+        slide_pages: List[int] = []
+        video_timestamps: List[str] = []
+
+        for result in results:
+            # 略過答對與尚在批改中的題目
+            if result.get("is_correct") or result.get("score") is None:
+                continue
+            question = question_map.get(result.get("question_id"), {})
+
+            concept = question.get("concept")
+            if concept and concept not in weak_concepts:
+                weak_concepts.append(concept)
+            page = question.get("slide_reference")
+            if isinstance(page, int) and page not in slide_pages:
+                slide_pages.append(page)
+            timestamp = question.get("video_timestamp")
+            if timestamp and timestamp not in video_timestamps:
+                video_timestamps.append(timestamp)
+
+        return {
+            "weak_concepts": weak_concepts,
+            "slide_pages": sorted(slide_pages),
+            "video_timestamps": sorted(video_timestamps),
+        }
+
+    async def record_user_stats(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        score: int,
+        weak_concepts: List[str],
+    ):
+        """
+        更新使用者統計（作答次數、平均分數、弱點概念），由呼叫端 commit
+
+        Args:
+            db: 資料庫 Session
+            user_id: 使用者 ID
+            score: 本次作答總分
+            weak_concepts: 本次作答的弱點概念
+        """
+        result = await db.execute(
+            select(UserStats).where(UserStats.user_id == user_id).with_for_update()
+        )
+        stats = result.scalar_one_or_none()
+        if not stats:
+            stats = UserStats(user_id=user_id, total_courses=0, total_quizzes_taken=0, average_score=0.0)
+            db.add(stats)
+
+        taken = stats.total_quizzes_taken or 0
+        stats.average_score = ((stats.average_score or 0.0) * taken + score) / (taken + 1)
+        stats.total_quizzes_taken = taken + 1
+
+        # 最新的弱點概念排在前面
+        concepts = list(weak_concepts)
+        for concept in stats.weak_concepts or []:
+            if concept not in concepts:
+                concepts.append(concept)
+        stats.weak_concepts = concepts[:MAX_WEAK_CONCEPTS]
+
+
+# 建立全域實例
+grading_service = GradingService()
@@ -0,0 +1,284 @@
+"""作答背景批改服務
+
+含簡答題的作答在提交時只完成本地批改，簡答題交給背景 worker 以 LLM 批改，
+完成後寫回 QuizSubmission.results_json / score 並更新使用者統計。
+GRADING_BACKEND=memory 時在 API 行程內以 asyncio worker 處理；
+GRADING_BACKEND=celery 時送到 Celery（app.celery_worker）由獨立的 worker 行程處理。
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.quiz import Quiz, QuizSubmission, SubmissionStatus
+from app.services.grading_service import grading_service
+from app.services.notification_hub import notification_hub, submission_channel
+
+logger = logging.getLogger(__name__)
+
+
+async def process_submission(submission_id: str) -> Optional[str]:
+    """
+    批改一份作答並寫回資料庫（in-process worker 與 Celery worker 共用）
+
+    Returns:
+        批改後的狀態，作答不存在或不在批改中時回傳 None
+    """
+    # 讀取作答後先釋放連線，避免 LLM 批改期間佔用資料庫連線
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(QuizSubmission).where(QuizSubmission.id == submission_id)
+        )
+        submission = result.scalar_one_or_none()
+        if not submission or submission.status != SubmissionStatus.GRADING.value:
+            logger.info(f"作答不需批改，略過: {submission_id}")
+            return None
+
+        quiz_result = await db.execute(
+            select(Quiz.questions_json).where(Quiz.id == submission.quiz_id)
+        )
+        questions = quiz_result.scalar_one_or_none() or []
+        answers = submission.answers_json
+        user_id = submission.user_id
+
+    channel = submission_channel(submission_id)
+
+    async def publish_result(index: int, result: Dict[str, Any]):
+        # 每題批改完成即推送給訂閱者
+        await notification_hub.publish(channel, {
+            "type": "question_result",
+            "submission_id": submission_id,
+            "index": index,
+            "result": result,
+        })
+
+    try:
+        graded = await grading_service.grade_submission(questions, answers, on_result=publish_result)
+    except Exception as e:
+        logger.error(f"作答批改失敗: {submission_id}, 錯誤: {str(e)}")
+        if not await _update_grading_submission(
+            submission_id,
+            status=SubmissionStatus.FAILED.value,
+            error_message=str(e),
+        ):
+            return None
+        await notification_hub.publish(channel, {
+            "type": "failed",
+            "submission_id": submission_id,
+            "error_message": str(e),
+        })
+        return SubmissionStatus.FAILED.value
+
+    review = grading_service.build_review(questions, graded["results"])
+    async with AsyncSessionLocal() as db:
+        try:
+            # 只寫回仍在批改中的作答，同一份作答被重複排入時只有一個 worker 會更新統計
+            updated = await db.execute(
+                update(QuizSubmission)
+                .where(
+                    QuizSubmission.id == submission_id,
+                    QuizSubmission.status == SubmissionStatus.GRADING.value,
+                )
+                .values(
+                    results_json=graded["results"],
+                    score=graded["score"],
+                    status=SubmissionStatus.COMPLETED.value,
+                    error_message=None,
+                    graded_at=datetime.utcnow(),
+                )
+            )
+            if updated.rowcount != 1:
+                await db.rollback()
+                logger.info(f"作答已由其他 worker 寫回，略過: {submission_id}")
+                return None
+
+            await grading_service.record_user_stats(db, user_id, graded["score"], review["weak_concepts"])
+            await db.commit()
+        except Exception as e:
+            logger.error(f"寫入批改結果失敗: {submission_id}, 錯誤: {str(e)}")
+            await db.rollback()
+            raise
+
+    await notification_hub.publish(channel, {
+        "type": "completed",
+        "submission_id": submission_id,
+        "score": graded["score"],
+        "correct_count": graded["correct_count"],
+        "total_questions": len(graded["results"]),
+    })
+    return SubmissionStatus.COMPLETED.value
+
+
+async def _update_grading_submission(submission_id: str, **values) -> bool:
+    """更新仍在批改中的作答資料列，回傳是否有更新"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(QuizSubmission)
+            .where(
+                QuizSubmission.id == submission_id,
+                QuizSubmission.status == SubmissionStatus.GRADING.value,
+            )
+            .values(**values)
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+
+class GradingWorkerService:
+    """作答背景批改服務（佇列 + 固定數量的 worker）"""
+
+    def __init__(self, workers: int = 2, backend: str = "memory", lease_seconds: int = 300):
+        self.workers = max(1, workers)
+        self.backend = backend
+        # 批改中的作答由認領的行程定期續約，租約過期才由其他行程接手
+        self.lease_seconds = max(1, lease_seconds)
+
+        # 工作只是作答 ID，佇列不設上限；LLM 並行數由 LLM 排程器限制
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._recover_task: Optional[asyncio.Task] = None
+
+        # 統計資訊
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        """啟動背景 worker（Celery 模式或重複呼叫時不啟動）"""
+        if self.backend == "celery" or self._worker_tasks:
+            return
+
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        self._recover_task = asyncio.create_task(self._recover_loop())
+        logger.info(f"作答背景批改服務已啟動（{self.workers} 個 worker）")
+
+    async def stop(self):
+        """停止背景 worker"""
+        tasks = list(self._worker_tasks)
+        if self._recover_task is not None:
+            tasks.append(self._recover_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._recover_task = None
+        self._queue = None
+
+    async def _recover_loop(self):
+        """定期接手租約過期的作答（例如批改中的行程異常結束）"""
+        while True:
+            await asyncio.sleep(self.lease_seconds)
+            try:
+                await self.recover()
+            except Exception as e:
+                logger.error(f"作答批改復原失敗: {str(e)}")
+
+    async def recover(self):
+        """
+        重新排入租約過期的批改中作答
+
+        多個 API 行程同時復原時，以條件式 UPDATE 認領，只排入本行程認領成功的作答。
+        """
+        if self.backend == "celery":
+            # Celery 的工作保存在 broker 中，不需要復原
+            return
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        expired = or_(QuizSubmission.claimed_at.is_(None), QuizSubmission.claimed_at < cutoff)
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(QuizSubmission.id).where(
+                    QuizSubmission.status == SubmissionStatus.GRADING.value,
+                    expired,
+                )
+            )
+            submission_ids = result.scalars().all()
+
+            for submission_id in submission_ids:
+                claim = await db.execute(
+                    update(QuizSubmission)
+                    .where(
+                        QuizSubmission.id == submission_id,
+                        QuizSubmission.status == SubmissionStatus.GRADING.value,
+                        expired,
+                    )
+                    .values(claimed_at=datetime.utcnow())
+                )
+                await db.commit()
+                if claim.rowcount != 1:
+                    # 已由其他行程認領
+                    continue
+                self.enqueue(submission_id)
+
+    def enqueue(self, submission_id: str):
+        """排入批改工作"""
+        if self.backend == "celery":
+            from app.celery_worker import grade_submission_task
+
+            grade_submission_task.delay(submission_id)
+            return
+
+        self.start()
+        self._queue.put_nowait(submission_id)
+
+    async def _worker(self, worker_id: int):
+        """從佇列取出工作並處理"""
+        while True:
+            submission_id = await self._queue.get()
+            lease = asyncio.create_task(self._renew_lease(submission_id))
+            try:
+                status = await process_submission(submission_id)
+                if status == SubmissionStatus.COMPLETED.value:
+                    self.completed += 1
+                elif status == SubmissionStatus.FAILED.value:
+                    self.failed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"作答批改 worker {worker_id} 發生錯誤: {str(e)}")
+            finally:
+                lease.cancel()
+                await asyncio.gather(lease, return_exceptions=True)
+                self._queue.task_done()
+
+    async def _renew_lease(self, submission_id: str):
+        """批改期間定期續約，避免其他行程重複批改"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(QuizSubmission)
+                        .where(
+                            QuizSubmission.id == submission_id,
+                            QuizSubmission.status == SubmissionStatus.GRADING.value,
+                        )
+                        .values(claimed_at=datetime.utcnow())
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.warning(f"作答批改續約失敗: {submission_id}, 錯誤: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """取得批改統計"""
+        return {
+            "backend": self.backend,
+            "workers": len(self._worker_tasks),
+            "pending": self._queue.qsize() if self._queue else 0,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+# 建立全域實例
+grading_worker_service = GradingWorkerService(
+    workers=settings.GRADING_WORKERS,
+    backend=settings.GRADING_BACKEND,
+    lease_seconds=settings.GRADING_LEASE_SECONDS,
+)
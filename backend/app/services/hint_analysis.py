@@ -0,0 +1,142 @@
+"""老師提示背景分析
+
+即時轉錄偵測到提示語時，先以關鍵字結果建立暫定的 TeacherHint 並通知前端，
+LLM 分析（概念、講義頁碼、信心分數）交給各課程的背景佇列處理，
+完成後更新資料列並再次通知，避免 LLM 往返阻塞字幕推送。
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.teacher_hint import TeacherHint
+from app.services.hint_service import hint_service
+
+logger = logging.getLogger(__name__)
+
+# 分析完成回呼：傳入分析結果（含 hint_id）
+EnrichCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class HintJob:
+    """單一提示分析工作"""
+
+    def __init__(
+        self,
+        hint_id: int,
+        text: str,
+        timestamp: str,
+        context: str = "",
+        on_enriched: Optional[EnrichCallback] = None,
+    ):
+        self.hint_id = hint_id
+        self.text = text
+        self.timestamp = timestamp
+        self.context = context
+        self.on_enriched = on_enriched
+
+
+class HintAnalysisService:
+    """老師提示背景分析服務（每個課程一個有上限的佇列與 worker）"""
+
+    def __init__(self, queue_size: int = 20):
+        self.queue_size = max(1, queue_size)
+
+        # 課程 ID -> 待分析的工作 / 處理中的 worker
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+
+        # 統計資訊
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def enqueue(self, course_id: str, job: HintJob):
+        """
+        排入提示分析工作
+
+        佇列已滿時捨棄最舊的工作（該提示保留暫定內容），讓最新的提示優先分析。
+        """
+        queue = self._queues.get(course_id)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.queue_size)
+            self._queues[course_id] = queue
+
+        if queue.full():
+            dropped = queue.get_nowait()
+            queue.task_done()
+            self.dropped += 1
+            logger.warning(f"提示分析佇列已滿，略過提示: {course_id}/{dropped.hint_id}")
+        queue.put_nowait(job)
+
+        worker = self._workers.get(course_id)
+        if worker is None or worker.done():
+            self._workers[course_id] = asyncio.create_task(self._worker(course_id, queue))
+
+    async def _worker(self, course_id: str, queue: asyncio.Queue):
+        """依序處理課程的提示，佇列清空後結束"""
+        while not queue.empty():
+            job = queue.get_nowait()
+            try:
+                await self.process(job)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"提示分析失敗: {course_id}/{job.hint_id}, 錯誤: {str(e)}")
+            finally:
+                queue.task_done()
+
+        # 清空與移除之間沒有 await，不會漏掉新排入的工作
+        self._queues.pop(course_id, None)
+        self._workers.pop(course_id, None)
+
+    async def process(self, job: HintJob) -> Dict[str, Any]:
+        """以 LLM 分析提示、更新 TeacherHint 並通知"""
+        analysis = await hint_service.analyze_hint(job.text, job.timestamp, job.context)
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(TeacherHint)
+                .where(TeacherHint.id == job.hint_id)
+                .values(
+                    related_concept=analysis["concept"],
+                    slide_page=analysis.get("slide_page"),
+                    confidence=analysis["confidence"],
+                )
+            )
+            await db.commit()
+
+        enriched = {"hint_id": job.hint_id, **analysis}
+        if job.on_enriched is not None:
+            try:
+                await job.on_enriched(enriched)
+            except Exception as e:
+                # 連線可能已關閉，分析結果仍已寫入資料庫
+                logger.debug(f"提示分析結果通知失敗: {job.hint_id}, 錯誤: {str(e)}")
+        return enriched
+
+    async def stop(self):
+        """停止所有 worker（未處理的提示保留暫定內容）"""
+        workers = list(self._workers.values())
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """取得提示分析統計"""
+        return {
+            "courses": len(self._workers),
+            "pending": sum(q.qsize() for q in self._queues.values()),
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+# 建立全域實例
+hint_analysis_service = HintAnalysisService(queue_size=settings.HINT_QUEUE_SIZE)
@@ -3,6 +3,7 @@ import re
 import logging
 from typing import Optional, Dict
 from app.services.llm_service import llm_service, LLMServiceError
+from app.services.llm_scheduler import LLMPriority
 
 logger = logging.getLogger(__name__)
 
@@ -86,7 +87,8 @@ class HintService:
             response = await llm_service.generate_completion(
                 prompt,
                 temperature=0.3,
-                max_tokens=100
+                max_tokens=100,
+                priority=LLMPriority.REALTIME,
             )
 
             # 嘗試解析 JSON
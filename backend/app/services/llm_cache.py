@@ -0,0 +1,134 @@
+"""LLM 回應快取
+
+以 (model, prompt 雜湊, temperature, max_tokens) 為鍵快取 LLM 補全結果，
+分為行程內 LRU 與可選的 Redis 兩層，兩層都有 TTL。
+"""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class CompletionCache:
+    """LLM 補全快取（行程內 LRU + 可選 Redis）"""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: int = 3600,
+        redis_url: Optional[str] = None,
+        namespace: str = "courseai:llm:",
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.namespace = namespace
+
+        # key -> (到期時間, 回應)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+        self._redis = None
+        if redis_url:
+            if REDIS_AVAILABLE:
+                self._redis = aioredis.from_url(redis_url, decode_responses=True)
+            else:
+                logger.warning("redis 套件未安裝，LLM 快取僅使用行程內快取")
+
+        # 統計資訊
+        self.hits = 0
+        self.misses = 0
+        self.redis_hits = 0
+        self.redis_errors = 0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        """產生快取鍵"""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        raw = json.dumps([model, prompt_hash, temperature, max_tokens])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """取得快取的回應，不存在或已過期時回傳 None"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        if self._redis is not None:
+            try:
+                value = await self._redis.get(self.namespace + key)
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"讀取 Redis LLM 快取失敗: {str(e)}")
+                value = None
+
+            if value is not None:
+                ttl = await self._remaining_ttl(key)
+                self._store_local(key, value, ttl)
+                self.hits += 1
+                self.redis_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None):
+        """寫入快取"""
+        ttl = ttl or self.ttl
+        self._store_local(key, value, ttl)
+
+        if self._redis is not None:
+            try:
+                await self._redis.set(self.namespace + key, value, ex=ttl)
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"寫入 Redis LLM 快取失敗: {str(e)}")
+
+    def _store_local(self, key: str, value: str, ttl: int):
+        """寫入行程內快取，超過上限時淘汰最久未使用的項目"""
+        if self.max_entries <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _remaining_ttl(self, key: str) -> int:
+        """取得 Redis 項目剩餘的 TTL，讓行程內快取與 Redis 同時過期"""
+        try:
+            ttl = await self._redis.ttl(self.namespace + key)
+        except Exception:
+            ttl = -1
+        return ttl if ttl and ttl > 0 else self.ttl
+
+    def clear(self):
+        """清除行程內快取"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """取得快取統計"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "redis_enabled": self._redis is not None,
+            "redis_hits": self.redis_hits,
+            "redis_errors": self.redis_errors,
+        }
@@ -0,0 +1,184 @@
+"""LLM 請求排程器
+
+限制同時進行的 LLM 請求數與每分鐘 token 用量，
+超過上限的請求依優先順序排隊（即時提示 > 批改 > 內容分析 > 測驗生成），
+讓系統滿載時即時路徑仍維持低延遲。
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LLMPriority(IntEnum):
+    """LLM 請求優先順序（數值越小越優先）"""
+    REALTIME = 0  # 即時提示分析
+    GRADING = 1  # 批改
+    ANALYSIS = 2  # 課程內容分析
+    QUIZ = 3  # 測驗生成
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """粗估一次請求的 token 用量（提示長度的一半 + 最大生成數）"""
+    return len(prompt) // 2 + max_tokens
+
+
+class _PriorityStats:
+    """單一優先順序的排隊統計"""
+
+    def __init__(self):
+        self.dispatched = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float):
+        self.dispatched += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def to_dict(self, queued: int) -> Dict[str, Any]:
+        return {
+            "queued": queued,
+            "dispatched": self.dispatched,
+            "avg_wait_ms": round(self.total_wait / self.dispatched * 1000, 2) if self.dispatched else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+
+class LLMScheduler:
+    """並行數上限 + token 桶 + 優先佇列"""
+
+    def __init__(self, max_in_flight: int = 8, tokens_per_minute: int = 0):
+        """
+        Args:
+            max_in_flight: 同時進行的請求上限
+            tokens_per_minute: 每分鐘 token 預算，0 表示不限制
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.tokens_per_minute = tokens_per_minute
+
+        self._in_flight = 0
+        self._tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+
+        # (優先順序, 序號, 入隊時間, token 數, future)
+        self._queue: List[Tuple[int, int, float, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self._stats = {priority: _PriorityStats() for priority in LLMPriority}
+
+    @property
+    def in_flight(self) -> int:
+        """目前進行中的請求數"""
+        return self._in_flight
+
+    @asynccontextmanager
+    async def slot(self, priority: LLMPriority = LLMPriority.ANALYSIS, tokens: int = 0) -> AsyncIterator[None]:
+        """
+        取得執行名額，離開時釋放
+
+        Args:
+            priority: 請求優先順序
+            tokens: 預估 token 用量
+        """
+        await self._acquire(priority, tokens)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: LLMPriority, tokens: int):
+        if self.tokens_per_minute > 0:
+            # 單一請求超過整分鐘預算時視為用完整個預算，避免永遠排不到
+            tokens = min(tokens, self.tokens_per_minute)
+        else:
+            tokens = 0
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._queue, (int(priority), next(self._counter), time.monotonic(), tokens, future))
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已取得名額但呼叫者被取消，歸還名額
+                self._release()
+            else:
+                future.cancel()
+                self._dispatch()
+            raise
+
+    def _release(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _refill(self):
+        if self.tokens_per_minute <= 0:
+            return
+        now = time.monotonic()
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._tokens = min(
+            float(self.tokens_per_minute),
+            self._tokens + elapsed * self.tokens_per_minute / 60.0,
+        )
+
+    def _dispatch(self):
+        """依優先順序放行排隊中的請求"""
+        self._refill()
+        while self._queue and self._in_flight < self.max_in_flight:
+            priority, _, enqueued_at, tokens, future = self._queue[0]
+            if future.done():
+                # 已取消的請求
+                heapq.heappop(self._queue)
+                continue
+
+            if tokens > self._tokens:
+                # token 不足：等補充後再放行，較低優先的請求不可插隊
+                self._schedule_refill(tokens - self._tokens)
+                return
+
+            heapq.heappop(self._queue)
+            self._tokens -= tokens
+            self._in_flight += 1
+            self._stats[LLMPriority(priority)].record(time.monotonic() - enqueued_at)
+            future.set_result(None)
+
+    def _schedule_refill(self, missing_tokens: float):
+        if self._timer is not None:
+            return
+        delay = missing_tokens * 60.0 / self.tokens_per_minute
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(delay, self._on_refill_timer)
+
+    def _on_refill_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """取得排程統計"""
+        queued = {priority: 0 for priority in LLMPriority}
+        for priority, _, _, _, future in self._queue:
+            if not future.done():
+                queued[LLMPriority(priority)] += 1
+
+        self._refill()
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "tokens_per_minute": self.tokens_per_minute,
+            "tokens_available": int(self._tokens) if self.tokens_per_minute > 0 else None,
+            "priorities": {
+                priority.name.lower(): self._stats[priority].to_dict(queued[priority])
+                for priority in LLMPriority
+            },
+        }
@@ -1,9 +1,16 @@
 """LLM 整合服務"""
+import asyncio
 import json
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional
 from openai import AsyncOpenAI
 from app.core.config import settings
+from app.core.json_stream import JSONArrayStreamParser
+from app.core.single_flight import SingleFlight
+from app.services.llm_cache import CompletionCache
+from app.services.llm_scheduler import LLMPriority, LLMScheduler, estimate_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +20,52 @@ class LLMServiceError(Exception):
     pass
 
 
+class CompletionResult:
+    """LLM 補全結果與用量"""
+
+    def __init__(
+        self,
+        content: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency: float = 0.0,
+        cached: bool = False,
+    ):
+        self.content = content
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.latency = latency  # 秒
+        self.cached = cached
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def __repr__(self):
+        return f"<CompletionResult {self.total_tokens} tokens, {self.latency:.2f}s>"
+
+
+def _extract_json(response: str, open_char: str, close_char: str) -> Any:
+    """解析 JSON 回應，失敗時擷取第一個 open_char 到最後一個 close_char 之間的內容"""
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        json_start = response.find(open_char)
+        json_end = response.rfind(close_char) + 1
+        if json_start != -1 and json_end > json_start:
+            try:
+                return json.loads(response[json_start:json_end])
+            except json.JSONDecodeError:
+                pass
+        raise LLMServiceError("無法解析 LLM 回應")
+
+
+def _usage_tokens(usage: Any, field: str) -> int:
+    """取得 API 回應中的 token 用量（缺少時為 0）"""
+    value = getattr(usage, field, None)
+    return value if isinstance(value, int) else 0
+
+
 class LLMService:
     """LLM 整合服務（支援 OpenAI API）"""
 
@@ -23,26 +76,181 @@ class LLMService:
             self.client = None
             logger.warning("OPENAI_API_KEY 未設置，LLM 功能將無法使用")
 
+        self.cache: Optional[CompletionCache] = None
+        if settings.LLM_CACHE_ENABLED:
+            self.cache = CompletionCache(
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                ttl=settings.LLM_CACHE_TTL,
+                redis_url=settings.REDIS_URL if settings.LLM_CACHE_USE_REDIS else None,
+            )
+
+        # 合併相同參數的並行請求
+        self.inflight = SingleFlight()
+
+        # 限制並行數與 token 用量，依優先順序排隊
+        self.scheduler = LLMScheduler(
+            max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        )
+
     async def generate_completion(
         self,
         prompt: str,
         model: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 2000,
+        use_cache: bool = True,
+        cache_ttl: Optional[int] = None,
+        coalesce: bool = True,
+        priority: LLMPriority = LLMPriority.ANALYSIS,
+        validate: Optional[Callable[[str], Any]] = None,
     ) -> str:
-        """生成文字補全"""
+        """
+        生成文字補全（參數同 generate_completion_result）
+
+        Returns:
+            生成的文字
+        """
+        result = await self.generate_completion_result(
+            prompt,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_cache=use_cache,
+            cache_ttl=cache_ttl,
+            coalesce=coalesce,
+            priority=priority,
+            validate=validate,
+        )
+        return result.content
+
+    async def generate_completion_result(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        use_cache: bool = True,
+        cache_ttl: Optional[int] = None,
+        coalesce: bool = True,
+        priority: LLMPriority = LLMPriority.ANALYSIS,
+        validate: Optional[Callable[[str], Any]] = None,
+    ) -> CompletionResult:
+        """
+        生成文字補全並回傳用量
+
+        Args:
+            prompt: 提示文字
+            model: 模型名稱，預設使用 LLM_MODEL
+            temperature: 取樣溫度
+            max_tokens: 最大生成 token 數
+            use_cache: 是否使用回應快取（相同參數與提示直接回傳先前的結果）
+            cache_ttl: 快取有效時間（秒），預設使用 LLM_CACHE_TTL
+            coalesce: 是否與同時進行中的相同請求共用一次 LLM 呼叫
+            priority: 排程優先順序，系統滿載時優先順序高的請求先執行
+            validate: 檢查回應內容的函式，格式不正確時拋出例外；
+                回應通過檢查才寫入快取，避免快取無法解析的回應
+
+        Returns:
+            補全結果（快取命中時 token 數為 0）
+        """
         if not self.client:
             raise LLMServiceError("LLM 服務未初始化，請檢查 API 金鑰設置")
 
+        model = model or settings.LLM_MODEL
+        cache_key = CompletionCache.make_key(model, prompt, temperature, max_tokens)
+        use_cache = use_cache and self.cache is not None
+
+        if use_cache:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return CompletionResult(cached, cached=True)
+
+        async def fetch() -> CompletionResult:
+            async with self.scheduler.slot(priority, estimate_tokens(prompt, max_tokens)):
+                result = await self._request_completion(prompt, model, temperature, max_tokens)
+            if validate is not None:
+                validate(result.content)
+            if use_cache:
+                await self.cache.set(cache_key, result.content, cache_ttl)
+            return result
+
+        if coalesce:
+            # 只合併設定相同的請求，等待者不會沿用其他呼叫者的優先順序、快取與檢查設定
+            flight_key = f"{cache_key}:{priority.name}:{int(use_cache)}:{int(validate is not None)}"
+            return await self.inflight.do(flight_key, fetch)
+        return await fetch()
+
+    async def stream_completion(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        priority: LLMPriority = LLMPriority.ANALYSIS,
+    ) -> AsyncIterator[str]:
+        """
+        串流生成文字補全（不經過快取與請求合併）
+
+        Args:
+            prompt: 提示文字
+            model: 模型名稱，預設使用 LLM_MODEL
+            temperature: 取樣溫度
+            max_tokens: 最大生成 token 數
+            priority: 排程優先順序
+
+        Yields:
+            依序產生的文字片段
+        """
+        if not self.client:
+            raise LLMServiceError("LLM 服務未初始化，請檢查 API 金鑰設置")
+
+        model = model or settings.LLM_MODEL
+        async with self.scheduler.slot(priority, estimate_tokens(prompt, max_tokens)):
+            try:
+                stream = await self.client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                )
+
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+
+            except Exception as e:
+                logger.error(f"LLM 串流生成失敗: {str(e)}")
+                raise LLMServiceError(f"LLM 串流生成失敗: {str(e)}")
+
+    async def _request_completion(
+        self,
+        prompt: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> CompletionResult:
+        """呼叫 LLM API"""
         try:
+            started = time.perf_counter()
             response = await self.client.chat.completions.create(
-                model=model or settings.LLM_MODEL,
+                model=model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=temperature,
                 max_tokens=max_tokens,
             )
 
-            return response.choices[0].message.content.strip()
+            usage = getattr(response, "usage", None)
+            return CompletionResult(
+                response.choices[0].message.content.strip(),
+                prompt_tokens=_usage_tokens(usage, "prompt_tokens"),
+                completion_tokens=_usage_tokens(usage, "completion_tokens"),
+                latency=time.perf_counter() - started,
+            )
 
         except Exception as e:
             logger.error(f"LLM 生成失敗: {str(e)}")
@@ -58,10 +266,10 @@ class LLMService:
 分析以下課程內容，生成重點摘要。
 
 講義內容：
-{slides_text[:3000]}
+{slides_text}
 
 課堂語音轉錄：
-{transcript_text[:3000]}
+{transcript_text}
 
 請完成以下任務：
 1. 提取 3-5 個核心重點，每個重點包含標題和詳細說明
@@ -84,26 +292,140 @@ class LLMService:
 """
 
         try:
-            response = await self.generate_completion(prompt, temperature=0.5)
+            response = await self.generate_completion(
+                prompt,
+                temperature=0.5,
+                priority=LLMPriority.ANALYSIS,
+                validate=lambda r: _extract_json(r, "{", "}"),
+            )
 
-            # 嘗試解析 JSON
-            try:
-                result = json.loads(response)
-                return result
-            except json.JSONDecodeError:
-                # 如果回應不是有效的 JSON，嘗試提取 JSON 部分
-                json_start = response.find('{')
-                json_end = response.rfind('}') + 1
-                if json_start != -1 and json_end > json_start:
-                    result = json.loads(response[json_start:json_end])
-                    return result
-                else:
-                    raise LLMServiceError("無法解析 LLM 回應")
+            return _extract_json(response, "{", "}")
 
         except Exception as e:
             logger.error(f"課程分析失敗: {str(e)}")
             raise LLMServiceError(f"課程分析失敗: {str(e)}")
 
+    async def summarize_chunk(
+        self,
+        label: str,
+        text: str,
+        cache_ttl: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        摘要單一內容區塊（map-reduce 分析的 map 階段）
+
+        Args:
+            label: 區塊說明，例如「講義 lecture.pdf 第 1-4 頁」或「轉錄 00:00:00-00:10:00」
+            text: 區塊內容
+            cache_ttl: 區塊結果的快取時間（秒）
+
+        Returns:
+            與課程摘要相同結構的區塊重點
+        """
+        prompt = f"""
+以下是課程內容的一個片段（{label}），請整理此片段的重點。
+
+片段內容：
+{text}
+
+請完成以下任務：
+1. 提取此片段的重點（最多 5 個），每個重點包含標題和說明
+2. 識別重要概念（關鍵詞）
+3. 提取公式或重要定理
+
+請以 JSON 格式回傳，格式如下：
+{{
+  "key_points": [
+    {{
+      "title": "重點標題",
+      "content": "說明",
+      "slide_page": 頁碼或null,
+      "transcript_timestamps": ["時間戳記"]
+    }}
+  ],
+  "concepts": ["概念1"],
+  "formulas": ["公式1"]
+}}
+"""
+
+        try:
+            # 固定溫度讓相同區塊產生相同的快取鍵
+            response = await self.generate_completion(
+                prompt,
+                temperature=0.3,
+                max_tokens=1000,
+                cache_ttl=cache_ttl,
+                priority=LLMPriority.ANALYSIS,
+                validate=lambda r: _extract_json(r, "{", "}"),
+            )
+
+            return _extract_json(response, "{", "}")
+
+        except Exception as e:
+            logger.error(f"區塊摘要失敗: {label}, 錯誤: {str(e)}")
+            raise LLMServiceError(f"區塊摘要失敗: {str(e)}")
+
+    async def merge_summaries(
+        self,
+        partials: List[Dict[str, Any]],
+        final: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        合併多個區塊摘要（map-reduce 分析的 reduce 階段）
+
+        Args:
+            partials: 依課程順序排列的區塊摘要
+            final: 是否為最後一次合併（最後一次只保留 3-5 個核心重點）
+
+        Returns:
+            合併後的課程摘要
+        """
+        partials_text = "\n".join(
+            json.dumps(partial, ensure_ascii=False) for partial in partials
+        )
+        point_limit = "3-5" if final else "最多 8"
+
+        prompt = f"""
+以下是同一堂課依序切分後各片段的重點摘要（每行一個 JSON）。
+請合併成整堂課的重點摘要，去除重複內容，保留頁碼與時間戳記。
+
+片段摘要：
+{partials_text}
+
+請完成以下任務：
+1. 提取 {point_limit} 個核心重點，每個重點包含標題和詳細說明
+2. 整理重要概念（關鍵詞）
+3. 整理公式或重要定理
+
+請以 JSON 格式回傳，格式如下：
+{{
+  "key_points": [
+    {{
+      "title": "重點標題",
+      "content": "詳細說明",
+      "slide_page": 頁碼或null,
+      "transcript_timestamps": ["時間戳記"]
+    }}
+  ],
+  "concepts": ["概念1", "概念2"],
+  "formulas": ["公式1", "公式2"]
+}}
+"""
+
+        try:
+            response = await self.generate_completion(
+                prompt,
+                temperature=0.3,
+                priority=LLMPriority.ANALYSIS,
+                validate=lambda r: _extract_json(r, "{", "}"),
+            )
+
+            return _extract_json(response, "{", "}")
+
+        except Exception as e:
+            logger.error(f"摘要合併失敗: {str(e)}")
+            raise LLMServiceError(f"摘要合併失敗: {str(e)}")
+
     async def suggest_quiz_scopes(
         self,
         slides_text: str,
@@ -145,36 +467,34 @@ class LLMService:
 """
 
         try:
-            response = await self.generate_completion(prompt, temperature=0.5)
+            response = await self.generate_completion(
+                prompt,
+                temperature=0.5,
+                priority=LLMPriority.QUIZ,
+                validate=lambda r: _extract_json(r, "[", "]"),
+            )
 
-            # 解析 JSON
-            try:
-                result = json.loads(response)
-                return result
-            except json.JSONDecodeError:
-                # 嘗試提取 JSON 陣列
-                json_start = response.find('[')
-                json_end = response.rfind(']') + 1
-                if json_start != -1 and json_end > json_start:
-                    result = json.loads(response[json_start:json_end])
-                    return result
-                else:
-                    raise LLMServiceError("無法解析 LLM 回應")
+            return _extract_json(response, "[", "]")
 
         except Exception as e:
             logger.error(f"範圍建議失敗: {str(e)}")
             raise LLMServiceError(f"範圍建議失敗: {str(e)}")
 
-    async def generate_questions(
-        self,
+    @staticmethod
+    def _build_questions_prompt(
         content: str,
         question_types: Dict[str, int],
-        difficulty: str = "medium"
-    ) -> List[Dict[str, Any]]:
-        """生成題目"""
+        difficulty: str,
+        exclude: Optional[List[str]] = None,
+    ) -> str:
+        """產生出題提示"""
         total_questions = sum(question_types.values())
+        exclude_text = ""
+        if exclude:
+            listed = "\n".join(f"- {text[:100]}" for text in exclude)
+            exclude_text = f"\n請勿出與以下題目重複或相似的題目：\n{listed}\n"
 
-        prompt = f"""
+        return f"""
 根據以下課程內容，生成 {total_questions} 題測驗題目。
 
 課程內容：
@@ -186,7 +506,7 @@ class LLMService:
 - 簡答題：{question_types.get('short_answer', 0)} 題
 
 難度：{difficulty}
-
+{exclude_text}
 每題需包含：
 1. 題目文字
 2. 選項（選擇題）
@@ -207,39 +527,90 @@ class LLMService:
 ]
 """
 
+    async def generate_questions(
+        self,
+        content: str,
+        question_types: Dict[str, int],
+        difficulty: str = "medium",
+        exclude: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        生成題目
+
+        Args:
+            content: 課程內容
+            question_types: 各題型題數
+            difficulty: 難度
+            exclude: 不可重複的既有題目文字
+
+        Returns:
+            題目列表（只保留物件格式的題目）
+        """
+        prompt = self._build_questions_prompt(content, question_types, difficulty, exclude)
+
         try:
+            # 以較高溫度取樣，不快取也不合併，相同提示的分片各自得到不同題目
             response = await self.generate_completion(
                 prompt,
                 temperature=0.7,
-                max_tokens=3000
+                max_tokens=3000,
+                use_cache=False,
+                coalesce=False,
+                priority=LLMPriority.QUIZ,
             )
 
-            # 解析 JSON
-            try:
-                result = json.loads(response)
-                return result
-            except json.JSONDecodeError:
-                json_start = response.find('[')
-                json_end = response.rfind(']') + 1
-                if json_start != -1 and json_end > json_start:
-                    result = json.loads(response[json_start:json_end])
-                    return result
-                else:
-                    raise LLMServiceError("無法解析 LLM 回應")
+            result = _extract_json(response, "[", "]")
+            # 模型有時以物件包裝題目陣列
+            if isinstance(result, dict) and isinstance(result.get("questions"), list):
+                result = result["questions"]
+            if not isinstance(result, list):
+                raise LLMServiceError("題目生成結果不是 JSON 陣列")
+            return [question for question in result if isinstance(question, dict)]
 
         except Exception as e:
             logger.error(f"題目生成失敗: {str(e)}")
             raise LLMServiceError(f"題目生成失敗: {str(e)}")
 
-    async def grade_short_answer(
+    async def stream_questions(
         self,
+        content: str,
+        question_types: Dict[str, int],
+        difficulty: str = "medium"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        串流生成題目，每完成一題立即回傳
+
+        Yields:
+            題目資料
+        """
+        prompt = self._build_questions_prompt(content, question_types, difficulty)
+        parser = JSONArrayStreamParser()
+        count = 0
+
+        async with aclosing(self.stream_completion(
+            prompt,
+            temperature=0.7,
+            max_tokens=3000,
+            priority=LLMPriority.QUIZ,
+        )) as stream:
+            async for delta in stream:
+                for item in parser.feed(delta):
+                    if isinstance(item, dict):
+                        count += 1
+                        yield item
+
+        if count == 0:
+            raise LLMServiceError("無法解析 LLM 回應")
+
+    @staticmethod
+    def _build_short_answer_prompt(
         question_text: str,
         model_answer: str,
         user_answer: str,
-        evaluation_criteria: List[str]
-    ) -> Dict[str, Any]:
-        """批改簡答題"""
-        prompt = f"""
+        evaluation_criteria: List[str],
+    ) -> str:
+        """產生簡答題批改提示"""
+        return f"""
 請批改以下簡答題。
 
 題目：{question_text}
@@ -260,8 +631,25 @@ class LLMService:
 }}
 """
 
+    async def grade_short_answer(
+        self,
+        question_text: str,
+        model_answer: str,
+        user_answer: str,
+        evaluation_criteria: List[str]
+    ) -> Dict[str, Any]:
+        """批改簡答題"""
+        prompt = self._build_short_answer_prompt(
+            question_text, model_answer, user_answer, evaluation_criteria
+        )
+
         try:
-            response = await self.generate_completion(prompt, temperature=0.3)
+            response = await self.generate_completion(
+                prompt,
+                temperature=0.3,
+                use_cache=False,
+                priority=LLMPriority.GRADING,
+            )
 
             # 解析 JSON
             try:
@@ -280,6 +668,189 @@ class LLMService:
             logger.error(f"簡答題批改失敗: {str(e)}")
             raise LLMServiceError(f"簡答題批改失敗: {str(e)}")
 
+    async def grade_short_answers_batch(
+        self,
+        items: List[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        以單一提示批次批改多題簡答題
+
+        items 可來自同一份作答或同一份測驗的多份作答。
+        批次回應未通過驗證的題目會改以逐題呼叫批改。
+
+        Args:
+            items: 題目列表，每項包含 question_text, model_answer, user_answer,
+                evaluation_criteria，可選 item_id（原樣回傳）
+            batch_size: 每個提示的題數上限，預設使用 LLM_GRADING_BATCH_SIZE
+
+        Returns:
+            與 items 順序相同的批改結果，每項包含 score, feedback,
+            improvement_suggestions 及 meta（batched, batch_size, latency_ms,
+            batch_latency_ms, prompt_tokens, completion_tokens；批次批改時 latency_ms 與
+            token 數為批次平均分攤到每題的值，batch_latency_ms 為整個批次請求的延遲）；
+            批改失敗時 score 為 None 並附上 error
+        """
+        batch_size = max(1, batch_size or settings.LLM_GRADING_BATCH_SIZE)
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+        graded = await asyncio.gather(*(self._grade_batch(batch) for batch in batches))
+
+        results = [result for batch_results in graded for result in batch_results]
+        for item, result in zip(items, results):
+            if "item_id" in item:
+                result["item_id"] = item["item_id"]
+        return results
+
+    async def _grade_batch(self, items: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """批改一個批次，未通過驗證的題目逐題重新批改"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+        if len(items) > 1:
+            try:
+                completion = await self.generate_completion_result(
+                    self._build_batch_grading_prompt(items),
+                    temperature=0.3,
+                    max_tokens=300 * len(items) + 200,
+                    use_cache=False,
+                    priority=LLMPriority.GRADING,
+                )
+                parsed = self._parse_batch_grades(completion.content, len(items))
+
+                # 批次用量與延遲平均分攤到各題，整個批次的延遲另記於 batch_latency_ms
+                meta = {
+                    "batched": True,
+                    "batch_size": len(items),
+                    "latency_ms": round(completion.latency * 1000 / len(items), 2),
+                    "batch_latency_ms": round(completion.latency * 1000, 2),
+                    "prompt_tokens": completion.prompt_tokens // len(items),
+                    "completion_tokens": completion.completion_tokens // len(items),
+                }
+                for index, grade in parsed.items():
+                    results[index] = {**grade, "meta": dict(meta)}
+            except Exception as e:
+                logger.warning(f"批次批改失敗，改為逐題批改: {str(e)}")
+
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            if len(items) > 1:
+                logger.warning(f"批次批改有 {len(missing)}/{len(items)} 題未通過驗證，改為逐題批改")
+            fallback = await asyncio.gather(*(self._grade_single(items[index]) for index in missing))
+            for index, result in zip(missing, fallback):
+                results[index] = result
+
+        return results
+
+    async def _grade_single(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """逐題批改並記錄用量"""
+        try:
+            completion = await self.generate_completion_result(
+                self._build_short_answer_prompt(
+                    item["question_text"],
+                    item["model_answer"],
+                    item["user_answer"],
+                    item.get("evaluation_criteria", []),
+                ),
+                temperature=0.3,
+                use_cache=False,
+                priority=LLMPriority.GRADING,
+            )
+            grade = self._validate_grade(_extract_json(completion.content, "{", "}"))
+            if grade is None:
+                raise LLMServiceError("批改結果格式不正確")
+        except Exception as e:
+            logger.error(f"簡答題批改失敗: {str(e)}")
+            return {
+                "score": None,
+                "feedback": "",
+                "improvement_suggestions": [],
+                "error": str(e),
+                "meta": {"batched": False, "batch_size": 1},
+            }
+
+        grade["meta"] = {
+            "batched": False,
+            "batch_size": 1,
+            "latency_ms": round(completion.latency * 1000, 2),
+            "batch_latency_ms": round(completion.latency * 1000, 2),
+            "prompt_tokens": completion.prompt_tokens,
+            "completion_tokens": completion.completion_tokens,
+        }
+        return grade
+
+    @staticmethod
+    def _build_batch_grading_prompt(items: List[Dict[str, Any]]) -> str:
+        """產生批次批改提示"""
+        questions = "\n\n".join(
+            f"""[第 {index} 題]
+題目：{item['question_text']}
+標準答案：{item['model_answer']}
+評分標準：{', '.join(item.get('evaluation_criteria', []))}
+學生答案：{item['user_answer']}"""
+            for index, item in enumerate(items, start=1)
+        )
+
+        return f"""
+請批改以下 {len(items)} 題簡答題，每題獨立評分。
+
+{questions}
+
+每題請評估：
+1. 答案是否涵蓋關鍵概念
+2. 邏輯是否清晰
+3. 是否有錯誤或不完整的地方
+
+請以 JSON 陣列格式回傳，每題一個物件，index 為題號：
+[
+  {{
+    "index": 1,
+    "score": 分數（0-100）,
+    "feedback": "詳細回饋",
+    "improvement_suggestions": ["改進建議1"]
+  }}
+]
+"""
+
+    @classmethod
+    def _parse_batch_grades(cls, response: str, count: int) -> Dict[int, Dict[str, Any]]:
+        """解析批次批改結果，只回傳通過驗證的題目（index 從 0 開始）"""
+        data = _extract_json(response, "[", "]")
+        if not isinstance(data, list):
+            raise LLMServiceError("批次批改結果不是 JSON 陣列")
+
+        grades: Dict[int, Dict[str, Any]] = {}
+        for entry in data:
+            if not isinstance(entry, dict):
+                continue
+            index = entry.get("index")
+            if not isinstance(index, int) or not 1 <= index <= count or index - 1 in grades:
+                continue
+            grade = cls._validate_grade(entry)
+            if grade is not None:
+                grades[index - 1] = grade
+        return grades
+
+    @staticmethod
+    def _validate_grade(data: Any) -> Optional[Dict[str, Any]]:
+        """驗證單題批改結果，格式不正確時回傳 None"""
+        if not isinstance(data, dict):
+            return None
+        score = data.get("score")
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 100:
+            return None
+        feedback = data.get("feedback")
+        if not isinstance(feedback, str):
+            return None
+        suggestions = data.get("improvement_suggestions") or []
+        if not isinstance(suggestions, list):
+            suggestions = [str(suggestions)]
+
+        return {
+            "score": score,
+            "feedback": feedback,
+            "improvement_suggestions": [str(s) for s in suggestions],
+        }
+
 
 # 建立全域實例
 llm_service = LLMService()
@@ -0,0 +1,175 @@
+"""即時通知中心
+
+以頻道為單位推送訊息給訂閱者（例如 SSE 連線）。
+單一行程時在記憶體中轉送；設定 Redis 後經由 Redis pub/sub 轉送，
+讓 Celery worker 或其他 API 行程發布的訊息也能送到本行程的訂閱者。
+"""
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """單一訂閱者的訊息佇列"""
+
+    def __init__(self, channel: str, max_size: int = 100):
+        self.channel = channel
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.dropped = 0
+
+    def deliver(self, message: Dict[str, Any]):
+        """放入訊息，佇列已滿時捨棄最舊的訊息（慢速訂閱者不拖累發布端）"""
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """取得下一則訊息，逾時回傳 None"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class NotificationHub:
+    """頻道式通知中心（行程內或 Redis pub/sub）"""
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        namespace: str = "courseai:notify:",
+        queue_size: int = 100,
+    ):
+        self.namespace = namespace
+        self.queue_size = queue_size
+
+        # 頻道 -> 本行程的訂閱者
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+        self._redis = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        if redis_url:
+            if REDIS_AVAILABLE:
+                self._redis = aioredis.from_url(redis_url, decode_responses=True)
+            else:
+                logger.warning("redis 套件未安裝，通知僅在行程內轉送")
+
+        # 統計資訊
+        self.published = 0
+        self.redis_errors = 0
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[Subscription]:
+        """訂閱頻道，離開時自動取消訂閱"""
+        subscription = Subscription(channel, self.queue_size)
+        subscribers = self._subscribers.setdefault(channel, set())
+        subscribers.add(subscription)
+
+        if self._redis is not None and len(subscribers) == 1:
+            await self._redis_subscribe(channel)
+
+        try:
+            yield subscription
+        finally:
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(channel, None)
+                if self._redis is not None:
+                    await self._redis_unsubscribe(channel)
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        """發布訊息到頻道"""
+        self.published += 1
+
+        if self._redis is not None:
+            try:
+                await self._redis.publish(self.namespace + channel, json.dumps(message, ensure_ascii=False))
+                return
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"發布 Redis 通知失敗，改為行程內轉送: {str(e)}")
+
+        self._deliver(channel, message)
+
+    def _deliver(self, channel: str, message: Dict[str, Any]):
+        for subscription in list(self._subscribers.get(channel, ())):
+            subscription.deliver(message)
+
+    async def _redis_subscribe(self, channel: str):
+        try:
+            if self._pubsub is None:
+                self._pubsub = self._redis.pubsub()
+            await self._pubsub.subscribe(self.namespace + channel)
+            if self._listener is None or self._listener.done():
+                self._listener = asyncio.create_task(self._listen())
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"訂閱 Redis 通知失敗: {channel}, 錯誤: {str(e)}")
+
+    async def _redis_unsubscribe(self, channel: str):
+        try:
+            await self._pubsub.unsubscribe(self.namespace + channel)
+        except Exception as e:
+            self.redis_errors += 1
+            logger.warning(f"取消訂閱 Redis 通知失敗: {channel}, 錯誤: {str(e)}")
+
+    async def _listen(self):
+        """從 Redis 讀取訊息並轉送給本行程的訂閱者"""
+        while self._subscribers:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not message:
+                    continue
+                channel = message["channel"][len(self.namespace):]
+                self._deliver(channel, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"讀取 Redis 通知失敗: {str(e)}")
+                await asyncio.sleep(1)
+
+    async def close(self):
+        """停止 Redis 監聽"""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.close()
+            self._pubsub = None
+
+    def stats(self) -> Dict[str, Any]:
+        """取得通知統計"""
+        return {
+            "channels": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "redis_enabled": self._redis is not None,
+            "redis_errors": self.redis_errors,
+        }
+
+
+def submission_channel(submission_id: str) -> str:
+    """作答批改通知頻道"""
+    return f"submission:{submission_id}"
+
+
+# 建立全域實例
+notification_hub = NotificationHub(
+    redis_url=settings.REDIS_URL if settings.NOTIFY_USE_REDIS else None,
+)
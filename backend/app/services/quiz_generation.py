@@ -0,0 +1,236 @@
+"""分片題目生成
+
+一次要求大量題目時，單一提示常超過 max_tokens 而產生無法解析的 JSON。
+將題型需求依題型與內容段落切成小分片並行生成，
+合併時去除各分片間幾乎相同的題目，題數不足時排除既有題目補生成，
+並依最終順序重新編號 question_id。
+"""
+import asyncio
+import difflib
+import logging
+import math
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.course_analysis import split_text
+from app.services.llm_service import llm_service, LLMServiceError
+
+logger = logging.getLogger(__name__)
+
+# 題型輸出順序
+QUESTION_TYPE_ORDER = ("multiple_choice", "fill_in_blank", "short_answer")
+
+
+class QuizShard:
+    """題目生成分片"""
+
+    def __init__(self, question_type: str, count: int, section_index: int):
+        self.question_type = question_type
+        self.count = count
+        self.section_index = section_index
+
+    def __repr__(self):
+        return f"<QuizShard {self.question_type} x{self.count} @section {self.section_index}>"
+
+
+def normalize_question_text(text: str) -> str:
+    """正規化題目文字（全半形、大小寫、空白與標點）以比較相似度"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return re.sub(r"[\s\W_]+", "", text)
+
+
+def dedupe_questions(questions: List[Dict[str, Any]], threshold: float = 0.85) -> List[Dict[str, Any]]:
+    """
+    去除幾乎相同的題目（保留先出現的）
+
+    Args:
+        questions: 題目列表
+        threshold: 正規化後文字相似度達此值即視為重複
+
+    Returns:
+        去重後的題目列表
+    """
+    kept: List[Dict[str, Any]] = []
+    kept_texts: List[str] = []
+
+    for question in questions:
+        text = normalize_question_text(question.get("question_text", ""))
+        if not text:
+            continue
+
+        duplicate = False
+        for other in kept_texts:
+            if text == other:
+                duplicate = True
+                break
+            matcher = difflib.SequenceMatcher(None, text, other)
+            # 先用上界快速排除，再計算實際相似度
+            if matcher.real_quick_ratio() >= threshold and matcher.ratio() >= threshold:
+                duplicate = True
+                break
+
+        if not duplicate:
+            kept.append(question)
+            kept_texts.append(text)
+
+    return kept
+
+
+class QuizGenerationService:
+    """分片題目生成服務"""
+
+    def __init__(
+        self,
+        max_questions_per_shard: int = 5,
+        section_chars: int = 3000,
+        dedupe_threshold: float = 0.85,
+        topup_rounds: int = 1,
+    ):
+        self.max_questions_per_shard = max(1, max_questions_per_shard)
+        self.section_chars = section_chars
+        self.dedupe_threshold = dedupe_threshold
+        self.topup_rounds = max(0, topup_rounds)
+
+    def split_sections(self, content: str) -> List[str]:
+        """將課程內容依段落切成不超過 section_chars 的段落"""
+        sections = split_text(content.strip(), self.section_chars)
+        return sections or [content]
+
+    def plan_shards(self, question_types: Dict[str, int], section_count: int) -> List[QuizShard]:
+        """
+        依題型與內容段落規劃分片
+
+        每個題型依每片題數上限平均切分，分片輪流分配到各內容段落。
+        """
+        shards: List[QuizShard] = []
+        ordered_types = [t for t in QUESTION_TYPE_ORDER if t in question_types]
+        ordered_types += [t for t in question_types if t not in QUESTION_TYPE_ORDER]
+
+        for question_type in ordered_types:
+            count = question_types.get(question_type, 0)
+            if count <= 0:
+                continue
+
+            shard_count = math.ceil(count / self.max_questions_per_shard)
+            for i in range(shard_count):
+                size = count // shard_count + (1 if i < count % shard_count else 0)
+                shards.append(QuizShard(question_type, size, len(shards) % section_count))
+
+        return shards
+
+    async def _generate_shards(
+        self,
+        sections: List[str],
+        shards: List[QuizShard],
+        difficulty: str,
+        exclude: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """並行生成各分片題目，回傳（依分片順序排列的題目, 失敗分片數）"""
+        results = await asyncio.gather(
+            *(
+                llm_service.generate_questions(
+                    sections[shard.section_index],
+                    {shard.question_type: shard.count},
+                    difficulty,
+                    exclude=exclude,
+                )
+                for shard in shards
+            ),
+            return_exceptions=True,
+        )
+
+        questions: List[Dict[str, Any]] = []
+        failures = 0
+        for shard, result in zip(shards, results):
+            if isinstance(result, BaseException):
+                failures += 1
+                logger.warning(f"題目分片生成失敗: {shard}, 錯誤: {str(result)}")
+                continue
+            if not isinstance(result, list):
+                failures += 1
+                logger.warning(f"題目分片回傳格式不正確: {shard}")
+                continue
+
+            for question in result[:shard.count]:
+                if not isinstance(question, dict):
+                    continue
+                question.setdefault("type", shard.question_type)
+                questions.append(question)
+
+        return questions, failures
+
+    async def generate(
+        self,
+        content: str,
+        question_types: Dict[str, int],
+        difficulty: str = "medium",
+    ) -> List[Dict[str, Any]]:
+        """
+        並行生成各分片題目並合併
+
+        去重後題數不足時，再以已生成的題目作為排除清單補生成，最多 topup_rounds 輪。
+
+        Args:
+            content: 課程內容
+            question_types: 各題型題數
+            difficulty: 難度
+
+        Returns:
+            去重並重新編號後的題目列表
+        """
+        sections = self.split_sections(content)
+        shards = self.plan_shards(question_types, len(sections))
+        if not shards:
+            return []
+
+        questions, failures = await self._generate_shards(sections, shards, difficulty)
+        if failures == len(shards):
+            raise LLMServiceError("所有題目分片皆生成失敗")
+        questions = dedupe_questions(questions, self.dedupe_threshold)
+
+        for _ in range(self.topup_rounds):
+            missing = self._missing_counts(questions, question_types)
+            if not missing:
+                break
+
+            logger.info(f"去重後題數不足，補生成: {missing}")
+            extra, _ = await self._generate_shards(
+                sections,
+                self.plan_shards(missing, len(sections)),
+                difficulty,
+                exclude=[q.get("question_text", "") for q in questions],
+            )
+            questions = dedupe_questions(questions + extra, self.dedupe_threshold)
+
+        # 補生成的題目依題型排回原位置
+        type_order = {t: i for i, t in enumerate(dict.fromkeys(shard.question_type for shard in shards))}
+        questions.sort(key=lambda q: type_order.get(q.get("type"), len(type_order)))
+
+        # 依最終順序編號，讓 question_id 不受分片完成順序影響
+        for index, question in enumerate(questions, start=1):
+            question["question_id"] = f"q{index}"
+
+        return questions
+
+    @staticmethod
+    def _missing_counts(questions: List[Dict[str, Any]], question_types: Dict[str, int]) -> Dict[str, int]:
+        """各題型尚缺的題數"""
+        have: Dict[str, int] = {}
+        for question in questions:
+            have[question.get("type")] = have.get(question.get("type"), 0) + 1
+        return {
+            question_type: count - have.get(question_type, 0)
+            for question_type, count in question_types.items()
+            if count > have.get(question_type, 0)
+        }
+
+
+# 建立全域實例
+quiz_generation_service = QuizGenerationService(
+    max_questions_per_shard=settings.QUIZ_SHARD_MAX_QUESTIONS,
+    section_chars=settings.QUIZ_SECTION_CHARS,
+    dedupe_threshold=settings.QUIZ_DEDUPE_THRESHOLD,
+    topup_rounds=settings.QUIZ_TOPUP_ROUNDS,
+)
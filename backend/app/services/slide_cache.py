@@ -0,0 +1,115 @@
+"""講義擷取結果快取
+
+以檔案內容的 SHA-256 為鍵，快取擷取結果（JSON），
+相同內容的講義重複上傳時直接回傳快取結果，不再重新解析。
+快取目錄超過容量上限時，依最近使用時間（mtime）淘汰最舊的項目。
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 擷取邏輯變更時調整版本號，讓舊的快取自動失效
+EXTRACTION_CACHE_VERSION = 2
+
+
+def compute_digest(file_content: bytes) -> str:
+    """計算檔案內容的 SHA-256"""
+    return hashlib.sha256(file_content).hexdigest()
+
+
+class SlideCache:
+    """以內容雜湊為鍵的擷取結果快取（LRU + 容量上限）"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry_path(self, digest: str, file_ext: str) -> str:
+        return os.path.join(
+            self.cache_dir,
+            f"{digest}{file_ext}.v{EXTRACTION_CACHE_VERSION}.json",
+        )
+
+    async def get(self, digest: str, file_ext: str) -> Optional[Dict[str, Any]]:
+        """取得快取的擷取結果，不存在時回傳 None"""
+        result = await asyncio.to_thread(self._read, self._entry_path(digest, file_ext))
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    async def put(self, digest: str, file_ext: str, result: Dict[str, Any]):
+        """寫入擷取結果並視需要淘汰舊項目"""
+        await asyncio.to_thread(self._write, self._entry_path(digest, file_ext), result)
+
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            # 更新 mtime 作為 LRU 的最近使用時間
+            os.utime(path)
+            return result
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"讀取擷取快取失敗: {path}, 錯誤: {str(e)}")
+            return None
+
+    def _write(self, path: str, result: Dict[str, Any]):
+        try:
+            # 先寫入暫存檔再原子替換，避免讀到寫到一半的檔案
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"寫入擷取快取失敗: {path}, 錯誤: {str(e)}")
+            return
+
+        self._evict()
+
+    def _evict(self):
+        """總容量超過上限時，從最久未使用的項目開始刪除"""
+        entries = []
+        total_size = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+        if total_size <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+                self.evictions += 1
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """取得快取統計"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "max_bytes": self.max_bytes,
+        }
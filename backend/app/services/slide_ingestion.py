@@ -0,0 +1,316 @@
+"""講義背景擷取服務
+
+上傳端點儲存檔案後立即回應，擷取工作交給背景 worker 處理，
+完成後寫回 Slide.extracted_text / total_pages。處理期間定期寫回 processed_pages，
+處理進度可透過任一 API 行程的狀態端點查詢。
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.slide import Slide, SlideStatus
+from app.services.slide_service import slide_service, SlideQueueFullError
+
+logger = logging.getLogger(__name__)
+
+
+class SlideIngestionJob:
+    """講義擷取工作"""
+
+    def __init__(self, file_id: str, file_path: str, filename: str, content_hash: str):
+        self.file_id = file_id
+        self.file_path = file_path
+        self.filename = filename
+        self.content_hash = content_hash
+
+        # 處理進度
+        self.status = SlideStatus.PROCESSING.value
+        self.processed_pages = 0
+        self.total_pages: Optional[int] = None
+
+    def update_progress(self, processed_pages: int, total_pages: int):
+        """擷取進度回呼"""
+        self.processed_pages = processed_pages
+        self.total_pages = total_pages
+
+    def __repr__(self):
+        return f"<SlideIngestionJob {self.file_id}: {self.filename}>"
+
+
+class SlideIngestionService:
+    """講義背景擷取服務（有上限的佇列 + 固定數量的 worker）"""
+
+    # 擷取行程池滿載時的重試次數與第一次重試前的等待（秒，每次加倍）
+    ADMIT_RETRIES = 3
+    ADMIT_RETRY_DELAY = 1.0
+
+    def __init__(
+        self,
+        workers: int = 2,
+        queue_size: int = 32,
+        lease_seconds: int = 300,
+        progress_interval: float = 2.0,
+    ):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        # 處理中的講義由認領的行程定期續約，租約過期才由其他行程接手
+        self.lease_seconds = max(1, lease_seconds)
+        # 處理進度寫回資料庫的間隔，任何 API 行程的狀態端點都能讀到
+        self.progress_interval = max(0.1, min(progress_interval, self.lease_seconds / 3))
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._recover_task: Optional[asyncio.Task] = None
+        self._jobs: Dict[str, SlideIngestionJob] = {}
+
+    def start(self):
+        """啟動背景 worker（重複呼叫不會重複啟動）"""
+        if self._worker_tasks:
+            return
+
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        self._recover_task = asyncio.create_task(self._recover_loop())
+        logger.info(f"講義背景擷取服務已啟動（{self.workers} 個 worker）")
+
+    async def stop(self):
+        """停止背景 worker"""
+        tasks = list(self._worker_tasks)
+        if self._recover_task is not None:
+            tasks.append(self._recover_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._recover_task = None
+        self._queue = None
+
+    async def _recover_loop(self):
+        """定期接手租約過期的講義（例如處理中的行程異常結束）"""
+        while True:
+            await asyncio.sleep(self.lease_seconds)
+            try:
+                await self.recover()
+            except Exception as e:
+                logger.error(f"講義擷取復原失敗: {str(e)}")
+
+    async def recover(self):
+        """
+        重新排入租約過期的處理中講義
+
+        多個 API 行程同時復原時，以條件式 UPDATE 認領，只排入本行程認領成功的講義。
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        expired = or_(Slide.claimed_at.is_(None), Slide.claimed_at < cutoff)
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Slide).where(Slide.status == SlideStatus.PROCESSING.value, expired)
+            )
+            slides = result.scalars().all()
+
+            for slide in slides:
+                if self._queue is not None and self._queue.full():
+                    logger.warning(f"背景擷取佇列已滿，暫停復原: {slide.id}")
+                    break
+
+                claim = await db.execute(
+                    update(Slide)
+                    .where(
+                        Slide.id == slide.id,
+                        Slide.status == SlideStatus.PROCESSING.value,
+                        expired,
+                    )
+                    .values(claimed_at=datetime.utcnow())
+                )
+                await db.commit()
+                if claim.rowcount != 1:
+                    # 已由其他行程認領
+                    continue
+
+                # 儲存區檔名即為內容雜湊
+                content_hash = os.path.splitext(os.path.basename(slide.file_path))[0]
+                try:
+                    self.enqueue(slide.id, slide.file_path, slide.filename, content_hash)
+                except SlideQueueFullError:
+                    # 認領的租約過期後會再被復原
+                    logger.warning(f"背景擷取佇列已滿，略過復原: {slide.id}")
+                    break
+
+    def enqueue(self, file_id: str, file_path: str, filename: str, content_hash: str) -> SlideIngestionJob:
+        """排入擷取工作，佇列已滿時拋出 SlideQueueFullError"""
+        self.start()
+
+        job = SlideIngestionJob(file_id, file_path, filename, content_hash)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise SlideQueueFullError(f"講義背景處理佇列已滿（上限 {self.queue_size}），請稍後再試")
+
+        self._jobs[file_id] = job
+        return job
+
+    def get_progress(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """取得本行程中工作的即時進度（工作不在本行程時回傳 None）"""
+        job = self._jobs.get(file_id)
+        if not job:
+            return None
+
+        return {
+            "status": job.status,
+            "processed_pages": job.processed_pages,
+            "total_pages": job.total_pages,
+        }
+
+    async def _worker(self, worker_id: int):
+        """從佇列取出工作並處理"""
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except Exception as e:
+                logger.error(f"講義背景擷取 worker {worker_id} 發生錯誤: {str(e)}")
+            finally:
+                self._queue.task_done()
+                self._jobs.pop(job.file_id, None)
+
+    async def _renew_lease(self, job: SlideIngestionJob):
+        """處理期間定期寫回進度並續約，避免其他行程重複擷取"""
+        written = None
+        renewed = time.monotonic()
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            progress = (job.processed_pages, job.total_pages)
+            if progress == written and time.monotonic() - renewed < self.lease_seconds / 3:
+                continue
+
+            values: Dict[str, Any] = {
+                "claimed_at": datetime.utcnow(),
+                "processed_pages": job.processed_pages,
+            }
+            if job.total_pages is not None:
+                values["total_pages"] = job.total_pages
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(Slide)
+                        .where(Slide.id == job.file_id, Slide.status == SlideStatus.PROCESSING.value)
+                        .values(**values)
+                    )
+                    await db.commit()
+                written = progress
+                renewed = time.monotonic()
+            except Exception as e:
+                logger.warning(f"講義擷取續約失敗: {job.file_id}, 錯誤: {str(e)}")
+
+    async def _process(self, job: SlideIngestionJob):
+        """擷取講義並寫回資料庫（處理期間持續續約）"""
+        lease = asyncio.create_task(self._renew_lease(job))
+        try:
+            await self._extract(job)
+        finally:
+            lease.cancel()
+            await asyncio.gather(lease, return_exceptions=True)
+
+    async def _extract(self, job: SlideIngestionJob):
+        """擷取講義並寫回結果"""
+        try:
+            processed_data = await self._process_with_retry(job)
+        except SlideQueueFullError:
+            # 擷取行程池暫時滿載不是講義本身的錯誤：釋放認領，由復原迴圈稍後重新排入
+            logger.warning(f"擷取行程池持續滿載，稍後重試: {job.file_id}")
+            await self._release_claim(job.file_id)
+            return
+        except Exception as e:
+            logger.error(f"講義背景擷取失敗: {job.file_id}, 錯誤: {str(e)}")
+            job.status = SlideStatus.FAILED.value
+            await self._update_slide(
+                job.file_id,
+                status=SlideStatus.FAILED.value,
+                error_message=str(e),
+            )
+            return
+
+        job.status = SlideStatus.PROCESSED.value
+        await self._update_slide(
+            job.file_id,
+            pages=processed_data.get('pages', []),
+            status=SlideStatus.PROCESSED.value,
+            total_pages=processed_data['total_pages'],
+            processed_pages=processed_data['total_pages'],
+            extracted_text=processed_data['extracted_text'],
+        )
+        logger.info(f"講義背景擷取完成: {job.file_id} ({processed_data['total_pages']} 頁)")
+
+    async def _process_with_retry(self, job: SlideIngestionJob) -> Dict[str, Any]:
+        """擷取講義，擷取行程池滿載時以指數退避重試"""
+        delay = self.ADMIT_RETRY_DELAY
+        for attempt in range(self.ADMIT_RETRIES + 1):
+            try:
+                return await slide_service.process_path(
+                    job.file_path,
+                    job.filename,
+                    job.content_hash,
+                    progress_callback=job.update_progress,
+                )
+            except SlideQueueFullError:
+                if attempt == self.ADMIT_RETRIES:
+                    raise
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def _release_claim(self, file_id: str):
+        """釋放處理中講義的認領，讓復原迴圈重新排入"""
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(Slide)
+                    .where(Slide.id == file_id, Slide.status == SlideStatus.PROCESSING.value)
+                    .values(claimed_at=None)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"釋放講義認領失敗: {file_id}, 錯誤: {str(e)}")
+
+    async def _update_slide(self, file_id: str, pages: Optional[List[Dict[str, Any]]] = None, **values):
+        """更新 Slide 資料列，並寫入逐頁內容"""
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await db.execute(
+                    select(Slide).where(Slide.id == file_id).with_for_update()
+                )
+                slide = result.scalar_one_or_none()
+                if not slide:
+                    logger.warning(f"講義已刪除，略過更新: {file_id}")
+                    return
+                if slide.status != SlideStatus.PROCESSING.value:
+                    # 其他行程已完成處理，不重複寫入逐頁內容
+                    logger.info(f"講義已由其他行程處理完成，略過更新: {file_id}")
+                    return
+
+                for key, value in values.items():
+                    setattr(slide, key, value)
+                if pages is not None:
+                    await slide_service.save_pages(db, file_id, pages)
+                await db.commit()
+            except Exception as e:
+                logger.error(f"更新講義處理狀態失敗: {file_id}, 錯誤: {str(e)}")
+                await db.rollback()
+
+
+# 建立全域實例
+slide_ingestion_service = SlideIngestionService(
+    workers=settings.SLIDE_INGESTION_WORKERS,
+    queue_size=settings.SLIDE_INGESTION_QUEUE_SIZE,
+    lease_seconds=settings.SLIDE_INGESTION_LEASE_SECONDS,
+    progress_interval=settings.SLIDE_INGESTION_PROGRESS_INTERVAL,
+)
@@ -1,12 +1,29 @@
 """講義檔案處理服務"""
 import os
 import io
-from typing import Dict, Any
+import asyncio
+import hashlib
+import math
+import mmap
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union
 import PyPDF2
 from docx import Document
 from pptx import Presentation
 import logging
 
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.slide_page import SlidePage
+from app.services.extraction_pool import (
+    ExtractionPool,
+    ExtractionQueueFullError,
+)
+from app.services.slide_cache import SlideCache, compute_digest
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,6 +32,197 @@ class SlideProcessingError(Exception):
     pass
 
 
+class SlideQueueFullError(SlideProcessingError):
+    """講義處理佇列已滿"""
+    pass
+
+
+class SlideTooLargeError(SlideProcessingError):
+    """檔案大小超過限制"""
+    pass
+
+
+# 擷取來源：檔案內容 (bytes) 或本地檔案路徑
+FileSource = Union[bytes, str]
+
+# 擷取進度回呼：(已完成頁數, 總頁數)
+ProgressCallback = Callable[[int, int], None]
+
+
+@contextmanager
+def _open_pdf_stream(source: FileSource):
+    """開啟 PDF 串流；檔案路徑以 mmap 映射，由作業系統按需載入，不整份讀入記憶體"""
+    if isinstance(source, bytes):
+        yield io.BytesIO(source)
+        return
+
+    with open(source, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def _open_office_source(source: FileSource):
+    """python-pptx / python-docx 可直接讀取路徑（zip 依需要讀取各部分）"""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+# 以下擷取函式會在擷取行程中執行，必須是模組層級的同步函式（可被 pickle）
+
+def _make_page(page_number: int, text: str) -> Dict[str, Any]:
+    """建立單頁擷取結果"""
+    return {
+        'page_number': page_number,
+        'text': text,
+        'char_count': len(text),
+    }
+
+
+def count_pdf_pages(source: FileSource) -> int:
+    """計算 PDF 頁數"""
+    try:
+        with _open_pdf_stream(source) as stream:
+            return len(PyPDF2.PdfReader(stream).pages)
+    except Exception as e:
+        raise SlideProcessingError(f"PDF 處理失敗: {str(e)}")
+
+
+def extract_pdf_pages(source: FileSource, start: int, end: int) -> List[Dict[str, Any]]:
+    """
+    擷取 PDF 指定頁碼範圍的文字
+
+    Args:
+        source: 檔案內容 (bytes) 或檔案路徑
+        start: 起始頁索引（從 0 開始，包含）
+        end: 結束頁索引（不包含）
+
+    Returns:
+        每頁的頁碼（從 1 開始）、文字與字數
+    """
+    try:
+        with _open_pdf_stream(source) as stream:
+            pdf_reader = PyPDF2.PdfReader(stream)
+            end = min(end, len(pdf_reader.pages))
+
+            return [
+                _make_page(page_num + 1, pdf_reader.pages[page_num].extract_text() or "")
+                for page_num in range(start, end)
+            ]
+
+    except Exception as e:
+        raise SlideProcessingError(f"PDF 處理失敗: {str(e)}")
+
+
+def build_pdf_result(pages: List[Dict[str, Any]], filename: str) -> Dict[str, Any]:
+    """將逐頁結果組合成擷取結果（一次性串接，避免重複字串相加）"""
+    extracted_text = "".join(
+        f"\n--- 第 {page['page_number']} 頁 ---\n{page['text']}\n" for page in pages
+    )
+
+    return {
+        'filename': filename,
+        'total_pages': len(pages),
+        'extracted_text': extracted_text.strip(),
+        'pages': pages,
+        'file_type': 'pdf'
+    }
+
+
+def extract_pdf_text(source: FileSource, filename: str) -> Dict[str, Any]:
+    """擷取 PDF 檔案文字（單一行程）"""
+    pages = extract_pdf_pages(source, 0, count_pdf_pages(source))
+    return build_pdf_result(pages, filename)
+
+
+def extract_powerpoint_text(source: FileSource, filename: str) -> Dict[str, Any]:
+    """擷取 PowerPoint 檔案文字（每張投影片為一頁）"""
+    try:
+        presentation = Presentation(_open_office_source(source))
+
+        pages = []
+        for slide_num, slide in enumerate(presentation.slides, start=1):
+            lines = []
+
+            for shape in slide.shapes:
+                if hasattr(shape, "text"):
+                    lines.append(shape.text)
+
+                # 處理表格
+                if shape.has_table:
+                    table = shape.table
+                    for row in table.rows:
+                        lines.append(" | ".join([cell.text for cell in row.cells]))
+
+            pages.append(_make_page(slide_num, "".join(line + "\n" for line in lines)))
+
+        extracted_text = "".join(
+            f"\n--- 投影片 {page['page_number']} ---\n{page['text']}" for page in pages
+        )
+
+        return {
+            'filename': filename,
+            'total_pages': len(pages),
+            'extracted_text': extracted_text.strip(),
+            'pages': pages,
+            'file_type': 'powerpoint'
+        }
+
+    except Exception as e:
+        raise SlideProcessingError(f"PowerPoint 處理失敗: {str(e)}")
+
+
+def extract_word_text(source: FileSource, filename: str) -> Dict[str, Any]:
+    """擷取 Word 檔案文字"""
+    try:
+        document = Document(_open_office_source(source))
+
+        paragraphs = [paragraph.text for paragraph in document.paragraphs]
+
+        # 處理表格
+        table_lines = [
+            " | ".join([cell.text for cell in row.cells])
+            for table in document.tables
+            for row in table.rows
+        ]
+
+        # Word 文件沒有明確的「頁數」概念，使用段落數估計（每 10 段為一頁，表格併入最後一頁）
+        estimated_pages = max(1, len(paragraphs) // 10)
+
+        pages = []
+        for page_index in range(estimated_pages):
+            start = page_index * 10
+            end = start + 10 if page_index < estimated_pages - 1 else len(paragraphs)
+            lines = [text for text in paragraphs[start:end] if text.strip()]
+            if page_index == estimated_pages - 1:
+                lines.extend(table_lines)
+            pages.append(_make_page(page_index + 1, "".join(line + "\n" for line in lines)))
+
+        extracted_text = "".join(page['text'] for page in pages)
+
+        return {
+            'filename': filename,
+            'total_pages': estimated_pages,
+            'extracted_text': extracted_text.strip(),
+            'pages': pages,
+            'file_type': 'word'
+        }
+
+    except Exception as e:
+        raise SlideProcessingError(f"Word 處理失敗: {str(e)}")
+
+
+class StagedUpload:
+    """已串流寫入暫存檔的上傳"""
+
+    def __init__(self, path: str, filename: str, size: int, content_hash: str):
+        self.path = path
+        self.filename = filename
+        self.size = size
+        self.content_hash = content_hash
+
+    def __repr__(self):
+        return f"<StagedUpload {self.filename}: {self.size} bytes>"
+
+
 class SlideService:
     """講義檔案處理服務"""
 
@@ -26,145 +234,354 @@ class SlideService:
         '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
     }
 
-    def __init__(self, upload_dir: str = "uploads"):
+    # 同步擷取函式（於擷取行程中執行）
+    _extract_text_from_pdf = staticmethod(extract_pdf_text)
+    _extract_text_from_ppt = staticmethod(extract_powerpoint_text)
+    _extract_text_from_word = staticmethod(extract_word_text)
+
+    def __init__(self, upload_dir: str = "uploads", pool: Optional[ExtractionPool] = None):
         self.upload_dir = upload_dir
         os.makedirs(upload_dir, exist_ok=True)
 
-    async def process_file(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+        # 以內容雜湊命名的檔案儲存區，相同內容只保留一份
+        self.blob_dir = os.path.join(upload_dir, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+        # 串流上傳的暫存區（與儲存區同一檔案系統，可直接 rename）
+        self.staging_dir = os.path.join(upload_dir, "tmp")
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+        self.cache = SlideCache(
+            os.path.join(upload_dir, "cache"),
+            max_bytes=settings.SLIDE_CACHE_MAX_BYTES,
+        )
+
+        self.pool = pool or ExtractionPool(
+            max_workers=settings.SLIDE_EXTRACTION_WORKERS,
+            max_pending=settings.SLIDE_EXTRACTION_MAX_PENDING,
+            job_timeout=settings.SLIDE_EXTRACTION_TIMEOUT,
+            max_jobs_per_worker=settings.SLIDE_EXTRACTION_MAX_JOBS_PER_WORKER,
+        )
+
+    def _validate_file_extension(self, filename: str) -> str:
+        """驗證副檔名並回傳（小寫）"""
+        file_ext = os.path.splitext(filename)[1].lower()
+
+        if file_ext not in self.SUPPORTED_EXTENSIONS:
+            raise SlideProcessingError(f"不支援的檔案格式: {file_ext}")
+
+        return file_ext
+
+    def _validate_file_size(self, file_content: bytes, filename: str):
+        """驗證檔案大小"""
+        self._check_upload_size(len(file_content), filename)
+
+    def _check_upload_size(self, size: int, filename: str):
+        """檢查已接收的大小是否超過 MAX_UPLOAD_SIZE"""
+        if size > settings.MAX_UPLOAD_SIZE:
+            limit_mb = settings.MAX_UPLOAD_SIZE / (1024 * 1024)
+            raise SlideTooLargeError(f"檔案大小超過限制（上限 {limit_mb:g}MB）: {filename}")
+
+    async def stage_upload(self, upload, filename: str) -> "StagedUpload":
         """
-        處理上傳的檔案
+        以固定大小的區塊將上傳內容寫入暫存檔，同時計算雜湊並檢查大小
+
+        超過 MAX_UPLOAD_SIZE 時立即中止並刪除暫存檔，記憶體用量只與區塊大小有關。
 
         Args:
-            file_content: 檔案內容 (bytes)
+            upload: 提供 async read(size) 的上傳物件（例如 FastAPI UploadFile）
             filename: 檔案名稱
 
         Returns:
-            包含文字內容、頁數等資訊的字典
+            暫存檔資訊
         """
-        file_ext = os.path.splitext(filename)[1].lower()
+        self._validate_file_extension(filename)
 
-        if file_ext not in self.SUPPORTED_EXTENSIONS:
-            raise SlideProcessingError(f"不支援的檔案格式: {file_ext}")
+        fd, tmp_path = tempfile.mkstemp(dir=self.staging_dir, suffix=".upload")
+        hasher = hashlib.sha256()
+        size = 0
 
         try:
-            if file_ext == '.pdf':
-                return await self._process_pdf(file_content, filename)
-            elif file_ext in ['.ppt', '.pptx']:
-                return await self._process_powerpoint(file_content, filename)
-            elif file_ext in ['.doc', '.docx']:
-                return await self._process_word(file_content, filename)
-        except Exception as e:
-            logger.error(f"處理檔案失敗: {filename}, 錯誤: {str(e)}")
-            raise SlideProcessingError(f"處理檔案失敗: {str(e)}")
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = await upload.read(settings.SLIDE_UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
 
-    async def _process_pdf(self, file_content: bytes, filename: str) -> Dict[str, Any]:
-        """處理 PDF 檔案"""
-        try:
-            pdf_file = io.BytesIO(file_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-
-            total_pages = len(pdf_reader.pages)
-            extracted_text = ""
+                    size += len(chunk)
+                    self._check_upload_size(size, filename)
 
-            for page_num in range(total_pages):
-                page = pdf_reader.pages[page_num]
-                text = page.extract_text()
-                extracted_text += f"\n--- 第 {page_num + 1} 頁 ---\n{text}\n"
+                    hasher.update(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+        except Exception:
+            os.remove(tmp_path)
+            raise
 
-            return {
-                'filename': filename,
-                'total_pages': total_pages,
-                'extracted_text': extracted_text.strip(),
-                'file_type': 'pdf'
-            }
+        return StagedUpload(tmp_path, filename, size, hasher.hexdigest())
 
-        except Exception as e:
-            raise SlideProcessingError(f"PDF 處理失敗: {str(e)}")
+    async def process_file(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+        """
+        處理上傳的檔案（於擷取行程池中解析，不阻塞事件迴圈）
 
-    async def _process_powerpoint(self, file_content: bytes, filename: str) -> Dict[str, Any]:
-        """處理 PowerPoint 檔案"""
-        try:
-            ppt_file = io.BytesIO(file_content)
-            presentation = Presentation(ppt_file)
+        Args:
+            file_content: 檔案內容 (bytes)
+            filename: 檔案名稱
 
-            total_slides = len(presentation.slides)
-            extracted_text = ""
+        Returns:
+            包含文字內容、頁數、內容雜湊（content_hash）等資訊的字典
+        """
+        file_ext = self._validate_file_extension(filename)
+        self._validate_file_size(file_content, filename)
 
-            for slide_num, slide in enumerate(presentation.slides, start=1):
-                slide_text = f"\n--- 投影片 {slide_num} ---\n"
+        # hashlib 計算時會釋放 GIL，放到執行緒避免大檔案阻塞事件迴圈
+        digest = await asyncio.to_thread(compute_digest, file_content)
 
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        slide_text += shape.text + "\n"
+        return await self._extract(file_content, filename, file_ext, digest)
 
-                    # 處理表格
-                    if shape.has_table:
-                        table = shape.table
-                        for row in table.rows:
-                            row_text = " | ".join([cell.text for cell in row.cells])
-                            slide_text += row_text + "\n"
+    async def process_path(
+        self,
+        file_path: str,
+        filename: str,
+        content_hash: str,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """
+        處理已暫存到本地的檔案，擷取行程直接從檔案讀取（PDF 使用 mmap）
 
-                extracted_text += slide_text
+        Args:
+            file_path: 本地檔案路徑
+            filename: 原始檔案名稱
+            content_hash: 檔案內容的 SHA-256
+            progress_callback: 擷取進度回呼（已完成頁數, 總頁數）
 
-            return {
-                'filename': filename,
-                'total_pages': total_slides,
-                'extracted_text': extracted_text.strip(),
-                'file_type': 'powerpoint'
-            }
+        Returns:
+            包含文字內容、頁數、內容雜湊（content_hash）等資訊的字典
+        """
+        file_ext = self._validate_file_extension(filename)
+        return await self._extract(file_path, filename, file_ext, content_hash, progress_callback)
+
+    async def _extract(
+        self,
+        source: FileSource,
+        filename: str,
+        file_ext: str,
+        digest: str,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """查詢快取，未命中時送到擷取行程池解析並寫回快取"""
+        # 相同內容的檔案直接使用快取結果
+        cached = await self.cache.get(digest, file_ext)
+        if cached is not None:
+            logger.info(f"講義擷取快取命中: {filename} ({digest[:12]})")
+            if progress_callback:
+                progress_callback(cached['total_pages'], cached['total_pages'])
+            return {**cached, 'filename': filename, 'content_hash': digest}
 
+        try:
+            async with self.pool.admit():
+                if file_ext == '.pdf':
+                    result = await self._process_pdf(source, filename, progress_callback)
+                elif file_ext in ['.ppt', '.pptx']:
+                    result = await self._process_powerpoint(source, filename)
+                else:
+                    result = await self._process_word(source, filename)
+        except ExtractionQueueFullError as e:
+            logger.warning(f"講義處理佇列已滿，拒絕: {filename}")
+            raise SlideQueueFullError(str(e))
         except Exception as e:
-            raise SlideProcessingError(f"PowerPoint 處理失敗: {str(e)}")
+            logger.error(f"處理檔案失敗: {filename}, 錯誤: {str(e)}")
+            raise SlideProcessingError(f"處理檔案失敗: {str(e)}")
 
-    async def _process_word(self, file_content: bytes, filename: str) -> Dict[str, Any]:
-        """處理 Word 檔案"""
-        try:
-            doc_file = io.BytesIO(file_content)
-            document = Document(doc_file)
+        if progress_callback:
+            progress_callback(result['total_pages'], result['total_pages'])
+
+        await self.cache.put(
+            digest,
+            file_ext,
+            {key: value for key, value in result.items() if key != 'filename'},
+        )
+        return {**result, 'content_hash': digest}
+
+    async def _process_pdf(
+        self,
+        source: FileSource,
+        filename: str,
+        progress_callback: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """
+        處理 PDF 檔案
 
-            extracted_text = ""
-            total_paragraphs = len(document.paragraphs)
+        頁數夠多且有多個擷取行程時，依頁碼範圍拆成多個工作平行擷取，
+        每完成一個範圍回報一次進度，最後依頁碼順序合併。
+        """
+        if self.pool.max_workers <= 1:
+            return await self.pool.run(extract_pdf_text, source, filename)
 
-            for para_num, paragraph in enumerate(document.paragraphs, start=1):
-                if paragraph.text.strip():
-                    extracted_text += paragraph.text + "\n"
+        total_pages = await self.pool.run(count_pdf_pages, source)
+        if progress_callback:
+            progress_callback(0, total_pages)
 
-            # 處理表格
-            for table in document.tables:
-                for row in table.rows:
-                    row_text = " | ".join([cell.text for cell in row.cells])
-                    extracted_text += row_text + "\n"
+        tasks = [
+            asyncio.ensure_future(self.pool.run(extract_pdf_pages, source, start, end))
+            for start, end in self._split_page_ranges(total_pages)
+        ]
 
-            # Word 文件沒有明確的「頁數」概念，使用段落數估計
-            estimated_pages = max(1, total_paragraphs // 10)
+        try:
+            done_pages = 0
+            for next_done in asyncio.as_completed(tasks):
+                done_pages += len(await next_done)
+                if progress_callback:
+                    progress_callback(done_pages, total_pages)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        pages = [page for task in tasks for page in task.result()]
+        return build_pdf_result(pages, filename)
+
+    def _split_page_ranges(self, total_pages: int) -> List[Tuple[int, int]]:
+        """將頁碼切成平均的範圍，每段至少 SLIDE_PDF_PAGES_PER_JOB 頁"""
+        pages_per_job = max(1, settings.SLIDE_PDF_PAGES_PER_JOB)
+        job_count = max(1, min(self.pool.max_workers, math.ceil(total_pages / pages_per_job)))
+        step = math.ceil(total_pages / job_count) if total_pages else 1
+
+        return [
+            (start, min(start + step, total_pages))
+            for start in range(0, max(total_pages, 1), step)
+        ]
+
+    async def _process_powerpoint(self, source: FileSource, filename: str) -> Dict[str, Any]:
+        """處理 PowerPoint 檔案"""
+        return await self.pool.run(extract_powerpoint_text, source, filename)
 
-            return {
-                'filename': filename,
-                'total_pages': estimated_pages,
-                'extracted_text': extracted_text.strip(),
-                'file_type': 'word'
-            }
+    async def _process_word(self, source: FileSource, filename: str) -> Dict[str, Any]:
+        """處理 Word 檔案"""
+        return await self.pool.run(extract_word_text, source, filename)
+
+    async def save_file(
+        self,
+        file_content: bytes,
+        filename: str,
+        content_hash: Optional[str] = None,
+    ) -> str:
+        """
+        以內容雜湊儲存檔案到本地，相同內容的檔案共用同一份
 
-        except Exception as e:
-            raise SlideProcessingError(f"Word 處理失敗: {str(e)}")
+        Args:
+            file_content: 檔案內容 (bytes)
+            filename: 原始檔案名稱（用於決定副檔名）
+            content_hash: 已計算好的 SHA-256，未提供時自動計算
 
-    async def save_file(self, file_content: bytes, filename: str) -> str:
-        """儲存檔案到本地"""
-        file_path = os.path.join(self.upload_dir, filename)
+        Returns:
+            檔案路徑
+        """
+        digest = content_hash or await asyncio.to_thread(compute_digest, file_content)
+        file_ext = os.path.splitext(filename)[1].lower()
+        file_path = os.path.join(self.blob_dir, f"{digest}{file_ext}")
 
         try:
-            with open(file_path, 'wb') as f:
-                f.write(file_content)
+            if not os.path.exists(file_path):
+                await asyncio.to_thread(self._write_blob, file_path, file_content)
             return file_path
         except Exception as e:
             logger.error(f"儲存檔案失敗: {filename}, 錯誤: {str(e)}")
             raise SlideProcessingError(f"儲存檔案失敗: {str(e)}")
 
+    def store_staged(self, staged: "StagedUpload") -> str:
+        """將暫存檔移到內容雜湊命名的儲存區，已有相同內容時直接共用"""
+        file_ext = os.path.splitext(staged.filename)[1].lower()
+        file_path = os.path.join(self.blob_dir, f"{staged.content_hash}{file_ext}")
+
+        try:
+            if os.path.exists(file_path):
+                self.discard_staged(staged)
+            else:
+                os.replace(staged.path, file_path)
+            return file_path
+        except OSError as e:
+            logger.error(f"儲存檔案失敗: {staged.filename}, 錯誤: {str(e)}")
+            raise SlideProcessingError(f"儲存檔案失敗: {str(e)}")
+
+    def discard_staged(self, staged: "StagedUpload"):
+        """刪除暫存檔（已移到儲存區時不做任何事）"""
+        try:
+            os.remove(staged.path)
+        except FileNotFoundError:
+            pass
+
+    def _write_blob(self, file_path: str, file_content: bytes):
+        """先寫入暫存檔再原子替換，避免同時上傳相同檔案時互相覆寫"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(file_content)
+        os.replace(tmp_path, file_path)
+
+    async def save_pages(self, db: AsyncSession, slide_id: str, pages: List[Dict[str, Any]]):
+        """
+        批次寫入講義逐頁內容（取代既有的頁面，不 commit，由呼叫端控制交易）
+
+        Args:
+            db: 資料庫 Session
+            slide_id: 講義 ID
+            pages: 擷取結果中的逐頁列表
+        """
+        await db.execute(delete(SlidePage).where(SlidePage.slide_id == slide_id))
+
+        if not pages:
+            return
+
+        await db.execute(
+            insert(SlidePage),
+            [
+                {
+                    'slide_id': slide_id,
+                    'page_number': page['page_number'],
+                    'text': page['text'],
+                    'char_count': page['char_count'],
+                }
+                for page in pages
+            ],
+        )
+
+    async def get_pages(
+        self,
+        db: AsyncSession,
+        slide_id: str,
+        start_page: int = 1,
+        end_page: Optional[int] = None,
+    ) -> List[SlidePage]:
+        """
+        取得講義指定頁碼範圍的內容
+
+        Args:
+            db: 資料庫 Session
+            slide_id: 講義 ID
+            start_page: 起始頁碼（從 1 開始，包含）
+            end_page: 結束頁碼（包含），None 表示到最後一頁
+
+        Returns:
+            依頁碼排序的頁面列表
+        """
+        query = select(SlidePage).where(
+            SlidePage.slide_id == slide_id,
+            SlidePage.page_number >= start_page,
+        )
+        if end_page is not None:
+            query = query.where(SlidePage.page_number <= end_page)
+
+        result = await db.execute(query.order_by(SlidePage.page_number))
+        return list(result.scalars().all())
+
     def is_supported_file(self, filename: str) -> bool:
         """檢查檔案格式是否支援"""
         file_ext = os.path.splitext(filename)[1].lower()
         return file_ext in self.SUPPORTED_EXTENSIONS
 
+    def shutdown(self):
+        """關閉擷取行程池"""
+        self.pool.shutdown()
+
 
 # 建立全域實例
 slide_service = SlideService()
@@ -0,0 +1,192 @@
+"""語音 worker 行程池（API 端）
+
+SPEECH_BACKEND=worker 時，API 行程不載入 Whisper 模型，
+音訊經由 Unix socket 轉送到獨立的語音 worker 行程（app.speech_worker）辨識。
+新串流分派到負載最低的健康 worker，背景定期健康檢查更新各 worker 的狀態與負載。
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.speech_ipc import FRAME_JSON, read_frame, write_json
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechWorkerUnavailable(Exception):
+    """沒有可用的語音 worker"""
+    pass
+
+
+def worker_socket_paths(socket_dir: str, workers: int) -> List[str]:
+    """語音 worker 的 socket 路徑（API 端與 supervisor 共用）"""
+    return [os.path.join(socket_dir, f"speech-{i}.sock") for i in range(workers)]
+
+
+async def ping_worker(path: str, timeout: float = 2.0) -> Dict[str, Any]:
+    """
+    對語音 worker 發送健康檢查
+
+    Returns:
+        pong 訊息（含 active_streams 與 stats）
+
+    Raises:
+        連線失敗、逾時或回應錯誤時拋出例外
+    """
+    async def _ping():
+        reader, writer = await asyncio.open_unix_connection(path)
+        try:
+            write_json(writer, {"type": "ping"})
+            await writer.drain()
+            kind, message = await read_frame(reader)
+            if kind != FRAME_JSON or message.get("type") != "pong":
+                raise SpeechWorkerUnavailable(f"無效的健康檢查回應: {path}")
+            return message
+        finally:
+            writer.close()
+
+    return await asyncio.wait_for(_ping(), timeout)
+
+
+class SpeechWorker:
+    """單一語音 worker 的狀態"""
+
+    def __init__(self, path: str):
+        self.path = path
+        # 尚未檢查前視為可用，第一次連線失敗即標記
+        self.healthy = True
+        # 負載：worker 回報的串流數 + 本行程在下次健康檢查前新開的串流
+        self.reported_streams = 0
+        self.local_streams = 0
+        self.failures = 0
+        self.last_seen: Optional[float] = None
+        self.stats: Dict[str, Any] = {}
+
+    @property
+    def load(self) -> int:
+        return self.reported_streams + self.local_streams
+
+    def __repr__(self):
+        return f"<SpeechWorker {self.path} load={self.load} healthy={self.healthy}>"
+
+
+class SpeechWorkerPool:
+    """語音 worker 行程池（最低負載分派 + 健康檢查）"""
+
+    def __init__(self, paths: List[str], health_interval: float = 5.0, connect_timeout: float = 2.0):
+        self.workers = [SpeechWorker(path) for path in paths]
+        self.health_interval = health_interval
+        self.connect_timeout = connect_timeout
+        self._task: Optional[asyncio.Task] = None
+
+        # 統計資訊
+        self.dispatched = 0
+        self.connect_failures = 0
+
+    def start(self):
+        """啟動背景健康檢查（重複呼叫不會重複啟動）"""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._health_loop())
+        logger.info(f"語音 worker 行程池已啟動（{len(self.workers)} 個 worker）")
+
+    async def stop(self):
+        """停止健康檢查"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _health_loop(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
+
+    async def check_health(self):
+        """檢查所有 worker 並更新負載"""
+        await asyncio.gather(*(self._check(worker) for worker in self.workers))
+
+    async def _check(self, worker: SpeechWorker):
+        try:
+            pong = await ping_worker(worker.path, self.connect_timeout)
+        except Exception as e:
+            if worker.healthy:
+                logger.warning(f"語音 worker 無回應: {worker.path}, 錯誤: {str(e)}")
+            worker.healthy = False
+            worker.failures += 1
+            return
+
+        if not worker.healthy:
+            logger.info(f"語音 worker 已恢復: {worker.path}")
+        worker.healthy = True
+        worker.reported_streams = pong.get("active_streams", 0)
+        # worker 回報的串流數已包含本行程開啟的串流
+        worker.local_streams = 0
+        worker.last_seen = time.time()
+        worker.stats = pong.get("stats", {})
+
+    def _candidates(self) -> List[SpeechWorker]:
+        """依負載排序的健康 worker；全部不健康時仍嘗試所有 worker"""
+        healthy = [w for w in self.workers if w.healthy]
+        return sorted(healthy or self.workers, key=lambda w: w.load)
+
+    async def connect(self):
+        """
+        連線到負載最低的可用 worker
+
+        Returns:
+            (worker, reader, writer)；使用完畢須呼叫 release(worker)
+
+        Raises:
+            SpeechWorkerUnavailable: 所有 worker 都無法連線
+        """
+        for worker in self._candidates():
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_unix_connection(worker.path),
+                    self.connect_timeout,
+                )
+            except Exception as e:
+                self.connect_failures += 1
+                worker.healthy = False
+                worker.failures += 1
+                logger.warning(f"無法連線語音 worker: {worker.path}, 錯誤: {str(e)}")
+                continue
+
+            worker.local_streams += 1
+            self.dispatched += 1
+            return worker, reader, writer
+
+        raise SpeechWorkerUnavailable("沒有可用的語音 worker")
+
+    def release(self, worker: SpeechWorker):
+        """串流結束"""
+        worker.local_streams = max(0, worker.local_streams - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """取得行程池統計"""
+        return {
+            "dispatched": self.dispatched,
+            "connect_failures": self.connect_failures,
+            "workers": [
+                {
+                    "path": w.path,
+                    "healthy": w.healthy,
+                    "load": w.load,
+                    "failures": w.failures,
+                    "last_seen": w.last_seen,
+                    "stats": w.stats,
+                }
+                for w in self.workers
+            ],
+        }
+
+
+# 建立全域實例
+speech_worker_pool = SpeechWorkerPool(
+    worker_socket_paths(settings.SPEECH_WORKER_SOCKET_DIR, settings.SPEECH_WORKERS),
+    health_interval=settings.SPEECH_WORKER_HEALTH_INTERVAL,
+)
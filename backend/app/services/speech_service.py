@@ -1,19 +1,43 @@
 """語音轉文字服務"""
+import asyncio
 import io
 import logging
-from typing import AsyncGenerator, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple, Union
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 try:
     from google.cloud import speech_v1
     GOOGLE_SPEECH_AVAILABLE = True
 except ImportError:
     GOOGLE_SPEECH_AVAILABLE = False
 
+from app.core.audio_buffer import AudioRingBuffer
 from app.core.config import settings
+from app.core.speech_ipc import FRAME_JSON, SpeechIPCError, read_frame, write_audio, write_json
+from app.core.stream_bridge import bridge_stream
+from app.services.speech_pool import SpeechWorkerPool, SpeechWorkerUnavailable, speech_worker_pool
+from app.services.whisper_scheduler import WhisperBatchScheduler
 
 logger = logging.getLogger(__name__)
 
+# 串流音訊的取樣率（16kHz、16-bit 單聲道 PCM）
+SAMPLE_RATE = 16000
+
+
+def pcm16_to_float32(audio_data: Union[bytes, np.ndarray]) -> np.ndarray:
+    """16-bit PCM（位元組或 int16 陣列）轉為 Whisper 使用的 float32 陣列（-1.0 ~ 1.0）"""
+    if isinstance(audio_data, np.ndarray):
+        samples = audio_data
+    else:
+        # 奇數長度時捨棄不完整的最後一個樣本
+        usable = len(audio_data) - len(audio_data) % 2
+        samples = np.frombuffer(audio_data[:usable], dtype=np.int16)
+    # astype 會複製，之後緩衝區被覆寫也不影響辨識
+    return samples.astype(np.float32) / 32768.0
+
 
 class SpeechServiceError(Exception):
     """語音轉文字錯誤"""
@@ -32,6 +56,10 @@ class SpeechRecognizer(ABC):
         """串流語音辨識"""
         pass
 
+    def stats(self) -> Dict[str, Any]:
+        """取得辨識統計"""
+        return {}
+
 
 class GoogleSpeechRecognizer(SpeechRecognizer):
     """Google Speech-to-Text 服務"""
@@ -57,7 +85,7 @@ class GoogleSpeechRecognizer(SpeechRecognizer):
             # 配置辨識設定
             config = speech_v1.RecognitionConfig(
                 encoding=speech_v1.RecognitionConfig.AudioEncoding.LINEAR16,
-                sample_rate_hertz=16000,
+                sample_rate_hertz=SAMPLE_RATE,
                 language_code=language_code,
                 enable_automatic_punctuation=True,
                 model="latest_long",
@@ -68,34 +96,42 @@ class GoogleSpeechRecognizer(SpeechRecognizer):
                 interim_results=True,
             )
 
-            # 建立請求生成器
+            # 建立請求生成器（設定由 streaming_recognize 的 config 參數送出，請求只含音訊）
             async def request_generator():
-                yield speech_v1.StreamingRecognizeRequest(
-                    streaming_config=streaming_config
-                )
                 async for audio_chunk in audio_stream:
                     yield speech_v1.StreamingRecognizeRequest(
                         audio_content=audio_chunk
                     )
 
-            # 執行辨識
-            responses = self.client.streaming_recognize(request_generator())
+            # 同步串流 API 在專用執行緒中執行，不阻塞事件迴圈
+            responses = bridge_stream(
+                lambda requests: self.client.streaming_recognize(
+                    config=streaming_config,
+                    requests=requests,
+                ),
+                request_generator(),
+                name="google-speech-stream",
+            )
 
-            for response in responses:
-                if not response.results:
-                    continue
+            try:
+                async for response in responses:
+                    if not response.results:
+                        continue
 
-                result = response.results[0]
-                if not result.alternatives:
-                    continue
+                    result = response.results[0]
+                    if not result.alternatives:
+                        continue
 
-                alternative = result.alternatives[0]
+                    alternative = result.alternatives[0]
 
-                yield {
-                    "text": alternative.transcript,
-                    "confidence": alternative.confidence if result.is_final else 0.0,
-                    "is_final": result.is_final,
-                }
+                    yield {
+                        "text": alternative.transcript,
+                        "confidence": alternative.confidence if result.is_final else 0.0,
+                        "is_final": result.is_final,
+                    }
+            finally:
+                # 連線提前結束時停止送入音訊並結束串流
+                await responses.aclose()
 
         except Exception as e:
             logger.error(f"Google Speech 辨識失敗: {str(e)}")
@@ -108,7 +144,7 @@ class GoogleSpeechRecognizer(SpeechRecognizer):
 
             config = speech_v1.RecognitionConfig(
                 encoding=speech_v1.RecognitionConfig.AudioEncoding.LINEAR16,
-                sample_rate_hertz=16000,
+                sample_rate_hertz=SAMPLE_RATE,
                 language_code=language_code,
                 enable_automatic_punctuation=True,
             )
@@ -126,6 +162,239 @@ class GoogleSpeechRecognizer(SpeechRecognizer):
             raise SpeechServiceError(f"語音辨識失敗: {str(e)}")
 
 
+class VADSegmenter:
+    """
+    以能量偵測語音區段（VAD）切分音訊
+
+    每 30 毫秒計算一次音框的 RMS 能量，高於門檻（固定門檻與環境噪音的較大者）視為語音。
+    靜音持續 silence_ms 即結束一段發言；語音少於 min_speech_ms 的片段（咳嗽、碰撞聲）捨棄；
+    發言超過 max_segment_seconds 時在後半段能量最低的音框處切開，避免切斷字詞。
+    發言之間的靜音只保留 pre_roll_ms 作為下一段的開頭，其餘不送交模型。
+    """
+
+    FRAME_MS = 30
+    # 環境噪音的倍數以上才視為語音
+    NOISE_RATIO = 3.0
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        energy_threshold: float = 300.0,
+        silence_ms: int = 600,
+        min_speech_ms: int = 300,
+        max_segment_seconds: float = 15.0,
+        pre_roll_ms: int = 200,
+    ):
+        self.frame = sample_rate * self.FRAME_MS // 1000
+        self.energy_threshold = energy_threshold
+        self.silence_frames = max(1, silence_ms // self.FRAME_MS)
+        self.min_speech_frames = max(1, min_speech_ms // self.FRAME_MS)
+        self.max_frames = max(self.silence_frames + 1, int(max_segment_seconds * 1000) // self.FRAME_MS)
+        self.pre_roll_frames = pre_roll_ms // self.FRAME_MS
+        self.sample_rate = sample_rate
+
+        capacity = max(
+            self.frame * (self.max_frames + self.pre_roll_frames) * 2,
+            sample_rate * settings.AUDIO_BUFFER_SECONDS,
+        )
+        self._buffer = AudioRingBuffer(capacity)
+        # 緩衝區中已分析的音框能量（與緩衝區開頭對齊）
+        self._energies: List[float] = []
+        self._in_speech = False
+        self._noise_floor = 0.0
+
+        # 統計資訊（秒）
+        self.speech_seconds = 0.0
+        self.skipped_seconds = 0.0
+
+    def feed(self, chunk: bytes) -> List[np.ndarray]:
+        """
+        寫入音框並回傳已結束的發言區段
+
+        Returns:
+            int16 樣本陣列（已複製，可直接保留）
+        """
+        dropped = self._buffer.dropped
+        self._buffer.write(chunk)
+        if self._buffer.dropped > dropped:
+            # 超過緩衝上限被覆蓋的音訊已無法分析，重新對齊音框
+            lost = -(-(self._buffer.dropped - dropped) // self.frame)
+            del self._energies[:lost]
+            self._buffer.consume(lost * self.frame - (self._buffer.dropped - dropped))
+
+        segments: List[np.ndarray] = []
+        while len(self._buffer) - len(self._energies) * self.frame >= self.frame:
+            start = len(self._energies) * self.frame
+            samples = self._buffer.peek(start + self.frame)[start:]
+            energy = float(np.sqrt(np.mean(samples.astype(np.float32) ** 2)))
+            self._energies.append(energy)
+
+            if not self._in_speech:
+                if self._is_voiced(energy):
+                    self._in_speech = True
+                else:
+                    self._noise_floor = 0.95 * self._noise_floor + 0.05 * energy
+                    # 只保留 pre-roll 長度的靜音
+                    excess = len(self._energies) - self.pre_roll_frames
+                    if excess > 0:
+                        self._discard(excess)
+                continue
+
+            if self._trailing_silence() >= self.silence_frames:
+                segment = self._emit(len(self._energies))
+                if segment is not None:
+                    segments.append(segment)
+                self._in_speech = False
+            elif len(self._energies) >= self.max_frames:
+                segment = self._emit(self._cut_point())
+                if segment is not None:
+                    segments.append(segment)
+
+        return segments
+
+    def flush(self) -> Optional[np.ndarray]:
+        """串流結束時取出未結束的發言區段"""
+        segment = None
+        if self._in_speech and self._energies:
+            segment = self._emit(len(self._energies))
+        self._in_speech = False
+        self.skipped_seconds += len(self._buffer) / self.sample_rate
+        self._buffer.clear()
+        self._energies = []
+        return segment
+
+    @property
+    def open_samples(self) -> int:
+        """尚未結束的發言目前的樣本數（不在發言中時為 0）"""
+        return len(self._energies) * self.frame if self._in_speech else 0
+
+    def open_audio(self) -> np.ndarray:
+        """尚未結束的發言音訊（緩衝區的 view，下次 feed 後可能被覆寫）"""
+        return self._buffer.peek(self.open_samples)
+
+    def _is_voiced(self, energy: float) -> bool:
+        return energy >= max(self.energy_threshold, self._noise_floor * self.NOISE_RATIO)
+
+    def _trailing_silence(self) -> int:
+        """結尾連續靜音的音框數"""
+        count = 0
+        for energy in reversed(self._energies):
+            if self._is_voiced(energy):
+                break
+            count += 1
+        return count
+
+    def _cut_point(self) -> int:
+        """達到最長長度時的切點：後半段能量最低的音框之後"""
+        half = len(self._energies) // 2
+        tail = self._energies[half:]
+        return half + tail.index(min(tail)) + 1
+
+    def _emit(self, frames: int) -> Optional[np.ndarray]:
+        """取出前 frames 個音框；語音太少時視為雜音捨棄"""
+        voiced = sum(1 for energy in self._energies[:frames] if self._is_voiced(energy))
+        segment = None
+        if voiced >= self.min_speech_frames:
+            segment = self._buffer.peek(frames * self.frame).copy()
+            self.speech_seconds += len(segment) / self.sample_rate
+        else:
+            self.skipped_seconds += frames * self.frame / self.sample_rate
+
+        self._buffer.consume(frames * self.frame)
+        del self._energies[:frames]
+        return segment
+
+    def _discard(self, frames: int):
+        """捨棄開頭的靜音音框"""
+        self._buffer.consume(frames * self.frame)
+        del self._energies[:frames]
+        self.skipped_seconds += frames * self.frame / self.sample_rate
+
+
+def _common_prefix(a: str, b: str) -> str:
+    """兩段文字的共同前綴"""
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return a[:length]
+
+
+def _is_word_char(char: str) -> bool:
+    """以空白分詞的文字（英文、數字）"""
+    return char.isascii() and char.isalnum()
+
+
+class LocalAgreement:
+    """
+    LocalAgreement-2 穩定前綴確認
+
+    對同一段發言逐步變長的音訊反覆辨識，連續兩次假設的共同前綴視為穩定並確定輸出（不再更改），
+    其餘部分作為暫定結果。中文逐字比較；英文等以空白分詞的文字不在單字中間切開。
+    """
+
+    # 穩定前綴少於此字數時暫不確定，避免產生大量零碎的最終結果
+    MIN_COMMIT_CHARS = 2
+
+    def __init__(self):
+        self.committed = ""
+        self._previous: Optional[str] = None
+
+    def _uncommitted(self, hypothesis: str) -> str:
+        """新假設中已確定文字之後的部分"""
+        if hypothesis.startswith(self.committed):
+            return hypothesis[len(self.committed):]
+
+        # 模型改寫了已確定的部分（例如補上標點）：略過標點與空白逐字對齊，
+        # 遇到不同的字即以目前對齊的位置為準
+        i = j = 0
+        while i < len(self.committed) and j < len(hypothesis):
+            if self.committed[i] == hypothesis[j]:
+                i += 1
+                j += 1
+            elif not self.committed[i].isalnum():
+                i += 1
+            elif not hypothesis[j].isalnum():
+                j += 1
+            else:
+                break
+        return hypothesis[j:]
+
+    def update(self, hypothesis: str) -> Tuple[str, str]:
+        """
+        加入一次辨識假設
+
+        Returns:
+            (本次新確定的文字, 尚未確定的暫定文字)
+        """
+        text = self._uncommitted(hypothesis)
+        newly_committed = ""
+
+        if self._previous is not None:
+            stable = _common_prefix(self._previous, text)
+            # 不在單字中間切開
+            if stable and len(stable) < len(text) and _is_word_char(stable[-1]) and _is_word_char(text[len(stable)]):
+                stable = stable[:stable.rfind(" ") + 1]
+            if len(stable.strip()) >= self.MIN_COMMIT_CHARS:
+                newly_committed = stable
+                self.committed += stable
+                text = text[len(stable):]
+
+        self._previous = text
+        return newly_committed, text
+
+    def finish(self, hypothesis: str) -> str:
+        """發言結束：回傳最終辨識結果中尚未確定的部分並重設"""
+        text = self._uncommitted(hypothesis)
+        self.reset()
+        return text
+
+    def reset(self):
+        self.committed = ""
+        self._previous = None
+
+
 class WhisperRecognizer(SpeechRecognizer):
     """Whisper 本地語音辨識"""
 
@@ -138,65 +407,192 @@ class WhisperRecognizer(SpeechRecognizer):
                 "Whisper 未安裝。請執行: pip install openai-whisper"
             )
 
+        # 模型不保證執行緒安全，所有辨識在同一個執行緒中依序執行
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+        self.interim_results = settings.WHISPER_INTERIM_RESULTS
+        # 所有連線共用的批次推論排程
+        self.scheduler = WhisperBatchScheduler(
+            self._transcribe_batch,
+            executor=self._executor,
+            max_batch_size=settings.WHISPER_BATCH_SIZE,
+            max_wait_ms=settings.WHISPER_BATCH_WAIT_MS,
+        )
+
     async def recognize_stream(
         self,
         audio_stream: AsyncGenerator[bytes, None],
         language_code: str = "zh"
     ) -> AsyncGenerator[dict, None]:
-        """串流語音辨識（Whisper 不支援真正的串流，這裡使用分段處理）"""
-        buffer = b""
-        chunk_size = 16000 * 2 * 5  # 5 秒的音訊
-
-        async for audio_chunk in audio_stream:
-            buffer += audio_chunk
+        """
+        串流語音辨識（Whisper 不支援真正的串流，這裡依語音區段分段處理，略過靜音）
+
+        啟用暫定結果時，發言進行中每累積 WHISPER_INTERIM_INTERVAL_MS 的音訊就在背景重新辨識
+        整段發言（超過 WHISPER_INTERIM_WINDOW_SECONDS 時只辨識結尾視窗），輸出 is_final=False 的暫定結果，並以 LocalAgreement 將穩定的前綴提前作為最終結果輸出
+        （segment_final=False）。每段發言結束時的最終結果附上整段文字 segment_text。
+        """
+        segmenter = self._create_segmenter()
+        agreement = LocalAgreement()
+        interim_samples = max(1, SAMPLE_RATE * settings.WHISPER_INTERIM_INTERVAL_MS // 1000)
+        window_samples = max(interim_samples, int(SAMPLE_RATE * settings.WHISPER_INTERIM_WINDOW_SECONDS))
+        last_interim = 0
+        # 進行中的暫定辨識（task, 是否只辨識了結尾視窗）；同一串流同時最多一個
+        pending: Optional[Tuple[asyncio.Task, bool]] = None
+
+        def cancel_pending():
+            nonlocal pending
+            if pending is not None:
+                pending[0].cancel()
+                pending = None
 
-            # 當緩衝區達到一定大小時處理
-            if len(buffer) >= chunk_size:
-                text = await self._recognize_chunk(buffer[:chunk_size], language_code)
-                buffer = buffer[chunk_size:]
+        try:
+            async for audio_chunk in audio_stream:
+                segments = segmenter.feed(audio_chunk)
+                if segments:
+                    # 發言已結束，尚未完成的暫定辨識已無用
+                    cancel_pending()
+                for segment in segments:
+                    result = self._segment_result(agreement, await self._recognize_chunk(segment, language_code))
+                    last_interim = 0
+                    if result:
+                        yield result
+
+                if not self.interim_results:
+                    continue
 
-                if text:
-                    yield {
-                        "text": text,
-                        "confidence": 0.9,  # Whisper 不提供信心分數
-                        "is_final": True,
-                    }
+                open_samples = segmenter.open_samples
+                if open_samples < last_interim:
+                    # 上一段發言被視為雜音捨棄，已確定的文字仍作為一段發言結束
+                    cancel_pending()
+                    result = self._segment_result(agreement, "")
+                    last_interim = 0
+                    if result:
+                        yield result
+
+                if pending is not None and pending[0].done():
+                    task, windowed = pending
+                    pending = None
+                    for result in self._interim_results(agreement, task.result(), windowed):
+                        yield result
+
+                # 上一次暫定辨識尚未完成時略過，辨識較慢時間隔自然拉長，不會佔滿批次排程
+                if pending is None and open_samples >= last_interim + interim_samples:
+                    last_interim = open_samples
+                    audio = segmenter.open_audio()
+                    # 只辨識結尾視窗，長發言的暫定辨識成本不隨發言長度增加；
+                    # 緩衝區下次 feed 後可能被覆寫，先複製
+                    pending = (
+                        asyncio.create_task(self._recognize_chunk(audio[-window_samples:].copy(), language_code)),
+                        len(audio) > window_samples,
+                    )
 
-        # 處理剩餘的音訊
-        if buffer:
-            text = await self._recognize_chunk(buffer, language_code)
-            if text:
-                yield {
-                    "text": text,
-                    "confidence": 0.9,
-                    "is_final": True,
-                }
-
-    async def _recognize_chunk(self, audio_data: bytes, language: str) -> str:
-        """辨識音訊片段"""
+            # 處理剩餘的音訊
+            cancel_pending()
+            segment = segmenter.flush()
+            if segment is not None:
+                result = self._segment_result(agreement, await self._recognize_chunk(segment, language_code))
+                if result:
+                    yield result
+        finally:
+            cancel_pending()
+
+        logger.info(
+            f"Whisper 串流結束：語音 {segmenter.speech_seconds:.1f} 秒，"
+            f"略過靜音 {segmenter.skipped_seconds:.1f} 秒"
+        )
+
+    @staticmethod
+    def _final_result(text: str) -> dict:
+        return {
+            "text": text,
+            "confidence": 0.9,  # Whisper 不提供信心分數
+            "is_final": True,
+        }
+
+    @classmethod
+    def _interim_results(cls, agreement: LocalAgreement, hypothesis: str, windowed: bool) -> List[dict]:
+        """
+        暫定辨識的結果
+
+        辨識了整段發言時以 LocalAgreement 確定穩定前綴；只辨識了結尾視窗時無法與已確定的文字對齊，
+        僅作為暫定結果顯示，剩餘部分在發言結束時確定。
+        """
+        if windowed:
+            committed, interim = "", hypothesis
+        else:
+            committed, interim = agreement.update(hypothesis)
+
+        results = []
+        if committed.strip():
+            results.append({**cls._final_result(committed.strip()), "segment_final": False})
+        if interim.strip():
+            results.append({
+                "text": interim.strip(),
+                "confidence": 0.0,
+                "is_final": False,
+            })
+        return results
+
+    @classmethod
+    def _segment_result(cls, agreement: LocalAgreement, hypothesis: str) -> Optional[dict]:
+        """發言結束的最終結果：text 為尚未確定的部分，segment_text 為整段發言"""
+        committed = agreement.committed
+        text = agreement.finish(hypothesis)
+        segment_text = (committed + text).strip()
+        if not segment_text:
+            return None
+        return {**cls._final_result(text.strip()), "segment_text": segment_text}
+
+    def _create_segmenter(self) -> VADSegmenter:
+        """依設定建立語音區段切分器"""
+        return VADSegmenter(
+            energy_threshold=settings.VAD_ENERGY_THRESHOLD,
+            silence_ms=settings.VAD_SILENCE_MS,
+            min_speech_ms=settings.VAD_MIN_SPEECH_MS,
+            max_segment_seconds=settings.VAD_MAX_SEGMENT_SECONDS,
+            pre_roll_ms=settings.VAD_PRE_ROLL_MS,
+        )
+
+    async def _recognize_chunk(self, audio_data: Union[bytes, np.ndarray], language: str) -> str:
+        """辨識音訊片段（交由批次排程與其他連線的區段一起推論）"""
         try:
-            import numpy as np
-            import tempfile
-            import soundfile as sf
-
-            # 將 bytes 轉換為 numpy array
-            audio_array = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
-
-            # 使用臨時文件
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                sf.write(temp_file.name, audio_array, 16000)
-                result = self.model.transcribe(
-                    temp_file.name,
-                    language=language,
-                    fp16=False
-                )
-
-            return result["text"].strip()
+            audio_array = pcm16_to_float32(audio_data)
+            return await self.scheduler.transcribe(audio_array, language)
 
         except Exception as e:
             logger.error(f"Whisper 辨識失敗: {str(e)}")
             return ""
 
+    def _transcribe_batch(self, audios: List[np.ndarray], language: str) -> List[str]:
+        """
+        批次辨識多個 float32 音訊（在推論執行緒中執行）
+
+        VAD 區段不超過 30 秒，可各自補齊為一個 mel 視窗後疊成一批一起解碼。
+        只有一個區段時使用 transcribe（含溫度回退等完整流程）。
+        """
+        if len(audios) == 1:
+            return [self._transcribe_array(audios[0], language)]
+
+        import torch
+        import whisper
+
+        mels = [
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=self.model.dims.n_mels)
+            for audio in audios
+        ]
+        batch = torch.stack(mels).to(self.model.device)
+        options = whisper.DecodingOptions(language=language, fp16=False, without_timestamps=True)
+        results = whisper.decode(self.model, batch, options)
+        return [result.text.strip() for result in results]
+
+    def _transcribe_array(self, audio_array, language: str) -> str:
+        """直接以 float32 陣列辨識（不寫入暫存檔）"""
+        result = self.model.transcribe(audio_array, language=language, fp16=False)
+        return result["text"].strip()
+
+    def stats(self) -> Dict[str, Any]:
+        """取得批次推論統計"""
+        return self.scheduler.stats()
+
     def recognize_file(self, audio_path: str, language: str = "zh") -> str:
         """辨識音訊檔案"""
         try:
@@ -207,6 +603,69 @@ class WhisperRecognizer(SpeechRecognizer):
             raise SpeechServiceError(f"語音辨識失敗: {str(e)}")
 
 
+class RemoteSpeechRecognizer(SpeechRecognizer):
+    """轉送到語音 worker 行程辨識（API 行程不載入模型）"""
+
+    def __init__(self, pool: SpeechWorkerPool):
+        self.pool = pool
+
+    async def recognize_stream(
+        self,
+        audio_stream: AsyncGenerator[bytes, None],
+        language_code: str = "zh"
+    ) -> AsyncGenerator[dict, None]:
+        """串流語音辨識（音訊經由 Unix socket 送到負載最低的 worker）"""
+        try:
+            worker, reader, writer = await self.pool.connect()
+        except SpeechWorkerUnavailable as e:
+            raise SpeechServiceError(str(e))
+
+        async def pump():
+            async for audio_chunk in audio_stream:
+                write_audio(writer, audio_chunk)
+                await writer.drain()
+            write_json(writer, {"type": "end"})
+            await writer.drain()
+
+        pump_task = None
+        try:
+            write_json(writer, {"type": "start", "language": language_code})
+            await writer.drain()
+            pump_task = asyncio.create_task(pump())
+
+            while True:
+                try:
+                    kind, message = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    raise SpeechServiceError(f"語音 worker 連線中斷: {worker.path}")
+
+                if kind != FRAME_JSON:
+                    continue
+                if message.get("type") == "result":
+                    yield {key: value for key, value in message.items() if key != "type"}
+                elif message.get("type") == "error":
+                    raise SpeechServiceError(message.get("message", "語音 worker 辨識失敗"))
+                elif message.get("type") == "done":
+                    break
+
+            if pump_task.done() and not pump_task.cancelled():
+                pump_task.result()
+
+        except (OSError, SpeechIPCError) as e:
+            logger.error(f"語音 worker 通訊失敗: {worker.path}, 錯誤: {str(e)}")
+            raise SpeechServiceError(f"語音辨識失敗: {str(e)}")
+        finally:
+            if pump_task is not None:
+                pump_task.cancel()
+                await asyncio.gather(pump_task, return_exceptions=True)
+            writer.close()
+            self.pool.release(worker)
+
+    def stats(self) -> Dict[str, Any]:
+        """取得 worker 行程池統計"""
+        return self.pool.stats()
+
+
 class SpeechService:
     """語音轉文字服務管理器"""
 
@@ -223,6 +682,10 @@ class SpeechService:
             except Exception as e:
                 logger.warning(f"Google Speech 初始化失敗: {str(e)}")
 
+        if not self.recognizer and settings.SPEECH_BACKEND == "worker":
+            self.recognizer = RemoteSpeechRecognizer(speech_worker_pool)
+            logger.info("使用語音 worker 行程辨識")
+
         if not self.recognizer:
             try:
                 self.recognizer = WhisperRecognizer(settings.WHISPER_MODEL)
@@ -254,6 +717,13 @@ class SpeechService:
             # Whisper 需要檔案路徑，這裡需要額外處理
             raise SpeechServiceError("Whisper 檔案辨識需要檔案路徑")
 
+    def stats(self) -> Dict[str, Any]:
+        """取得語音辨識統計"""
+        return {
+            "recognizer": type(self.recognizer).__name__ if self.recognizer else None,
+            **(self.recognizer.stats() if self.recognizer else {}),
+        }
+
 
 # 建立全域實例
 try:
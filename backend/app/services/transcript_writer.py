@@ -0,0 +1,152 @@
+"""轉錄批次寫入服務
+
+即時轉錄的每個最終結果原本各自開一個 Session 並 commit，
+大量同時進行的課程會產生大量小交易並耗盡連線池。
+改為由行程內的緩衝區彙整所有連線的轉錄，累積 N 筆或每 T 毫秒以一次批次 INSERT 寫入。
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.transcript import Transcript
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptWriter:
+    """轉錄寫入緩衝區（write-behind）"""
+
+    def __init__(self, batch_size: int = 200, flush_interval_ms: int = 500, max_buffer: int = 20000):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(1, flush_interval_ms) / 1000
+        self.max_buffer = max(self.batch_size, max_buffer)
+
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        # 統計資訊
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def start(self):
+        """啟動定時寫入（重複呼叫不會重複啟動）"""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止定時寫入並寫入緩衝區剩餘的轉錄"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def add(
+        self,
+        course_id: str,
+        timestamp: str,
+        text: str,
+        confidence: Optional[float] = None,
+    ):
+        """加入一筆轉錄（不等待寫入）"""
+        self._buffer.append({
+            "course_id": course_id,
+            "timestamp": timestamp,
+            "text": text,
+            "confidence": confidence,
+            "created_at": datetime.utcnow(),
+        })
+        self._trim()
+
+        self.start()
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _trim(self):
+        """緩衝區超過上限時（資料庫長時間無法寫入）捨棄最舊的轉錄"""
+        while len(self._buffer) > self.max_buffer:
+            self._buffer.popleft()
+            self.dropped += 1
+
+    async def _run(self):
+        """每 flush_interval 或累積 batch_size 筆時寫入"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"轉錄批次寫入失敗: {str(e)}")
+
+    async def flush(self) -> int:
+        """
+        寫入緩衝區中的轉錄
+
+        Returns:
+            寫入筆數；寫入失敗時轉錄放回緩衝區並拋出例外
+        """
+        async with self._flush_lock:
+            written = 0
+            while self._buffer:
+                rows: List[Dict[str, Any]] = []
+                while self._buffer and len(rows) < self.batch_size:
+                    rows.append(self._buffer.popleft())
+
+                started = time.perf_counter()
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await db.execute(insert(Transcript), rows)
+                        await db.commit()
+                except Exception:
+                    self.flush_errors += 1
+                    # 放回緩衝區開頭，保持轉錄順序，下次再試
+                    self._buffer.extendleft(reversed(rows))
+                    self._trim()
+                    raise
+
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.flushes += 1
+                self.last_flush_ms = elapsed_ms
+                self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                self.written += len(rows)
+                written += len(rows)
+
+            return written
+
+    def stats(self) -> Dict[str, Any]:
+        """取得寫入統計"""
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+# 建立全域實例
+transcript_writer = TranscriptWriter(
+    batch_size=settings.TRANSCRIPT_BATCH_SIZE,
+    flush_interval_ms=settings.TRANSCRIPT_FLUSH_INTERVAL_MS,
+    max_buffer=settings.TRANSCRIPT_MAX_BUFFER,
+)
@@ -0,0 +1,160 @@
+"""Whisper 批次推論排程
+
+每個行程共用一個 Whisper 模型，各連線各自呼叫模型時只能依序執行。
+排程器收集所有連線已切好的語音區段，在最長等待時間內湊成批次一起推論，
+再把結果送回各自的串流，吞吐量隨批次大小而非連線數增加。
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 批次推論函式：(float32 音訊列表, 語言) -> 與輸入順序相同的文字
+BatchTranscriber = Callable[[List[np.ndarray], str], List[str]]
+
+
+class _Request:
+    """等待推論的語音區段"""
+
+    def __init__(self, audio: np.ndarray, language: str, future: asyncio.Future):
+        self.audio = audio
+        self.language = language
+        self.future = future
+        self.enqueued = time.monotonic()
+
+
+class WhisperBatchScheduler:
+    """跨連線的 Whisper 批次推論排程器"""
+
+    def __init__(
+        self,
+        transcribe_batch: BatchTranscriber,
+        executor: Optional[Executor] = None,
+        max_batch_size: int = 8,
+        max_wait_ms: int = 50,
+    ):
+        self.transcribe_batch = transcribe_batch
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+
+        self._pending: Deque[_Request] = deque()
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # 統計資訊
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.last_batch_ms = 0.0
+
+    def start(self):
+        """啟動排程（重複呼叫不會重複啟動）"""
+        if self._task is not None and not self._task.done():
+            return
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止排程，等待中的請求以取消結束"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._pending:
+            self._pending.popleft().future.cancel()
+
+    async def transcribe(self, audio: np.ndarray, language: str) -> str:
+        """排入一個語音區段並等待辨識結果"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(_Request(audio, language, future))
+        self._ready.set()
+        return await future
+
+    async def _run(self):
+        """依序執行批次（同一時間只有一個批次使用模型）"""
+        while True:
+            if not self._pending:
+                self._ready.clear()
+                await self._ready.wait()
+
+            # 從最舊的請求起算最長等待時間，期間湊滿批次即立即執行
+            deadline = self._pending[0].enqueued + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._ready.clear()
+                try:
+                    await asyncio.wait_for(self._ready.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._take_batch()
+            if batch:
+                await self._execute(batch)
+
+    def _take_batch(self) -> List[_Request]:
+        """取出最多 max_batch_size 個相同語言的請求（略過已取消的）"""
+        batch: List[_Request] = []
+        remaining: Deque[_Request] = deque()
+        language = None
+
+        while self._pending:
+            request = self._pending.popleft()
+            if request.future.done():
+                continue
+            if language is None:
+                language = request.language
+            if request.language == language and len(batch) < self.max_batch_size:
+                batch.append(request)
+            else:
+                remaining.append(request)
+
+        self._pending = remaining
+        return batch
+
+    async def _execute(self, batch: List[_Request]):
+        """在推論執行緒中執行批次並送回結果"""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            texts = await loop.run_in_executor(
+                self.executor,
+                self.transcribe_batch,
+                [request.audio for request in batch],
+                batch[0].language,
+            )
+        except Exception as e:
+            logger.error(f"Whisper 批次推論失敗（{len(batch)} 個區段）: {str(e)}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self.last_batch_ms = (time.perf_counter() - started) * 1000
+
+        for request, text in zip(batch, texts):
+            if not request.future.done():
+                request.future.set_result(text)
+
+    def stats(self) -> Dict[str, Any]:
+        """取得排程統計"""
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "last_batch_ms": round(self.last_batch_ms, 2),
+        }
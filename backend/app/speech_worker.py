@@ -0,0 +1,216 @@
+"""語音 worker
+
+SPEECH_BACKEND=worker 時，Whisper 模型只載入於語音 worker 行程，
+API 行程經由 Unix socket 轉送音訊（協定見 app.core.speech_ipc）。
+
+啟動 supervisor（建立 SPEECH_WORKERS 個 worker 行程，健康檢查並在異常時重啟）：
+    python -m app.speech_worker
+單獨啟動一個 worker 行程：
+    python -m app.speech_worker --serve /tmp/courseai-speech/speech-0.sock
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging_config import setup_logging
+from app.core.speech_ipc import FRAME_AUDIO, FRAME_JSON, read_frame, write_json
+from app.services.speech_pool import ping_worker, worker_socket_paths
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechWorkerServer:
+    """語音 worker 行程內的 Unix socket 服務（每個連線一個辨識串流）"""
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.active_streams = 0
+        self.total_streams = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """處理一個連線：健康檢查或辨識串流"""
+        try:
+            kind, message = await read_frame(reader)
+            if kind != FRAME_JSON:
+                return
+
+            if message.get("type") == "ping":
+                write_json(writer, {
+                    "type": "pong",
+                    "pid": os.getpid(),
+                    "active_streams": self.active_streams,
+                    "stats": self.stats(),
+                })
+                await writer.drain()
+            elif message.get("type") == "start":
+                await self._stream(reader, writer, message.get("language", "zh"))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"語音 worker 連線處理失敗: {str(e)}")
+        finally:
+            writer.close()
+
+    async def _stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, language: str):
+        """辨識一個音訊串流並回傳結果"""
+        async def audio_stream():
+            while True:
+                try:
+                    kind, payload = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    # API 端連線中斷，視為串流結束
+                    return
+                if kind == FRAME_AUDIO:
+                    yield payload
+                elif payload.get("type") == "end":
+                    return
+
+        self.active_streams += 1
+        self.total_streams += 1
+        try:
+            async for result in self.recognizer.recognize_stream(audio_stream(), language):
+                write_json(writer, {"type": "result", **result})
+                await writer.drain()
+            write_json(writer, {"type": "done"})
+            await writer.drain()
+        except ConnectionError:
+            # API 端已斷線，無法回報
+            pass
+        except Exception as e:
+            logger.error(f"語音 worker 辨識失敗: {str(e)}")
+            try:
+                write_json(writer, {"type": "error", "message": str(e)})
+                await writer.drain()
+            except ConnectionError:
+                pass
+        finally:
+            # 結果全部送出（或連線中斷）後才算串流結束
+            self.active_streams -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "total_streams": self.total_streams,
+            **self.recognizer.stats(),
+        }
+
+
+async def serve(socket_path: str):
+    """啟動單一語音 worker 行程"""
+    from app.services.speech_service import speech_service
+
+    if speech_service is None:
+        raise SystemExit("語音服務初始化失敗")
+
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    if os.path.exists(socket_path):
+        # 上次異常結束留下的 socket 檔
+        os.unlink(socket_path)
+
+    worker = SpeechWorkerServer(speech_service.recognizer)
+    server = await asyncio.start_unix_server(worker.handle, path=socket_path)
+    logger.info(f"語音 worker 已啟動: {socket_path}（pid {os.getpid()}）")
+
+    async with server:
+        await server.serve_forever()
+
+
+class WorkerProcess:
+    """supervisor 管理的 worker 行程"""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.started_at = 0.0
+        self.last_ok = 0.0
+        self.restarts = 0
+
+
+async def supervise(workers: int, socket_dir: str):
+    """
+    建立並監控 worker 行程
+
+    行程結束或超過 SPEECH_WORKER_HEALTH_TIMEOUT 未通過健康檢查（含模型載入時間）即重啟。
+    """
+    # worker 行程一律在行程內載入 Whisper 模型
+    env = dict(os.environ, SPEECH_BACKEND="local", USE_GOOGLE_SPEECH="False")
+    processes: List[WorkerProcess] = [WorkerProcess(path) for path in worker_socket_paths(socket_dir, workers)]
+
+    async def spawn(worker: WorkerProcess):
+        worker.process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "app.speech_worker", "--serve", worker.socket_path,
+            env=env,
+        )
+        worker.started_at = time.monotonic()
+        worker.last_ok = 0.0
+        logger.info(f"語音 worker 行程已建立: {worker.socket_path}（pid {worker.process.pid}）")
+
+    async def terminate(worker: WorkerProcess):
+        if worker.process is None or worker.process.returncode is not None:
+            return
+        worker.process.terminate()
+        try:
+            await asyncio.wait_for(worker.process.wait(), 10)
+        except asyncio.TimeoutError:
+            worker.process.kill()
+            await worker.process.wait()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    for worker in processes:
+        await spawn(worker)
+
+    try:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), settings.SPEECH_WORKER_HEALTH_INTERVAL)
+                break
+            except asyncio.TimeoutError:
+                pass
+
+            for worker in processes:
+                if worker.process.returncode is not None:
+                    logger.warning(f"語音 worker 行程已結束（{worker.process.returncode}），重新啟動: {worker.socket_path}")
+                else:
+                    try:
+                        await ping_worker(worker.socket_path)
+                        worker.last_ok = time.monotonic()
+                        continue
+                    except Exception:
+                        since = max(worker.last_ok, worker.started_at)
+                        if time.monotonic() - since < settings.SPEECH_WORKER_HEALTH_TIMEOUT:
+                            continue
+                        logger.warning(f"語音 worker 無回應，重新啟動: {worker.socket_path}")
+                        await terminate(worker)
+
+                worker.restarts += 1
+                await spawn(worker)
+    finally:
+        await asyncio.gather(*(terminate(worker) for worker in processes))
+        logger.info("語音 worker 行程已全部結束")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CourseAI 語音 worker")
+    parser.add_argument("--serve", metavar="SOCKET", help="以單一 worker 行程監聽指定的 Unix socket")
+    parser.add_argument("--workers", type=int, default=settings.SPEECH_WORKERS, help="worker 行程數")
+    parser.add_argument("--socket-dir", default=settings.SPEECH_WORKER_SOCKET_DIR, help="Unix socket 目錄")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.serve:
+        asyncio.run(serve(args.serve))
+    else:
+        asyncio.run(supervise(args.workers, args.socket_dir))
+
+
+if __name__ == "__main__":
+    main()
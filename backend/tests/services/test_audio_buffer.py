@@ -0,0 +1,62 @@
+"""測試音訊環形緩衝區"""
+import numpy as np
+import pytest
+from app.core.audio_buffer import AudioRingBuffer
+
+
+def _pcm(*samples):
+    return np.array(samples, dtype=np.int16).tobytes()
+
+
+class TestAudioRingBuffer:
+    """測試 AudioRingBuffer"""
+
+    def test_write_and_consume(self):
+        """測試寫入後依序取出"""
+        buffer = AudioRingBuffer(8)
+        buffer.write(_pcm(1, 2, 3))
+        buffer.write(_pcm(4, 5))
+
+        assert len(buffer) == 5
+        assert buffer.peek(3).tolist() == [1, 2, 3]
+        buffer.consume(3)
+        assert buffer.peek(10).tolist() == [4, 5]
+
+    def test_window_across_wrap_is_contiguous_view(self):
+        """測試跨越環形邊界的視窗仍為連續的 view"""
+        buffer = AudioRingBuffer(4)
+        buffer.write(_pcm(1, 2, 3))
+        buffer.consume(2)
+        buffer.write(_pcm(4, 5, 6))
+
+        window = buffer.peek(4)
+        assert window.tolist() == [3, 4, 5, 6]
+        assert window.base is not None
+        assert bytes(buffer.window(2)) == _pcm(3, 4)
+
+    def test_overflow_drops_oldest(self):
+        """測試超過容量時捨棄最舊的樣本"""
+        buffer = AudioRingBuffer(4)
+        buffer.write(_pcm(1, 2, 3))
+        buffer.write(_pcm(4, 5, 6))
+
+        assert buffer.peek(4).tolist() == [3, 4, 5, 6]
+        assert buffer.dropped == 2
+
+        buffer.write(_pcm(*range(10, 20)))
+        assert buffer.peek(4).tolist() == [16, 17, 18, 19]
+        assert len(buffer) == 4
+
+    def test_odd_byte_carried_to_next_frame(self):
+        """測試音框以奇數位元組切開時保留到下一個音框"""
+        pcm = _pcm(100, 200)
+        buffer = AudioRingBuffer(4)
+        buffer.write(pcm[:3])
+        assert buffer.peek(4).tolist() == [100]
+        buffer.write(pcm[3:])
+        assert buffer.peek(4).tolist() == [100, 200]
+
+    def test_invalid_capacity(self):
+        """測試容量必須大於 0"""
+        with pytest.raises(ValueError):
+            AudioRingBuffer(0)
@@ -0,0 +1,125 @@
+"""測試課程內容 map-reduce 分析"""
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.services.course_analysis import (
+    CourseAnalysisService,
+    chunk_slide_pages,
+    chunk_transcripts,
+    parse_timestamp,
+    summary_tokens,
+)
+
+
+class TestChunking:
+    """測試內容切分"""
+
+    def test_parse_timestamp(self):
+        """測試時間戳記轉換"""
+        assert parse_timestamp("01:02:03") == 3723
+        assert parse_timestamp("02:03") == 123
+        assert parse_timestamp("無效") == 0
+
+    def test_slide_pages_grouped_within_limit(self):
+        """測試講義依頁合併且不超過 token 上限"""
+        pages = [(i, "內容" * 40) for i in range(1, 7)]
+        chunks = chunk_slide_pages("lecture.pdf", pages, max_tokens=100)
+
+        assert len(chunks) == 3
+        assert chunks[0].label == "講義 lecture.pdf 第 1-2 頁"
+        assert all(len(chunk.text) <= 200 for chunk in chunks)
+
+    def test_long_page_is_split(self):
+        """測試單頁過長時切分"""
+        chunks = chunk_slide_pages("lecture.pdf", [(3, "字" * 500)], max_tokens=100)
+
+        assert len(chunks) == 3
+        assert chunks[0].label == "講義 lecture.pdf 第 3 頁（1/3）"
+
+    def test_transcript_windows_are_stable(self):
+        """測試新增轉錄只影響最後的時間窗"""
+        lines = [("00:01:00", "開場"), ("00:09:00", "第一段"), ("00:12:00", "第二段")]
+        before = chunk_transcripts(lines, window_seconds=600, max_tokens=1000)
+        after = chunk_transcripts(lines + [("00:15:00", "新內容")], window_seconds=600, max_tokens=1000)
+
+        assert [c.label for c in before] == ["轉錄 00:00:00-00:10:00", "轉錄 00:10:00-00:20:00"]
+        assert before[0].text == after[0].text
+        assert before[1].text != after[1].text
+
+
+class TestCourseAnalysisService:
+    """測試 CourseAnalysisService"""
+
+    @pytest.mark.asyncio
+    async def test_small_content_uses_single_prompt(self):
+        """測試內容不超過上限時直接分析"""
+        service = CourseAnalysisService(chunk_tokens=1000)
+        summary = {"key_points": [], "concepts": ["概念"], "formulas": []}
+
+        with patch("app.services.course_analysis.llm_service") as mock_llm:
+            mock_llm.analyze_course_content = AsyncMock(return_value=summary)
+            result = await service.analyze([("a.pdf", [(1, "短講義")])], [("00:00:10", "短轉錄")])
+
+        assert result == summary
+        slides_text, transcript_text = mock_llm.analyze_course_content.call_args.args
+        assert "短講義" in slides_text
+        assert "[00:00:10] 短轉錄" in transcript_text
+
+    @pytest.mark.asyncio
+    async def test_long_content_map_reduce(self):
+        """測試長內容分段摘要後合併，且涵蓋全部內容"""
+        service = CourseAnalysisService(chunk_tokens=50, transcript_window=600)
+        transcripts = [(f"{h:02d}:{m:02d}:00", f"第 {h}-{m} 段內容") for h in range(2) for m in range(0, 60, 10)]
+        final = {"key_points": [], "concepts": ["全部"], "formulas": []}
+
+        with patch("app.services.course_analysis.llm_service") as mock_llm:
+            mock_llm.summarize_chunk = AsyncMock(side_effect=lambda label, text, cache_ttl: {"label": label})
+            mock_llm.merge_summaries = AsyncMock(return_value=final)
+            result = await service.analyze([], transcripts)
+
+        assert result == final
+        labels = [call.args[0] for call in mock_llm.summarize_chunk.call_args_list]
+        assert labels[0] == "轉錄 00:00:00-00:10:00"
+        assert labels[-1] == "轉錄 01:50:00-02:00:00"
+        assert mock_llm.merge_summaries.call_args.kwargs["final"] is True
+
+    @pytest.mark.asyncio
+    async def test_failed_chunks_are_skipped(self):
+        """測試部分區塊摘要失敗時仍能合併其餘結果"""
+        service = CourseAnalysisService(chunk_tokens=20)
+        pages = [(i, "內容" * 15) for i in range(1, 4)]
+
+        async def summarize(label, text, cache_ttl):
+            if "第 2 頁" in label:
+                raise Exception("失敗")
+            return {"label": label}
+
+        with patch("app.services.course_analysis.llm_service") as mock_llm:
+            mock_llm.summarize_chunk = AsyncMock(side_effect=summarize)
+            mock_llm.merge_summaries = AsyncMock(return_value={"key_points": []})
+            await service.analyze([("a.pdf", pages)], [])
+
+        partials = mock_llm.merge_summaries.call_args.args[0]
+        assert len(partials) == 2
+
+    @pytest.mark.asyncio
+    async def test_oversized_partials_fit_merge_limit(self):
+        """測試區塊摘要都超過合併上限時仍分層合併，每次合併的提示不超過上限"""
+        service = CourseAnalysisService(chunk_tokens=200)
+        partials = [
+            {
+                "key_points": [{"title": f"重點{i}-{j}", "content": "說明" * 40} for j in range(5)],
+                "concepts": [f"概念{i}-{j}" for j in range(10)],
+                "formulas": [],
+            }
+            for i in range(6)
+        ]
+        merged = {"key_points": [{"title": "合併", "content": "說明" * 10}], "concepts": [], "formulas": []}
+
+        with patch("app.services.course_analysis.llm_service") as mock_llm:
+            mock_llm.merge_summaries = AsyncMock(return_value=merged)
+            await service._reduce(partials)
+
+        for call in mock_llm.merge_summaries.call_args_list:
+            group = call.args[0]
+            assert sum(summary_tokens(partial) for partial in group) <= service.chunk_tokens
+        assert mock_llm.merge_summaries.call_args.kwargs["final"] is True
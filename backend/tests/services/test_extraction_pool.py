@@ -0,0 +1,74 @@
+"""測試講義擷取行程池"""
+import os
+import time
+import pytest
+from app.services.extraction_pool import (
+    ExtractionPool,
+    ExtractionQueueFullError,
+    ExtractionTimeoutError,
+)
+
+
+def _worker_pid(_: int) -> int:
+    """回傳工作行程 PID"""
+    return os.getpid()
+
+
+def _sleep(seconds: float) -> float:
+    """模擬卡住的擷取工作"""
+    time.sleep(seconds)
+    return seconds
+
+
+class TestExtractionPool:
+    """測試 ExtractionPool"""
+
+    @pytest.mark.asyncio
+    async def test_run_in_worker_process(self):
+        """測試工作在獨立行程中執行"""
+        pool = ExtractionPool(max_workers=1, max_jobs_per_worker=0)
+        try:
+            pid = await pool.run(_worker_pid, 0)
+            assert pid != os.getpid()
+            assert pool.stats()["completed_jobs"] == 1
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_admit_rejects_when_full(self):
+        """測試超過佇列上限時拒絕新的上傳"""
+        pool = ExtractionPool(max_workers=1, max_pending=1)
+
+        async with pool.admit():
+            assert pool.pending == 1
+            with pytest.raises(ExtractionQueueFullError):
+                async with pool.admit():
+                    pass
+
+        assert pool.pending == 0
+        assert pool.stats()["rejected_uploads"] == 1
+
+    @pytest.mark.asyncio
+    async def test_job_timeout_recycles_pool(self):
+        """測試逾時的工作會回收行程池"""
+        pool = ExtractionPool(max_workers=1, job_timeout=0.5, max_jobs_per_worker=0)
+        try:
+            with pytest.raises(ExtractionTimeoutError):
+                await pool.run(_sleep, 30)
+
+            # 新工作應送到新的行程池
+            assert await pool.run(_sleep, 0) == 0
+            assert pool.stats()["timed_out_jobs"] == 1
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_worker_recycling(self):
+        """測試工作行程處理 N 個工作後重啟"""
+        pool = ExtractionPool(max_workers=1, max_jobs_per_worker=1)
+        try:
+            first = await pool.run(_worker_pid, 0)
+            second = await pool.run(_worker_pid, 1)
+            assert first != second
+        finally:
+            pool.shutdown()
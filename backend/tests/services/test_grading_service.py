@@ -0,0 +1,144 @@
+"""測試測驗批改服務"""
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.services.grading_service import GradingError, GradingService, normalize_answer
+
+
+QUESTIONS = [
+    {
+        "question_id": "q1",
+        "type": "multiple_choice",
+        "question_text": "二元樹每個節點最多有幾個子節點？",
+        "options": ["A. 1", "B. 2", "C. 3", "D. 4"],
+        "correct_answer": "B",
+        "explanation": "二元樹每個節點最多兩個子節點",
+        "slide_reference": 5,
+    },
+    {
+        "question_id": "q2",
+        "type": "fill_in_blank",
+        "question_text": "後進先出的資料結構是＿＿",
+        "correct_answer": "Stack",
+        "explanation": "堆疊",
+        "video_timestamp": "00:12:30",
+    },
+    {
+        "question_id": "q3",
+        "type": "short_answer",
+        "question_text": "說明佇列的用途",
+        "correct_answer": "先進先出的排程",
+    },
+]
+
+
+class TestNormalizeAnswer:
+    """測試答案正規化"""
+
+    def test_full_width_and_whitespace(self):
+        """測試全半形、大小寫與空白"""
+        assert normalize_answer("　ＳＴＡＣＫ ") == "stack"
+        assert normalize_answer("二 元 樹。") == "二元樹"
+
+
+class TestGradingService:
+    """測試 GradingService"""
+
+    def setup_method(self):
+        self.service = GradingService()
+
+    @pytest.mark.parametrize("answer", ["B", "b", "(B)", "Ｂ．", "B. 2", "2", " ２ "])
+    def test_multiple_choice_matches_option(self, answer):
+        """測試選擇題接受選項代號或選項文字"""
+        assert self.service.is_correct(QUESTIONS[0], answer)
+
+    @pytest.mark.parametrize("answer", ["A", "1", "", "E"])
+    def test_multiple_choice_wrong(self, answer):
+        """測試選擇題答錯"""
+        assert not self.service.is_correct(QUESTIONS[0], answer)
+
+    def test_fill_in_blank(self):
+        """測試填充題正規化比對"""
+        assert self.service.is_correct(QUESTIONS[1], "ｓｔａｃｋ")
+        assert not self.service.is_correct(QUESTIONS[1], "queue")
+        assert self.service.is_correct({"type": "fill_in_blank", "correct_answer": "0.5"}, "0.50")
+
+    @pytest.mark.asyncio
+    async def test_objective_only_does_not_call_llm(self):
+        """測試沒有簡答題時不呼叫 LLM"""
+        answers = [
+            {"question_id": "q1", "user_answer": "B"},
+            {"question_id": "q2", "user_answer": "queue"},
+        ]
+
+        with patch("app.services.grading_service.llm_service") as mock_llm:
+            mock_llm.grade_short_answers_batch = AsyncMock()
+            graded = await self.service.grade_submission(QUESTIONS[:2], answers)
+
+        mock_llm.grade_short_answers_batch.assert_not_called()
+        assert graded["score"] == 50
+        assert graded["correct_count"] == 1
+        assert graded["results"][1]["feedback"].startswith("正確答案：Stack")
+
+    @pytest.mark.asyncio
+    async def test_short_answers_sent_to_llm(self):
+        """測試只有簡答題送交 LLM 批改"""
+        answers = [
+            {"question_id": "q1", "user_answer": "B"},
+            {"question_id": "q2", "user_answer": "stack"},
+            {"question_id": "q3", "user_answer": "用於排程"},
+        ]
+
+        with patch("app.services.grading_service.llm_service") as mock_llm:
+            mock_llm.grade_short_answers_batch = AsyncMock(return_value=[
+                {"score": 70, "feedback": "大致正確", "improvement_suggestions": ["補充 FIFO"]},
+            ])
+            graded = await self.service.grade_submission(QUESTIONS, answers)
+
+        items = mock_llm.grade_short_answers_batch.call_args.args[0]
+        assert [item["user_answer"] for item in items] == ["用於排程"]
+        assert [r["question_id"] for r in graded["results"]] == ["q1", "q2", "q3"]
+        assert graded["results"][2]["is_correct"] is True
+        assert graded["score"] == 90
+        assert graded["correct_count"] == 3
+
+    @pytest.mark.asyncio
+    async def test_on_result_called_per_short_answer(self):
+        """測試每題簡答題批改完成時呼叫回呼"""
+        answers = [{"question_id": "q3", "user_answer": "用於排程"}]
+        received = []
+
+        async def on_result(index, result):
+            received.append((index, result["score"]))
+
+        with patch("app.services.grading_service.llm_service") as mock_llm:
+            mock_llm.grade_short_answers_batch = AsyncMock(return_value=[
+                {"score": 40, "feedback": "不完整"},
+            ])
+            await self.service.grade_submission(QUESTIONS, answers, on_result=on_result)
+
+        assert received == [(2, 40)]
+
+    @pytest.mark.asyncio
+    async def test_failed_short_answer_raises(self):
+        """測試 LLM 未能批改的簡答題不以 0 分計入成績"""
+        answers = [{"question_id": "q3", "user_answer": "用於排程"}]
+
+        with patch("app.services.grading_service.llm_service") as mock_llm:
+            mock_llm.grade_short_answers_batch = AsyncMock(return_value=[
+                {"score": None, "feedback": "", "error": "LLM 服務無回應"},
+            ])
+            with pytest.raises(GradingError):
+                await self.service.grade_submission(QUESTIONS, answers)
+
+    def test_build_review(self):
+        """測試依答錯題目建議複習內容"""
+        results = [
+            {"question_id": "q1", "is_correct": False, "score": 0},
+            {"question_id": "q2", "is_correct": False, "score": 0},
+            {"question_id": "q3", "is_correct": True, "score": 80},
+        ]
+
+        review = self.service.build_review(QUESTIONS, results)
+
+        assert review["slide_pages"] == [5]
+        assert review["video_timestamps"] == ["00:12:30"]
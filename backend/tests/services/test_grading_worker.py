@@ -0,0 +1,186 @@
+"""測試作答背景批改服務"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.models.quiz import SubmissionStatus
+from app.services.grading_service import GradingError
+from app.services.grading_worker import GradingWorkerService, process_submission
+
+
+def _session_factory(*session_results):
+    """建立假 Session 工廠，第 n 個 Session 依序回傳 session_results[n] 的查詢結果"""
+    sessions = []
+
+    def factory():
+        results = session_results[len(sessions)] if len(sessions) < len(session_results) else []
+        session = MagicMock()
+        session.execute = AsyncMock(side_effect=list(results))
+        session.commit = AsyncMock()
+        session.rollback = AsyncMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        sessions.append(session)
+        return session
+
+    return factory, sessions
+
+
+def _scalar(value):
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = value
+    return result
+
+
+class TestProcessSubmission:
+    """測試 process_submission"""
+
+    @pytest.mark.asyncio
+    async def test_writes_results_and_user_stats(self):
+        """測試批改完成後寫回結果並更新使用者統計"""
+        submission = MagicMock(
+            status=SubmissionStatus.GRADING.value,
+            quiz_id="quiz_1",
+            user_id="user_1",
+            answers_json=[{"question_id": "q1", "user_answer": "答案"}],
+        )
+        factory, sessions = _session_factory(
+            [_scalar(submission), _scalar([{"question_id": "q1"}])],
+            [MagicMock(rowcount=1)],
+        )
+        graded = {"results": [{"question_id": "q1", "is_correct": True, "score": 90}], "score": 90, "correct_count": 1}
+
+        with patch("app.services.grading_worker.AsyncSessionLocal", factory), \
+                patch("app.services.grading_worker.grading_service") as mock_grading:
+            mock_grading.grade_submission = AsyncMock(return_value=graded)
+            mock_grading.build_review.return_value = {"weak_concepts": []}
+            mock_grading.record_user_stats = AsyncMock()
+
+            status = await process_submission("sub_1")
+
+        assert status == SubmissionStatus.COMPLETED.value
+        mock_grading.record_user_stats.assert_awaited_once_with(sessions[1], "user_1", 90, [])
+        sessions[1].commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_skips_completed_submission(self):
+        """測試已完成的作答不重複批改"""
+        submission = MagicMock(status=SubmissionStatus.COMPLETED.value)
+        factory, _ = _session_factory([_scalar(submission)])
+
+        with patch("app.services.grading_worker.AsyncSessionLocal", factory), \
+                patch("app.services.grading_worker.grading_service") as mock_grading:
+            mock_grading.grade_submission = AsyncMock()
+            assert await process_submission("sub_1") is None
+
+        mock_grading.grade_submission.assert_not_called()
+
+
+    @pytest.mark.asyncio
+    async def test_skips_stats_when_already_written(self):
+        """測試作答已由其他 worker 寫回時不重複更新使用者統計"""
+        submission = MagicMock(
+            status=SubmissionStatus.GRADING.value,
+            quiz_id="quiz_1",
+            user_id="user_1",
+            answers_json=[],
+        )
+        factory, sessions = _session_factory(
+            [_scalar(submission), _scalar([])],
+            [MagicMock(rowcount=0)],
+        )
+        graded = {"results": [], "score": 0, "correct_count": 0}
+
+        with patch("app.services.grading_worker.AsyncSessionLocal", factory), \
+                patch("app.services.grading_worker.grading_service") as mock_grading, \
+                patch("app.services.grading_worker.notification_hub") as mock_hub:
+            mock_grading.grade_submission = AsyncMock(return_value=graded)
+            mock_grading.build_review.return_value = {"weak_concepts": []}
+            mock_grading.record_user_stats = AsyncMock()
+            mock_hub.publish = AsyncMock()
+
+            assert await process_submission("sub_1") is None
+
+        mock_grading.record_user_stats.assert_not_called()
+        mock_hub.publish.assert_not_called()
+        sessions[1].commit.assert_not_called()
+
+
+    @pytest.mark.asyncio
+    async def test_failed_grades_mark_submission_failed(self):
+        """測試簡答題批改失敗時標記為 failed，不寫入成績與使用者統計"""
+        submission = MagicMock(
+            status=SubmissionStatus.GRADING.value,
+            quiz_id="quiz_1",
+            user_id="user_1",
+            answers_json=[],
+        )
+        factory, sessions = _session_factory(
+            [_scalar(submission), _scalar([])],
+            [MagicMock(rowcount=1)],
+        )
+
+        with patch("app.services.grading_worker.AsyncSessionLocal", factory), \
+                patch("app.services.grading_worker.grading_service") as mock_grading, \
+                patch("app.services.grading_worker.notification_hub") as mock_hub:
+            mock_grading.grade_submission = AsyncMock(side_effect=GradingError("1/1 題簡答題批改失敗"))
+            mock_grading.record_user_stats = AsyncMock()
+            mock_hub.publish = AsyncMock()
+
+            assert await process_submission("sub_1") == SubmissionStatus.FAILED.value
+
+        mock_grading.record_user_stats.assert_not_called()
+        params = sessions[1].execute.await_args.args[0].compile().params
+        assert params["status"] == SubmissionStatus.FAILED.value
+        assert mock_hub.publish.await_args.args[1]["type"] == "failed"
+
+
+class TestGradingWorkerService:
+    """測試 GradingWorkerService"""
+
+    @pytest.mark.asyncio
+    async def test_workers_process_queue(self):
+        """測試 worker 處理排入的作答並記錄統計"""
+        service = GradingWorkerService(workers=2)
+        statuses = {"sub_1": SubmissionStatus.COMPLETED.value, "sub_2": SubmissionStatus.FAILED.value}
+
+        async def fake_process(submission_id):
+            return statuses[submission_id]
+
+        with patch("app.services.grading_worker.process_submission", side_effect=fake_process) as mock_process:
+            service.enqueue("sub_1")
+            service.enqueue("sub_2")
+            await asyncio.wait_for(service._queue.join(), timeout=1)
+            await service.stop()
+
+        assert mock_process.call_count == 2
+        assert service.stats()["completed"] == 1
+        assert service.stats()["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_celery_backend_sends_task(self):
+        """測試 Celery 模式時送出 Celery 工作而不啟動行程內 worker"""
+        service = GradingWorkerService(backend="celery")
+        task = MagicMock()
+
+        with patch.dict("sys.modules", {"app.celery_worker": MagicMock(grade_submission_task=task)}):
+            service.enqueue("sub_1")
+
+        task.delay.assert_called_once_with("sub_1")
+        assert service.stats()["workers"] == 0
+
+    @pytest.mark.asyncio
+    async def test_recover_enqueues_only_claimed_submissions(self):
+        """測試復原時只排入本行程認領成功（租約已過期）的作答"""
+        service = GradingWorkerService()
+        selected = MagicMock()
+        selected.scalars.return_value.all.return_value = ["sub_1", "sub_2"]
+        factory, sessions = _session_factory(
+            [selected, MagicMock(rowcount=1), MagicMock(rowcount=0)],
+        )
+
+        with patch("app.services.grading_worker.AsyncSessionLocal", factory), \
+                patch.object(service, "enqueue") as mock_enqueue:
+            await service.recover()
+
+        mock_enqueue.assert_called_once_with("sub_1")
+        assert sessions[0].commit.await_count == 2
@@ -0,0 +1,87 @@
+"""測試老師提示背景分析"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services.hint_analysis import HintAnalysisService, HintJob
+
+
+def _session_factory():
+    """建立假 Session 工廠"""
+    sessions = []
+
+    def factory():
+        session = MagicMock()
+        session.execute = AsyncMock()
+        session.commit = AsyncMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        sessions.append(session)
+        return session
+
+    return factory, sessions
+
+
+ANALYSIS = {"concept": "二元樹", "slide_page": 5, "confidence": 0.9}
+
+
+class TestHintAnalysisService:
+    """測試 HintAnalysisService"""
+
+    @pytest.mark.asyncio
+    async def test_enqueue_updates_hint_and_notifies(self):
+        """測試背景分析後更新提示並送出補充通知"""
+        service = HintAnalysisService(queue_size=5)
+        factory, sessions = _session_factory()
+        on_enriched = AsyncMock()
+
+        with patch("app.services.hint_analysis.AsyncSessionLocal", factory), \
+                patch("app.services.hint_analysis.hint_service") as mock_hint:
+            mock_hint.analyze_hint = AsyncMock(return_value=ANALYSIS)
+            service.enqueue("course_1", HintJob(1, "這個很重要", "0:01:00", "前文", on_enriched))
+            await asyncio.gather(*service._workers.values())
+
+        mock_hint.analyze_hint.assert_awaited_once_with("這個很重要", "0:01:00", "前文")
+        sessions[0].commit.assert_awaited_once()
+        on_enriched.assert_awaited_once_with({"hint_id": 1, **ANALYSIS})
+        assert service.stats() == {"courses": 0, "pending": 0, "completed": 1, "failed": 0, "dropped": 0}
+
+    @pytest.mark.asyncio
+    async def test_drops_oldest_when_full(self):
+        """測試佇列已滿時捨棄最舊的提示"""
+        service = HintAnalysisService(queue_size=2)
+        factory, _ = _session_factory()
+        release = asyncio.Event()
+        analyzed = []
+
+        async def analyze(text, timestamp, context):
+            analyzed.append(text)
+            await release.wait()
+            return ANALYSIS
+
+        with patch("app.services.hint_analysis.AsyncSessionLocal", factory), \
+                patch("app.services.hint_analysis.hint_service") as mock_hint:
+            mock_hint.analyze_hint = analyze
+            service.enqueue("course_1", HintJob(1, "a", "0:00:01"))
+            await asyncio.sleep(0)
+            for hint_id, text in ((2, "b"), (3, "c"), (4, "d")):
+                service.enqueue("course_1", HintJob(hint_id, text, "0:00:02"))
+            release.set()
+            await asyncio.gather(*service._workers.values())
+
+        assert analyzed == ["a", "c", "d"]
+        assert service.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_notify_failure_is_ignored(self):
+        """測試連線關閉導致通知失敗時不影響分析結果"""
+        service = HintAnalysisService()
+        factory, sessions = _session_factory()
+
+        with patch("app.services.hint_analysis.AsyncSessionLocal", factory), \
+                patch("app.services.hint_analysis.hint_service") as mock_hint:
+            mock_hint.analyze_hint = AsyncMock(return_value=ANALYSIS)
+            job = HintJob(1, "必考", "0:00:01", on_enriched=AsyncMock(side_effect=RuntimeError("closed")))
+            result = await service.process(job)
+
+        assert result["concept"] == "二元樹"
+        sessions[0].commit.assert_awaited_once()
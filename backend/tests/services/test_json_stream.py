@@ -0,0 +1,44 @@
+"""測試增量 JSON 陣列解析"""
+import json
+from app.core.json_stream import JSONArrayStreamParser
+
+
+class TestJSONArrayStreamParser:
+    """測試 JSONArrayStreamParser"""
+
+    def test_yields_items_as_they_close(self):
+        """測試每個物件結束時立即回傳"""
+        parser = JSONArrayStreamParser()
+
+        assert parser.feed('```json\n[{"id": "q1", "text": "第一') == []
+        assert parser.feed('題"}, {"id": "q2",') == [{"id": "q1", "text": "第一題"}]
+        assert parser.feed(' "text": "第二題"}]\n```') == [{"id": "q2", "text": "第二題"}]
+        assert parser.finished
+
+    def test_any_chunk_boundaries(self):
+        """測試任意切分位置都能得到相同結果"""
+        items = [
+            {"q": "含有 } 與 ] 的 \"字串\"", "options": ["A", "B"]},
+            {"q": "巢狀", "meta": {"a": [1, {"b": 2}]}},
+        ]
+        text = "說明文字\n" + json.dumps(items, ensure_ascii=False)
+
+        for size in (1, 3, 7, len(text)):
+            parser = JSONArrayStreamParser()
+            result = []
+            for i in range(0, len(text), size):
+                result.extend(parser.feed(text[i:i + size]))
+            assert result == items
+
+    def test_skips_brackets_in_preamble(self):
+        """測試略過陣列前說明文字中的方括號"""
+        parser = JSONArrayStreamParser()
+
+        assert parser.feed('以下是[題目]：\n[{"id": 1}]') == [{"id": 1}]
+
+    def test_ignores_input_after_array(self):
+        """測試陣列結束後的內容不再解析"""
+        parser = JSONArrayStreamParser()
+
+        assert parser.feed('[{"id": 1}] [{"id": 2}]') == [{"id": 1}]
+        assert parser.feed('{"id": 3}') == []
@@ -0,0 +1,60 @@
+"""測試 LLM 回應快取"""
+import pytest
+from unittest.mock import patch
+from app.services.llm_cache import CompletionCache
+
+
+class TestCompletionCache:
+    """測試 CompletionCache"""
+
+    def test_make_key_depends_on_all_parameters(self):
+        """測試快取鍵包含 model、prompt、temperature、max_tokens"""
+        base = CompletionCache.make_key("gpt-4", "提示", 0.5, 100)
+
+        assert base == CompletionCache.make_key("gpt-4", "提示", 0.5, 100)
+        assert base != CompletionCache.make_key("gpt-3.5", "提示", 0.5, 100)
+        assert base != CompletionCache.make_key("gpt-4", "其他提示", 0.5, 100)
+        assert base != CompletionCache.make_key("gpt-4", "提示", 0.7, 100)
+        assert base != CompletionCache.make_key("gpt-4", "提示", 0.5, 200)
+
+    @pytest.mark.asyncio
+    async def test_hit_and_miss_counters(self):
+        """測試命中與未命中統計"""
+        cache = CompletionCache()
+
+        assert await cache.get("k") is None
+        await cache.set("k", "回應")
+        assert await cache.get("k") == "回應"
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """測試超過上限時淘汰最久未使用的項目"""
+        cache = CompletionCache(max_entries=2)
+
+        await cache.set("a", "A")
+        await cache.set("b", "B")
+        await cache.get("a")  # a 變成最近使用
+        await cache.set("c", "C")
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == "A"
+        assert await cache.get("c") == "C"
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        """測試過期的項目不會被回傳"""
+        cache = CompletionCache(ttl=10)
+
+        with patch("app.services.llm_cache.time.monotonic", return_value=1000.0):
+            await cache.set("k", "回應")
+
+        with patch("app.services.llm_cache.time.monotonic", return_value=1005.0):
+            assert await cache.get("k") == "回應"
+
+        with patch("app.services.llm_cache.time.monotonic", return_value=1011.0):
+            assert await cache.get("k") is None
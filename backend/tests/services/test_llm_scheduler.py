@@ -0,0 +1,106 @@
+"""測試 LLM 請求排程器"""
+import asyncio
+import pytest
+from app.services.llm_scheduler import LLMPriority, LLMScheduler, estimate_tokens
+
+
+class TestLLMScheduler:
+    """測試 LLMScheduler"""
+
+    @pytest.mark.asyncio
+    async def test_limits_in_flight_requests(self):
+        """測試同時進行的請求不超過上限"""
+        scheduler = LLMScheduler(max_in_flight=2)
+        running = 0
+        peak = 0
+
+        async def call():
+            nonlocal running, peak
+            async with scheduler.slot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(call() for _ in range(6)))
+
+        assert peak == 2
+        assert scheduler.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_dispatched_first(self):
+        """測試名額釋放時優先放行高優先順序的請求"""
+        scheduler = LLMScheduler(max_in_flight=1)
+        order = []
+        release = asyncio.Event()
+
+        async def blocker():
+            async with scheduler.slot(LLMPriority.QUIZ):
+                await release.wait()
+
+        async def call(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+
+        first = asyncio.create_task(blocker())
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(call("quiz", LLMPriority.QUIZ)),
+            asyncio.create_task(call("analysis", LLMPriority.ANALYSIS)),
+            asyncio.create_task(call("realtime", LLMPriority.REALTIME)),
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, *waiters)
+
+        assert order == ["realtime", "analysis", "quiz"]
+        stats = scheduler.stats()["priorities"]
+        assert stats["realtime"]["dispatched"] == 1
+        assert stats["quiz"]["dispatched"] == 2
+
+    @pytest.mark.asyncio
+    async def test_token_budget_delays_requests(self):
+        """測試 token 預算用完時請求等待補充"""
+        # 每分鐘 600 token = 每秒補充 10 token
+        scheduler = LLMScheduler(max_in_flight=4, tokens_per_minute=600)
+
+        async with scheduler.slot(tokens=600):
+            pass
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        async with scheduler.slot(tokens=2):
+            pass
+
+        assert loop.time() - started >= 0.15
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_releases_queue(self):
+        """測試排隊中的請求取消後不佔用名額"""
+        scheduler = LLMScheduler(max_in_flight=1)
+        release = asyncio.Event()
+
+        async def blocker():
+            async with scheduler.slot():
+                await release.wait()
+
+        async def call():
+            async with scheduler.slot():
+                return "完成"
+
+        first = asyncio.create_task(blocker())
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(call())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        await first
+
+        assert await call() == "完成"
+        assert scheduler.in_flight == 0
+        assert scheduler.stats()["priorities"]["analysis"]["queued"] == 0
+
+    def test_estimate_tokens(self):
+        """測試 token 粗估"""
+        assert estimate_tokens("一" * 100, 200) == 250
@@ -1,7 +1,10 @@
 """測試 LLM 服務"""
+import asyncio
+import json
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
-from app.services.llm_service import LLMService, LLMServiceError
+from app.services.llm_scheduler import LLMPriority
+from app.services.llm_service import CompletionResult, LLMService, LLMServiceError
 
 
 class TestLLMService:
@@ -196,3 +199,226 @@ class TestLLMService:
 
             call_kwargs = mock_client.chat.completions.create.call_args.kwargs
             assert call_kwargs["max_tokens"] == 100
+
+    @pytest.mark.asyncio
+    async def test_generate_completion_uses_cache(self):
+        """測試相同提示只呼叫一次 LLM"""
+        mock_client = Mock()
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="快取回應"))]
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+        service = LLMService()
+        service.client = mock_client
+
+        first = await service.generate_completion("重複提示", temperature=0.5)
+        second = await service.generate_completion("重複提示", temperature=0.5)
+
+        assert first == second == "快取回應"
+        mock_client.chat.completions.create.assert_called_once()
+        assert service.cache.stats()["hits"] == 1
+
+        # 指定不使用快取時一定會呼叫 LLM
+        await service.generate_completion("重複提示", temperature=0.5, use_cache=False)
+        assert mock_client.chat.completions.create.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_generate_completion_caches_only_validated_response(self):
+        """測試未通過檢查的回應不寫入快取"""
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=[
+            Mock(choices=[Mock(message=Mock(content="不是 JSON"))]),
+            Mock(choices=[Mock(message=Mock(content='{"concepts": []}'))]),
+        ])
+
+        service = LLMService()
+        service.client = mock_client
+
+        def validate(response):
+            return json.loads(response)
+
+        with pytest.raises(json.JSONDecodeError):
+            await service.generate_completion("檢查提示", validate=validate)
+
+        assert await service.generate_completion("檢查提示", validate=validate) == '{"concepts": []}'
+        assert await service.generate_completion("檢查提示", validate=validate) == '{"concepts": []}'
+        assert mock_client.chat.completions.create.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_grading_bypasses_cache(self):
+        """測試批改結果不使用快取"""
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(return_value=Mock(
+            choices=[Mock(message=Mock(content='{"score": 80, "feedback": "不錯"}'))]
+        ))
+
+        service = LLMService()
+        service.client = mock_client
+
+        for _ in range(2):
+            await service.grade_short_answer("題目", "答案", "學生答案", [])
+
+        assert mock_client.chat.completions.create.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_generate_completion_coalesces_concurrent_requests(self):
+        """測試同時進行的相同請求只呼叫一次 LLM"""
+        release = asyncio.Event()
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="合併回應"))]
+
+        async def slow_create(**kwargs):
+            await release.wait()
+            return mock_response
+
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=slow_create)
+
+        service = LLMService()
+        service.client = mock_client
+
+        tasks = [
+            asyncio.create_task(service.generate_completion("並行提示", use_cache=False))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*tasks) == ["合併回應"] * 5
+        mock_client.chat.completions.create.assert_called_once()
+        assert service.inflight.stats()["coalesced"] == 4
+
+    @pytest.mark.asyncio
+    async def test_coalesce_only_matching_settings(self):
+        """測試優先順序或快取設定不同的相同提示不會合併"""
+        release = asyncio.Event()
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="回應"))]
+
+        async def slow_create(**kwargs):
+            await release.wait()
+            return mock_response
+
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=slow_create)
+
+        service = LLMService()
+        service.client = mock_client
+
+        tasks = [
+            asyncio.create_task(service.generate_completion("提示", priority=LLMPriority.REALTIME)),
+            asyncio.create_task(service.generate_completion("提示", priority=LLMPriority.QUIZ)),
+            asyncio.create_task(service.generate_completion("提示", priority=LLMPriority.QUIZ, use_cache=False)),
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert mock_client.chat.completions.create.call_count == 3
+        assert service.inflight.stats()["coalesced"] == 0
+
+    @pytest.mark.asyncio
+    async def test_generate_questions_unwraps_object(self):
+        """測試題目陣列被包在物件中時仍能取出，其他格式視為失敗"""
+        with patch.object(self.service, "generate_completion", new_callable=AsyncMock) as mock_gen:
+            mock_gen.return_value = '{"questions": [{"question_text": "題目"}, "雜訊"]}'
+            assert await self.service.generate_questions("內容", {"multiple_choice": 1}) == [{"question_text": "題目"}]
+
+            mock_gen.return_value = '{"question_text": "題目"}'
+            with pytest.raises(LLMServiceError):
+                await self.service.generate_questions("內容", {"multiple_choice": 1})
+
+    @pytest.mark.asyncio
+    async def test_stream_questions_yields_each_question(self):
+        """測試串流生成題目時每完成一題立即回傳"""
+        chunks = ['[{"question_id": "q1", "question_text": "第', '一題"},', ' {"question_id": "q2"', ', "question_text": "第二題"}]']
+
+        async def fake_stream():
+            for text in chunks:
+                yield Mock(choices=[Mock(delta=Mock(content=text))])
+
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(return_value=fake_stream())
+
+        service = LLMService()
+        service.client = mock_client
+
+        received = []
+        async for question in service.stream_questions("內容", {"multiple_choice": 2}):
+            received.append(question["question_id"])
+
+        assert received == ["q1", "q2"]
+        assert mock_client.chat.completions.create.call_args.kwargs["stream"] is True
+
+    @pytest.mark.asyncio
+    async def test_stream_questions_releases_slot_when_closed(self):
+        """測試提前關閉題目串流時立即釋放排程名額"""
+        async def fake_stream():
+            yield Mock(choices=[Mock(delta=Mock(content='[{"question_id": "q1"},'))])
+            await asyncio.Event().wait()  # 模擬 LLM 仍在生成
+
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(return_value=fake_stream())
+
+        service = LLMService()
+        service.client = mock_client
+
+        stream = service.stream_questions("內容", {"multiple_choice": 2})
+        assert (await stream.__anext__())["question_id"] == "q1"
+        assert service.scheduler.stats()["in_flight"] == 1
+
+        await stream.aclose()
+        assert service.scheduler.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_grade_short_answers_batch_single_call(self):
+        """測試多題簡答題以一次 LLM 呼叫批改並回報用量"""
+        items = [
+            {"item_id": f"sub_1:q{i}", "question_text": f"題目{i}", "model_answer": "答案",
+             "user_answer": "作答", "evaluation_criteria": ["正確"]}
+            for i in range(1, 4)
+        ]
+        batch = CompletionResult(
+            '[{"index": 1, "score": 80, "feedback": "好"},'
+            ' {"index": 2, "score": 60, "feedback": "尚可"},'
+            ' {"index": 3, "score": 100, "feedback": "完美"}]',
+            prompt_tokens=300,
+            completion_tokens=90,
+            latency=1.5,
+        )
+
+        with patch.object(self.service, 'generate_completion_result', AsyncMock(return_value=batch)) as mock_gen:
+            results = await self.service.grade_short_answers_batch(items)
+
+        mock_gen.assert_called_once()
+        assert [r["score"] for r in results] == [80, 60, 100]
+        assert [r["item_id"] for r in results] == ["sub_1:q1", "sub_1:q2", "sub_1:q3"]
+        assert results[0]["meta"] == {
+            "batched": True,
+            "batch_size": 3,
+            "latency_ms": 500.0,
+            "batch_latency_ms": 1500.0,
+            "prompt_tokens": 100,
+            "completion_tokens": 30,
+        }
+
+    @pytest.mark.asyncio
+    async def test_grade_short_answers_batch_falls_back_per_item(self):
+        """測試批次結果未通過驗證的題目改為逐題批改"""
+        items = [
+            {"question_text": f"題目{i}", "model_answer": "答案", "user_answer": "作答"}
+            for i in range(1, 3)
+        ]
+        responses = [
+            # 第 2 題分數超出範圍
+            CompletionResult('[{"index": 1, "score": 70, "feedback": "好"}, {"index": 2, "score": 500, "feedback": "?"}]'),
+            CompletionResult('{"score": 40, "feedback": "逐題", "improvement_suggestions": []}', prompt_tokens=50),
+        ]
+
+        with patch.object(self.service, 'generate_completion_result', AsyncMock(side_effect=responses)) as mock_gen:
+            results = await self.service.grade_short_answers_batch(items)
+
+        assert mock_gen.call_count == 2
+        assert results[0]["score"] == 70 and results[0]["meta"]["batched"] is True
+        assert results[1]["score"] == 40 and results[1]["meta"]["batched"] is False
+        assert results[1]["meta"]["prompt_tokens"] == 50
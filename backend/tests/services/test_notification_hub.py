@@ -0,0 +1,57 @@
+"""測試即時通知中心"""
+import pytest
+from app.services.notification_hub import NotificationHub, Subscription, submission_channel
+
+
+class TestSubscription:
+    """測試 Subscription"""
+
+    @pytest.mark.asyncio
+    async def test_drops_oldest_when_full(self):
+        """測試佇列已滿時捨棄最舊的訊息"""
+        subscription = Subscription("c", max_size=2)
+        for i in range(3):
+            subscription.deliver({"n": i})
+
+        assert subscription.dropped == 1
+        assert await subscription.get(timeout=0.1) == {"n": 1}
+        assert await subscription.get(timeout=0.1) == {"n": 2}
+
+    @pytest.mark.asyncio
+    async def test_get_timeout_returns_none(self):
+        """測試逾時回傳 None"""
+        subscription = Subscription("c")
+        assert await subscription.get(timeout=0.01) is None
+
+
+class TestNotificationHub:
+    """測試 NotificationHub（行程內模式）"""
+
+    @pytest.mark.asyncio
+    async def test_publish_to_subscribers_of_channel(self):
+        """測試訊息只送到同頻道的訂閱者"""
+        hub = NotificationHub()
+        channel = submission_channel("s1")
+
+        async with hub.subscribe(channel) as first, hub.subscribe(channel) as second, \
+                hub.subscribe(submission_channel("s2")) as other:
+            await hub.publish(channel, {"type": "completed"})
+
+            assert await first.get(timeout=0.1) == {"type": "completed"}
+            assert await second.get(timeout=0.1) == {"type": "completed"}
+            assert await other.get(timeout=0.01) is None
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_on_exit(self):
+        """測試離開後取消訂閱並清除頻道"""
+        hub = NotificationHub()
+
+        async with hub.subscribe("c"):
+            assert hub.stats()["subscribers"] == 1
+
+        await hub.publish("c", {"type": "completed"})
+        stats = hub.stats()
+        assert stats["channels"] == 0
+        assert stats["subscribers"] == 0
+        assert stats["published"] == 1
+        assert stats["redis_enabled"] is False
@@ -0,0 +1,131 @@
+"""測試分片題目生成"""
+import asyncio
+import itertools
+import pytest
+import json
+from unittest.mock import AsyncMock, Mock, patch
+from app.services.llm_service import llm_service
+from app.services.quiz_generation import (
+    QuizGenerationService,
+    dedupe_questions,
+    normalize_question_text,
+)
+
+
+TOPICS = itertools.cycle(["堆疊", "佇列", "二元樹", "雜湊表", "圖論", "排序", "遞迴", "動態規劃", "貪婪法", "鏈結串列"])
+
+
+def _questions(count, question_type):
+    return [
+        {"question_id": "q1", "type": question_type, "question_text": f"請說明{next(TOPICS)}的定義"}
+        for _ in range(count)
+    ]
+
+
+class TestDedupe:
+    """測試題目去重"""
+
+    def test_normalize_question_text(self):
+        """測試全半形與標點正規化"""
+        assert normalize_question_text("ＡＢＣ， 是 什麼？") == normalize_question_text("abc是什麼?")
+
+    def test_near_duplicates_removed(self):
+        """測試幾乎相同的題目只保留第一題"""
+        questions = [
+            {"question_text": "二元樹的每個節點最多有幾個子節點？"},
+            {"question_text": "二元樹的每個節點最多有幾個子節點?"},
+            {"question_text": "二元樹每個節點最多有幾個子節點？"},
+            {"question_text": "什麼是堆疊？"},
+        ]
+
+        result = dedupe_questions(questions, threshold=0.85)
+
+        assert [q["question_text"] for q in result] == [
+            "二元樹的每個節點最多有幾個子節點？",
+            "什麼是堆疊？",
+        ]
+
+
+class TestQuizGenerationService:
+    """測試 QuizGenerationService"""
+
+    def test_plan_shards(self):
+        """測試依題型與題數上限切分分片並輪流分配段落"""
+        service = QuizGenerationService(max_questions_per_shard=5)
+
+        shards = service.plan_shards({"multiple_choice": 12, "short_answer": 3, "fill_in_blank": 0}, section_count=2)
+
+        assert [(s.question_type, s.count, s.section_index) for s in shards] == [
+            ("multiple_choice", 4, 0),
+            ("multiple_choice", 4, 1),
+            ("multiple_choice", 4, 0),
+            ("short_answer", 3, 1),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_shards_run_concurrently(self):
+        """測試分片並行執行並依規劃順序重新編號"""
+        service = QuizGenerationService(max_questions_per_shard=2)
+        running = 0
+        peak = 0
+
+        async def generate(content, question_types, difficulty, exclude=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            (question_type, count), = question_types.items()
+            return _questions(count, question_type)
+
+        with patch("app.services.quiz_generation.llm_service") as mock_llm:
+            mock_llm.generate_questions = AsyncMock(side_effect=generate)
+            questions = await service.generate("內容", {"multiple_choice": 4, "short_answer": 2})
+
+        assert peak == 3
+        assert [q["question_id"] for q in questions] == ["q1", "q2", "q3", "q4", "q5", "q6"]
+        assert [q["type"] for q in questions] == ["multiple_choice"] * 4 + ["short_answer"] * 2
+
+    @pytest.mark.asyncio
+    async def test_failed_shard_skipped(self):
+        """測試單一分片失敗時保留其他分片的題目"""
+        service = QuizGenerationService(max_questions_per_shard=1)
+
+        async def generate(content, question_types, difficulty, exclude=None):
+            if "short_answer" in question_types:
+                raise Exception("解析失敗")
+            return _questions(1, "multiple_choice")
+
+        with patch("app.services.quiz_generation.llm_service") as mock_llm:
+            mock_llm.generate_questions = AsyncMock(side_effect=generate)
+            questions = await service.generate("內容", {"multiple_choice": 1, "short_answer": 1})
+
+        assert len(questions) == 1
+        assert questions[0]["type"] == "multiple_choice"
+
+    @pytest.mark.asyncio
+    async def test_duplicate_shards_topped_up(self):
+        """測試相同提示的分片不被合併，去重後不足的題數會補生成"""
+        service = QuizGenerationService(max_questions_per_shard=5)
+        batches = [
+            [f"請說明{topic}的定義" for topic in ["堆疊", "佇列", "二元樹", "雜湊表", "圖論"]],
+            [f"請說明{topic}的定義" for topic in ["堆疊", "佇列", "二元樹", "雜湊表", "圖論"]],
+            [f"請比較{topic}的優缺點" for topic in ["排序", "遞迴", "動態規劃", "貪婪法", "鏈結串列"]],
+        ]
+
+        def response(texts):
+            questions = [{"type": "multiple_choice", "question_text": text} for text in texts]
+            return Mock(choices=[Mock(message=Mock(content=json.dumps(questions, ensure_ascii=False)))])
+
+        mock_client = Mock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=[response(texts) for texts in batches])
+
+        with patch.object(llm_service, "client", mock_client):
+            questions = await service.generate("同一段內容", {"multiple_choice": 10})
+
+        assert len(questions) == 10
+        assert [q["question_id"] for q in questions] == [f"q{i}" for i in range(1, 11)]
+        assert mock_client.chat.completions.create.call_count == 3
+        # 補生成的提示列出已生成的題目
+        topup_prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert "請說明堆疊的定義" in topup_prompt
@@ -0,0 +1,89 @@
+"""測試 Single-flight 請求合併"""
+import asyncio
+import pytest
+from app.core.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """測試 SingleFlight"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """測試相同鍵的並行呼叫只執行一次"""
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "結果"
+
+        waiters = [asyncio.create_task(flight.do("k", work)) for _ in range(10)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*waiters) == ["結果"] * 10
+        assert calls == 1
+        assert flight.stats() == {"in_flight": 0, "executed": 1, "coalesced": 9}
+
+    @pytest.mark.asyncio
+    async def test_error_propagates_to_all_waiters(self):
+        """測試例外會傳給所有等待者"""
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            raise ValueError("上游錯誤")
+
+        waiters = [asyncio.create_task(flight.do("k", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        """測試單一等待者取消不影響其他等待者"""
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return 42
+
+        first = asyncio.create_task(flight.do("k", work))
+        second = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == 42
+        assert first.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_work_cancelled_when_all_waiters_leave(self):
+        """測試所有等待者都取消時取消工作，之後的呼叫重新執行"""
+        flight = SingleFlight()
+        started = []
+
+        async def work():
+            started.append(1)
+            await asyncio.sleep(10)
+
+        waiter = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+
+        assert flight.in_flight == 0
+
+        async def quick():
+            return "new"
+
+        assert await flight.do("k", quick) == "new"
@@ -0,0 +1,55 @@
+"""測試講義擷取結果快取"""
+import os
+import time
+import pytest
+from app.services.slide_cache import SlideCache, compute_digest
+
+
+class TestSlideCache:
+    """測試 SlideCache"""
+
+    @pytest.mark.asyncio
+    async def test_get_put_roundtrip(self, tmp_path):
+        """測試寫入後可以讀回快取結果"""
+        cache = SlideCache(str(tmp_path))
+        digest = compute_digest(b"slide content")
+
+        assert await cache.get(digest, ".pdf") is None
+
+        await cache.put(digest, ".pdf", {"total_pages": 3, "extracted_text": "內容"})
+        result = await cache.get(digest, ".pdf")
+
+        assert result == {"total_pages": 3, "extracted_text": "內容"}
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_same_content_different_extension(self, tmp_path):
+        """測試相同內容但不同副檔名不共用快取"""
+        cache = SlideCache(str(tmp_path))
+        digest = compute_digest(b"same bytes")
+
+        await cache.put(digest, ".pdf", {"file_type": "pdf"})
+
+        assert await cache.get(digest, ".docx") is None
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self, tmp_path):
+        """測試超過容量上限時淘汰最久未使用的項目"""
+        cache = SlideCache(str(tmp_path), max_bytes=250)
+        payload = {"extracted_text": "x" * 80}
+
+        await cache.put("a", ".pdf", payload)
+        await cache.put("b", ".pdf", payload)
+
+        # 讓 a 成為最近使用的項目
+        past = time.time() - 60
+        os.utime(cache._entry_path("b", ".pdf"), (past, past))
+        await cache.get("a", ".pdf")
+
+        await cache.put("c", ".pdf", payload)
+
+        assert await cache.get("b", ".pdf") is None
+        assert await cache.get("a", ".pdf") is not None
+        assert await cache.get("c", ".pdf") is not None
+        assert cache.stats()["evictions"] == 1
@@ -0,0 +1,141 @@
+"""測試講義背景擷取服務"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.models.slide import SlideStatus
+from app.services.slide_ingestion import SlideIngestionJob, SlideIngestionService
+from app.services.slide_service import SlideProcessingError, SlideQueueFullError
+
+
+class TestSlideIngestionService:
+    """測試 SlideIngestionService"""
+
+    @pytest.mark.asyncio
+    async def test_job_updates_slide_when_processed(self):
+        """測試背景擷取完成後寫回講義內容"""
+        service = SlideIngestionService(workers=1)
+
+        async def fake_process_path(path, filename, content_hash, progress_callback=None):
+            progress_callback(1, 2)
+            assert service.get_progress("file_1")["processed_pages"] == 1
+            progress_callback(2, 2)
+            return {"total_pages": 2, "extracted_text": "講義內容"}
+
+        with patch("app.services.slide_ingestion.slide_service.process_path", side_effect=fake_process_path), \
+                patch.object(service, "_update_slide", new_callable=AsyncMock) as mock_update:
+            service.enqueue("file_1", "/tmp/a.pdf", "a.pdf", "hash")
+            await asyncio.wait_for(service._queue.join(), timeout=1)
+            await service.stop()
+
+        mock_update.assert_awaited_once_with(
+            "file_1",
+            pages=[],
+            status=SlideStatus.PROCESSED.value,
+            total_pages=2,
+            processed_pages=2,
+            extracted_text="講義內容",
+        )
+        assert service.get_progress("file_1") is None
+
+    @pytest.mark.asyncio
+    async def test_job_marks_slide_failed(self):
+        """測試擷取失敗時標記為 failed"""
+        service = SlideIngestionService(workers=1)
+
+        with patch(
+            "app.services.slide_ingestion.slide_service.process_path",
+            side_effect=SlideProcessingError("PDF 處理失敗"),
+        ), patch.object(service, "_update_slide", new_callable=AsyncMock) as mock_update:
+            service.enqueue("file_2", "/tmp/b.pdf", "b.pdf", "hash")
+            await asyncio.wait_for(service._queue.join(), timeout=1)
+            await service.stop()
+
+        kwargs = mock_update.await_args.kwargs
+        assert kwargs["status"] == SlideStatus.FAILED.value
+        assert "PDF 處理失敗" in kwargs["error_message"]
+
+    @pytest.mark.asyncio
+    async def test_pool_full_retried_not_failed(self):
+        """測試擷取行程池滿載時重試，持續滿載則釋放認領而不標記失敗"""
+        service = SlideIngestionService(workers=1)
+        service.ADMIT_RETRY_DELAY = 0
+
+        with patch(
+            "app.services.slide_ingestion.slide_service.process_path",
+            side_effect=SlideQueueFullError("擷取佇列已滿"),
+        ) as mock_process, patch.object(service, "_update_slide", new_callable=AsyncMock) as mock_update, \
+                patch.object(service, "_release_claim", new_callable=AsyncMock) as mock_release:
+            service.enqueue("file_3", "/tmp/c.pdf", "c.pdf", "hash")
+            await asyncio.wait_for(service._queue.join(), timeout=1)
+            await service.stop()
+
+        assert mock_process.call_count == service.ADMIT_RETRIES + 1
+        mock_update.assert_not_called()
+        mock_release.assert_awaited_once_with("file_3")
+
+    @pytest.mark.asyncio
+    async def test_enqueue_rejects_when_queue_full(self):
+        """測試佇列已滿時拒絕新工作"""
+        service = SlideIngestionService(workers=1, queue_size=1)
+        blocker = asyncio.Event()
+
+        async def blocked_process(job):
+            await blocker.wait()
+
+        with patch.object(service, "_process", side_effect=blocked_process):
+            service.enqueue("file_1", "/tmp/a.pdf", "a.pdf", "hash")
+            await asyncio.sleep(0)  # 讓 worker 取出第一個工作
+            service.enqueue("file_2", "/tmp/b.pdf", "b.pdf", "hash")
+
+            with pytest.raises(SlideQueueFullError):
+                service.enqueue("file_3", "/tmp/c.pdf", "c.pdf", "hash")
+
+            blocker.set()
+            await service.stop()
+
+    @pytest.mark.asyncio
+    async def test_recover_enqueues_only_claimed_slides(self):
+        """測試復原時只排入本行程認領成功的講義"""
+        service = SlideIngestionService(workers=1)
+        slides = [
+            MagicMock(id="file_1", file_path="/blobs/h1.pdf", filename="a.pdf"),
+            MagicMock(id="file_2", file_path="/blobs/h2.pdf", filename="b.pdf"),
+        ]
+        selected = MagicMock()
+        selected.scalars.return_value.all.return_value = slides
+        # file_2 已由其他行程認領
+        session = MagicMock()
+        session.execute = AsyncMock(side_effect=[selected, MagicMock(rowcount=1), MagicMock(rowcount=0)])
+        session.commit = AsyncMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+
+        with patch("app.services.slide_ingestion.AsyncSessionLocal", return_value=session), \
+                patch.object(service, "enqueue") as mock_enqueue:
+            await service.recover()
+
+        mock_enqueue.assert_called_once_with("file_1", "/blobs/h1.pdf", "a.pdf", "h1")
+
+    @pytest.mark.asyncio
+    async def test_lease_renewal_writes_progress(self):
+        """測試處理期間將逐頁進度寫回資料庫，其他行程的狀態端點也能讀到"""
+        service = SlideIngestionService(workers=1, progress_interval=0.1)
+        job = SlideIngestionJob("file_1", "/blobs/h1.pdf", "a.pdf", "h1")
+        job.update_progress(3, 10)
+
+        session = MagicMock()
+        session.execute = AsyncMock()
+        session.commit = AsyncMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+
+        with patch("app.services.slide_ingestion.AsyncSessionLocal", return_value=session):
+            task = asyncio.create_task(service._renew_lease(job))
+            await asyncio.sleep(0.15)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        params = session.execute.await_args.args[0].compile().params
+        assert params["processed_pages"] == 3
+        assert params["total_pages"] == 10
+        assert params["claimed_at"] is not None
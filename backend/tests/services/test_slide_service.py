@@ -1,7 +1,19 @@
 """測試講義處理服務"""
+import io
 import pytest
 from pathlib import Path
-from app.services.slide_service import SlideService, SlideProcessingError
+from unittest.mock import patch
+from app.core.config import settings
+from app.models.course import Course
+from app.models.slide import Slide
+from app.services.extraction_pool import ExtractionPool
+from app.services.slide_cache import compute_digest
+from app.services.slide_service import (
+    SlideService,
+    SlideProcessingError,
+    SlideTooLargeError,
+    build_pdf_result,
+)
 
 
 class TestSlideService:
@@ -133,3 +145,120 @@ class TestSlideService:
 
         assert cleaned == "多餘空白 文字內容"
         assert "\n\n\n" not in cleaned
+
+    def test_split_page_ranges(self):
+        """測試 PDF 頁碼範圍切分"""
+        with patch.object(settings, "SLIDE_PDF_PAGES_PER_JOB", 25):
+            service = SlideService(pool=ExtractionPool(max_workers=4))
+
+            # 頁數少時不拆分
+            assert service._split_page_ranges(10) == [(0, 10)]
+
+            # 頁數多時依工作行程數平均切分，且涵蓋所有頁碼
+            ranges = service._split_page_ranges(300)
+            assert len(ranges) == 4
+            assert ranges[0][0] == 0
+            assert ranges[-1][1] == 300
+            assert all(prev[1] == curr[0] for prev, curr in zip(ranges, ranges[1:]))
+
+    def test_build_pdf_result(self):
+        """測試逐頁結果合併"""
+        pages = [
+            {"page_number": 1, "text": "第一頁", "char_count": 3},
+            {"page_number": 2, "text": "第二頁", "char_count": 3},
+        ]
+
+        result = build_pdf_result(pages, "test.pdf")
+
+        assert result["total_pages"] == 2
+        assert result["pages"] == pages
+        assert result["extracted_text"] == "--- 第 1 頁 ---\n第一頁\n\n--- 第 2 頁 ---\n第二頁"
+
+    @pytest.mark.asyncio
+    async def test_process_file_uses_cache(self, tmp_path):
+        """測試相同內容的檔案直接使用快取結果，且共用同一份儲存檔案"""
+        service = SlideService(upload_dir=str(tmp_path))
+        content = b"same deck"
+        digest = compute_digest(content)
+
+        await service.cache.put(digest, ".pdf", {"total_pages": 2, "extracted_text": "快取內容"})
+
+        with patch.object(service, "_process_pdf") as mock_process:
+            result = await service.process_file(content, "lecture.pdf")
+            mock_process.assert_not_called()
+
+        assert result["filename"] == "lecture.pdf"
+        assert result["content_hash"] == digest
+        assert result["extracted_text"] == "快取內容"
+
+        first_path = await service.save_file(content, "section_a.pdf", digest)
+        second_path = await service.save_file(content, "section_b.pdf")
+        assert first_path == second_path
+        assert Path(first_path).read_bytes() == content
+
+    @pytest.mark.asyncio
+    async def test_stage_upload_streams_to_disk(self, tmp_path):
+        """測試串流上傳寫入暫存檔並計算雜湊"""
+        service = SlideService(upload_dir=str(tmp_path))
+        content = b"x" * (3 * 1024 + 17)
+
+        with patch.object(settings, "SLIDE_UPLOAD_CHUNK_SIZE", 1024):
+            staged = await service.stage_upload(_FakeUpload(content), "deck.pdf")
+
+        assert staged.size == len(content)
+        assert staged.content_hash == compute_digest(content)
+        assert Path(staged.path).read_bytes() == content
+
+        file_path = service.store_staged(staged)
+        assert not Path(staged.path).exists()
+        assert Path(file_path).read_bytes() == content
+
+    @pytest.mark.asyncio
+    async def test_stage_upload_rejects_oversized_early(self, tmp_path):
+        """測試串流上傳超過大小上限時立即中止並刪除暫存檔"""
+        service = SlideService(upload_dir=str(tmp_path))
+        upload = _FakeUpload(b"x" * 4096)
+
+        with patch.object(settings, "MAX_UPLOAD_SIZE", 1500), \
+                patch.object(settings, "SLIDE_UPLOAD_CHUNK_SIZE", 1024):
+            with pytest.raises(SlideTooLargeError, match="檔案大小超過限制"):
+                await service.stage_upload(upload, "deck.pdf")
+
+        # 讀到第二個區塊就中止，不會讀完整個檔案
+        assert upload.reads == 2
+        assert list(Path(service.staging_dir).iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_save_and_get_page_range(self, test_db):
+        """測試寫入逐頁內容並依頁碼範圍讀取"""
+        test_db.add(Course(id="course_1", user_id="user_1"))
+        test_db.add(Slide(id="file_1", course_id="course_1", filename="a.pdf", file_path="a.pdf"))
+        await test_db.flush()
+
+        pages = [
+            {"page_number": n, "text": f"第 {n} 頁內容", "char_count": 6}
+            for n in range(1, 21)
+        ]
+        await self.service.save_pages(test_db, "file_1", pages)
+        await test_db.commit()
+
+        result = await self.service.get_pages(test_db, "file_1", 12, 14)
+        assert [page.page_number for page in result] == [12, 13, 14]
+        assert result[0].text == "第 12 頁內容"
+
+        # 重新寫入時取代既有頁面
+        await self.service.save_pages(test_db, "file_1", pages[:5])
+        await test_db.commit()
+        assert len(await self.service.get_pages(test_db, "file_1")) == 5
+
+
+class _FakeUpload:
+    """模擬 UploadFile 的 async read(size)"""
+
+    def __init__(self, content: bytes):
+        self._stream = io.BytesIO(content)
+        self.reads = 0
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads += 1
+        return self._stream.read(size)
@@ -0,0 +1,151 @@
+"""測試語音 worker 行程池"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.services.speech_pool import SpeechWorkerPool, SpeechWorkerUnavailable
+from app.services.speech_service import RemoteSpeechRecognizer, SpeechServiceError
+from app.speech_worker import SpeechWorkerServer
+
+
+class FakeRecognizer:
+    """每個音框回傳一筆結果的假辨識器"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+
+    async def recognize_stream(self, audio_stream, language_code="zh"):
+        async for chunk in audio_stream:
+            if self.fail:
+                raise RuntimeError("模型錯誤")
+            yield {"text": f"{language_code}:{len(chunk)}", "confidence": 0.9, "is_final": True}
+
+    def stats(self):
+        return {"batches": 0}
+
+
+@pytest.fixture
+async def start_worker(tmp_path):
+    """在暫存目錄啟動語音 worker socket 服務"""
+    servers = []
+
+    async def start(name: str, recognizer=None):
+        path = str(tmp_path / f"{name}.sock")
+        worker = SpeechWorkerServer(recognizer or FakeRecognizer())
+        servers.append(await asyncio.start_unix_server(worker.handle, path=path))
+        return path, worker
+
+    yield start
+
+    for server in servers:
+        server.close()
+        await server.wait_closed()
+
+
+async def _audio(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestRemoteSpeechRecognizer:
+    """測試 RemoteSpeechRecognizer"""
+
+    @pytest.mark.asyncio
+    async def test_stream_round_trip(self, start_worker):
+        """測試音訊經由 socket 送到 worker 並取回結果"""
+        path, _ = await start_worker("w0")
+        pool = SpeechWorkerPool([path])
+        recognizer = RemoteSpeechRecognizer(pool)
+
+        results = [r async for r in recognizer.recognize_stream(_audio(b"ab", b"abcd"), "zh")]
+
+        assert [r["text"] for r in results] == ["zh:2", "zh:4"]
+        assert pool.workers[0].load == 0
+        assert pool.dispatched == 1
+
+    @pytest.mark.asyncio
+    async def test_worker_error_raises(self, start_worker):
+        """測試 worker 辨識失敗時拋出 SpeechServiceError"""
+        path, _ = await start_worker("w0", FakeRecognizer(fail=True))
+        recognizer = RemoteSpeechRecognizer(SpeechWorkerPool([path]))
+
+        with pytest.raises(SpeechServiceError, match="模型錯誤"):
+            async for _ in recognizer.recognize_stream(_audio(b"ab"), "zh"):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_no_worker_available(self, tmp_path):
+        """測試沒有可用 worker 時拋出 SpeechServiceError"""
+        recognizer = RemoteSpeechRecognizer(SpeechWorkerPool([str(tmp_path / "missing.sock")]))
+
+        with pytest.raises(SpeechServiceError):
+            async for _ in recognizer.recognize_stream(_audio(b"ab"), "zh"):
+                pass
+
+
+class TestSpeechWorkerPool:
+    """測試 SpeechWorkerPool"""
+
+    @pytest.mark.asyncio
+    async def test_dispatch_to_least_loaded(self, start_worker):
+        """測試新串流分派到負載最低的 worker"""
+        paths = [(await start_worker(f"w{i}"))[0] for i in range(3)]
+        pool = SpeechWorkerPool(paths)
+        pool.workers[0].reported_streams = 3
+        pool.workers[1].reported_streams = 1
+        pool.workers[2].reported_streams = 2
+
+        worker, _, writer = await pool.connect()
+        writer.close()
+
+        assert worker.path == paths[1]
+        assert worker.load == 2
+        pool.release(worker)
+        assert worker.load == 1
+
+    @pytest.mark.asyncio
+    async def test_failover_and_health_check(self, start_worker, tmp_path):
+        """測試無法連線的 worker 被標記為不健康並改用其他 worker，健康檢查更新負載"""
+        path, server = await start_worker("w1")
+        missing = str(tmp_path / "w0.sock")
+        pool = SpeechWorkerPool([missing, path])
+        pool.workers[1].reported_streams = 5
+
+        worker, _, writer = await pool.connect()
+        writer.close()
+        assert worker.path == path
+        assert pool.workers[0].healthy is False
+
+        server.active_streams = 2
+        await pool.check_health()
+        assert pool.workers[0].healthy is False
+        assert pool.workers[1].healthy is True
+        assert pool.workers[1].load == 2
+        assert pool.workers[1].stats["batches"] == 0
+
+    @pytest.mark.asyncio
+    async def test_all_unavailable(self, tmp_path):
+        """測試所有 worker 都無法連線"""
+        pool = SpeechWorkerPool([str(tmp_path / "a.sock"), str(tmp_path / "b.sock")])
+
+        with pytest.raises(SpeechWorkerUnavailable):
+            await pool.connect()
+        assert pool.connect_failures == 2
+
+
+class TestSpeechWorkerServer:
+    """測試 SpeechWorkerServer"""
+
+    @pytest.mark.asyncio
+    async def test_error_write_after_disconnect(self):
+        """測試辨識失敗且 API 端已斷線時不拋出例外並釋放串流計數"""
+        worker = SpeechWorkerServer(FakeRecognizer(fail=True))
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"A" + (2).to_bytes(4, "big") + b"ab")
+        reader.feed_eof()
+        writer = MagicMock()
+        writer.drain = AsyncMock(side_effect=ConnectionResetError())
+
+        await worker._stream(reader, writer, "zh")
+
+        assert worker.active_streams == 0
+        assert worker.total_streams == 1
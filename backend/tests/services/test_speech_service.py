@@ -0,0 +1,274 @@
+"""測試語音轉文字服務"""
+import asyncio
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from app.services.whisper_scheduler import WhisperBatchScheduler
+from app.services.speech_service import (
+    SAMPLE_RATE,
+    LocalAgreement,
+    VADSegmenter,
+    WhisperRecognizer,
+    pcm16_to_float32,
+)
+
+
+def _tone(seconds: float, amplitude: int = 3000) -> np.ndarray:
+    """模擬語音的正弦波"""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 220 * t) * amplitude).astype(np.int16)
+
+
+def _silence(seconds: float) -> np.ndarray:
+    """帶有微弱噪音的靜音"""
+    rng = np.random.default_rng(0)
+    return rng.normal(0, 20, int(SAMPLE_RATE * seconds)).astype(np.int16)
+
+
+def _whisper(text: str = " 你好 ", interim_results: bool = False):
+    """建立使用假模型的 WhisperRecognizer（不載入 Whisper）"""
+    recognizer = WhisperRecognizer.__new__(WhisperRecognizer)
+    recognizer.interim_results = interim_results
+    recognizer.model = MagicMock()
+    recognizer.model.transcribe.return_value = {"text": text}
+    recognizer._executor = ThreadPoolExecutor(max_workers=1)
+    recognizer.scheduler = WhisperBatchScheduler(recognizer._transcribe_batch, recognizer._executor, max_wait_ms=0)
+    return recognizer
+
+
+class TestPcm16ToFloat32:
+    """測試 pcm16_to_float32"""
+
+    def test_scales_to_unit_range(self):
+        """測試轉換為 -1.0 ~ 1.0 的 float32"""
+        pcm = np.array([0, 16384, -32768], dtype=np.int16).tobytes()
+        audio = pcm16_to_float32(pcm)
+
+        assert audio.dtype == np.float32
+        assert audio.tolist() == [0.0, 0.5, -1.0]
+
+    def test_ignores_trailing_odd_byte(self):
+        """測試奇數長度時捨棄不完整的樣本"""
+        pcm = np.array([16384], dtype=np.int16).tobytes() + b"\x01"
+        assert pcm16_to_float32(pcm).tolist() == [0.5]
+
+
+class TestVADSegmenter:
+    """測試 VADSegmenter"""
+
+    def _feed(self, segmenter, audio, frame_ms=100):
+        """以固定大小的音框寫入"""
+        step = SAMPLE_RATE * frame_ms // 1000
+        data = audio.tobytes()
+        segments = []
+        for i in range(0, len(data), step * 2):
+            segments.extend(segmenter.feed(data[i:i + step * 2]))
+        return segments
+
+    def test_emits_utterance_after_silence(self):
+        """測試靜音後輸出包含前置音訊的發言區段，並略過靜音"""
+        segmenter = VADSegmenter(silence_ms=500, pre_roll_ms=200)
+        audio = np.concatenate([_silence(3), _tone(1.5), _silence(1)])
+
+        segments = self._feed(segmenter, audio)
+
+        assert len(segments) == 1
+        duration = len(segments[0]) / SAMPLE_RATE
+        assert 1.5 <= duration <= 1.5 + 0.2 + 0.5 + 0.06
+        assert segmenter.skipped_seconds >= 2.5
+        assert segmenter.flush() is None
+
+    def test_short_noise_discarded(self):
+        """測試過短的聲響視為雜音捨棄"""
+        segmenter = VADSegmenter(min_speech_ms=300)
+        audio = np.concatenate([_silence(1), _tone(0.1), _silence(1)])
+
+        assert self._feed(segmenter, audio) == []
+        assert segmenter.speech_seconds == 0
+
+    def test_long_speech_cut_at_max_duration(self):
+        """測試連續發言超過上限時切開"""
+        segmenter = VADSegmenter(max_segment_seconds=2.0)
+        audio = np.concatenate([_tone(5), _silence(1)])
+
+        segments = self._feed(segmenter, audio)
+        tail = segmenter.flush()
+
+        assert len(segments) >= 3
+        assert all(len(s) <= 2 * SAMPLE_RATE for s in segments)
+        assert tail is None
+        assert sum(len(s) for s in segments) / SAMPLE_RATE >= 5.0
+
+    def test_flush_returns_open_utterance(self):
+        """測試串流結束時輸出未結束的發言"""
+        segmenter = VADSegmenter()
+        self._feed(segmenter, _tone(1))
+
+        segment = segmenter.flush()
+        assert segment is not None
+        assert len(segment) / SAMPLE_RATE == pytest.approx(1.0, abs=0.05)
+
+
+class TestLocalAgreement:
+    """測試 LocalAgreement"""
+
+    def test_commits_common_prefix_of_two_hypotheses(self):
+        """測試連續兩次假設的共同前綴確定輸出"""
+        agreement = LocalAgreement()
+
+        assert agreement.update("今天介紹") == ("", "今天介紹")
+        assert agreement.update("今天介紹二元樹") == ("今天介紹", "二元樹")
+        assert agreement.update("今天介紹二元數的") == ("二元", "數的")
+        assert agreement.update("今天介紹二元樹的走訪") == ("", "樹的走訪")
+        assert agreement.finish("今天介紹二元樹的走訪方式") == "樹的走訪方式"
+        assert agreement.committed == ""
+
+    def test_does_not_split_words(self):
+        """測試以空白分詞的文字不在單字中間確定"""
+        agreement = LocalAgreement()
+        agreement.update("binary tree")
+
+        committed, interim = agreement.update("binary trees are")
+        assert committed == "binary "
+        assert interim == "trees are"
+
+
+    def test_aligns_when_committed_text_rewritten(self):
+        """測試模型在已確定的文字中補上標點時仍正確對齊"""
+        agreement = LocalAgreement()
+        agreement.update("今天我們")
+        agreement.update("今天我們來")
+
+        assert agreement.finish("今天，我們來講二元樹") == "來講二元樹"
+
+
+class TestWhisperRecognizer:
+    """測試 WhisperRecognizer"""
+
+    @pytest.mark.asyncio
+    async def test_transcribes_array_without_temp_file(self):
+        """測試直接以陣列辨識"""
+        recognizer = _whisper()
+        pcm = np.zeros(16000, dtype=np.int16).tobytes()
+
+        text = await recognizer._recognize_chunk(pcm, "zh")
+        await recognizer.scheduler.stop()
+
+        assert text == "你好"
+        audio = recognizer.model.transcribe.call_args.args[0]
+        assert isinstance(audio, np.ndarray)
+        assert audio.shape == (16000,)
+        assert recognizer.model.transcribe.call_args.kwargs == {"language": "zh", "fp16": False}
+
+    @pytest.mark.asyncio
+    async def test_recognize_stream_skips_silence(self):
+        """測試依發言區段辨識，靜音不送交模型"""
+        recognizer = _whisper()
+
+        async def audio():
+            for seconds, speaking in ((2, False), (1, True), (2, False), (1, True), (3, False)):
+                yield (_tone(seconds) if speaking else _silence(seconds)).tobytes()
+
+        results = [r async for r in recognizer.recognize_stream(audio(), "zh")]
+        await recognizer.scheduler.stop()
+
+        assert len(results) == 2
+        lengths = [call.args[0].shape[0] / SAMPLE_RATE for call in recognizer.model.transcribe.call_args_list]
+        assert all(1.0 <= length < 2.0 for length in lengths)
+
+    @pytest.mark.asyncio
+    async def test_interim_results_during_utterance(self):
+        """測試發言進行中輸出暫定結果並提前確定穩定前綴"""
+        recognizer = _whisper(interim_results=True)
+        hypotheses = {1: "今天", 2: "今天介紹", 3: "今天介紹二元樹"}
+
+        def transcribe(audio, language, fp16):
+            seconds = round(len(audio) / SAMPLE_RATE)
+            return {"text": hypotheses.get(seconds, "今天介紹二元樹的走訪")}
+
+        recognizer.model.transcribe.side_effect = transcribe
+
+        async def audio():
+            tone = _tone(3.5).tobytes()
+            step = SAMPLE_RATE // 10 * 2
+            for i in range(0, len(tone), step):
+                yield tone[i:i + step]
+                await asyncio.sleep(0.01)  # 讓背景的暫定辨識完成
+            yield _silence(1).tobytes()
+
+        results = [r async for r in recognizer.recognize_stream(audio(), "zh")]
+        await recognizer.scheduler.stop()
+
+        interim = [r["text"] for r in results if not r["is_final"]]
+        finals = [r["text"] for r in results if r["is_final"]]
+        assert interim == ["今天", "介紹", "二元樹"]
+        assert finals == ["今天", "介紹", "二元樹的走訪"]
+        assert "".join(finals) == "今天介紹二元樹的走訪"
+        # 提前確定的片段不算一段發言，發言結束的結果附上整段文字
+        segment_ends = [r for r in results if r["is_final"] and r.get("segment_final", True)]
+        assert [r["segment_text"] for r in segment_ends] == ["今天介紹二元樹的走訪"]
+
+    @pytest.mark.asyncio
+    async def test_interim_skipped_while_pending(self):
+        """測試同一串流的上一次暫定辨識尚未完成時不再送出新的暫定辨識"""
+        recognizer = _whisper(interim_results=True)
+        release = asyncio.Event()
+        lengths = []
+
+        async def recognize(audio, language):
+            if len(audio) >= SAMPLE_RATE * 3:
+                return "整段發言"
+            lengths.append(len(audio))
+            await release.wait()
+            return "暫定"
+
+        async def audio():
+            tone = _tone(3.5).tobytes()
+            step = SAMPLE_RATE // 10 * 2
+            for i in range(0, len(tone), step):
+                yield tone[i:i + step]
+                await asyncio.sleep(0)
+            yield _silence(1).tobytes()
+
+        with patch.object(recognizer, "_recognize_chunk", side_effect=recognize):
+            results = [r async for r in recognizer.recognize_stream(audio(), "zh")]
+
+        assert len(lengths) == 1
+        assert [r["text"] for r in results] == ["整段發言"]
+
+    @pytest.mark.asyncio
+    async def test_interim_decodes_trailing_window(self):
+        """測試長發言的暫定辨識只送出結尾視窗且不提前確定"""
+        recognizer = _whisper(interim_results=True)
+        lengths = []
+
+        async def recognize(audio, language):
+            lengths.append(len(audio))
+            return "今天介紹二元樹"
+
+        async def audio():
+            tone = _tone(3.5).tobytes()
+            step = SAMPLE_RATE // 10 * 2
+            for i in range(0, len(tone), step):
+                yield tone[i:i + step]
+                await asyncio.sleep(0)
+            yield _silence(1).tobytes()
+
+        with patch.object(recognizer, "_recognize_chunk", side_effect=recognize), \
+                patch("app.services.speech_service.settings.WHISPER_INTERIM_WINDOW_SECONDS", 1.0):
+            results = [r async for r in recognizer.recognize_stream(audio(), "zh")]
+
+        # 最後一次為整段發言的辨識
+        assert all(length <= SAMPLE_RATE for length in lengths[:-1])
+        assert lengths[-1] > SAMPLE_RATE * 3
+        assert [r["text"] for r in results if r["is_final"]] == ["今天介紹二元樹"]
+
+    @pytest.mark.asyncio
+    async def test_model_error_returns_empty_text(self):
+        """測試辨識失敗時回傳空字串"""
+        recognizer = _whisper()
+        recognizer.model.transcribe.side_effect = RuntimeError("模型錯誤")
+
+        assert await recognizer._recognize_chunk(b"\x00\x00" * 100, "zh") == ""
+        await recognizer.scheduler.stop()
@@ -0,0 +1,84 @@
+"""測試同步串流 API 的非同步橋接"""
+import asyncio
+import threading
+import time
+import pytest
+from app.core.stream_bridge import bridge_stream
+
+
+async def _requests(items, delay=0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+class TestBridgeStream:
+    """測試 bridge_stream"""
+
+    @pytest.mark.asyncio
+    async def test_responses_follow_requests(self):
+        """測試請求送入執行緒並依序取回回應"""
+        def echo(requests):
+            for request in requests:
+                yield request * 2
+
+        results = [r async for r in bridge_stream(echo, _requests([1, 2, 3]))]
+        assert results == [2, 4, 6]
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_does_not_block_loop(self):
+        """測試同步阻塞的回應迭代不阻塞事件迴圈"""
+        def slow(requests):
+            for request in requests:
+                time.sleep(0.05)
+                yield request
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        results = [r async for r in bridge_stream(slow, _requests(["a", "b", "c"]))]
+        task.cancel()
+
+        assert results == ["a", "b", "c"]
+        assert ticks >= 10
+
+    @pytest.mark.asyncio
+    async def test_error_propagates(self):
+        """測試串流中的例外在呼叫端重新拋出"""
+        def failing(requests):
+            next(requests)
+            raise ValueError("串流中斷")
+            yield  # 讓函式成為生成器
+
+        with pytest.raises(ValueError, match="串流中斷"):
+            async for _ in bridge_stream(failing, _requests([1])):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_early_exit_ends_request_stream(self):
+        """測試呼叫端提前結束時執行緒中的請求迭代器結束"""
+        finished = threading.Event()
+
+        def echo(requests):
+            for request in requests:
+                yield request
+            finished.set()
+
+        async def endless():
+            while True:
+                await asyncio.sleep(0.001)
+                yield "chunk"
+
+        stream = bridge_stream(echo, endless())
+        async for _ in stream:
+            break
+        await stream.aclose()
+
+        assert await asyncio.to_thread(finished.wait, 1.0)
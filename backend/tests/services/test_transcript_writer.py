@@ -0,0 +1,93 @@
+"""測試轉錄批次寫入服務"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services.transcript_writer import TranscriptWriter
+
+
+def _session_factory(fail: bool = False):
+    """建立記錄批次寫入內容的假 Session 工廠"""
+    batches = []
+
+    def factory():
+        session = MagicMock()
+
+        async def execute(statement, rows):
+            if fail:
+                raise RuntimeError("資料庫無法連線")
+            batches.append(list(rows))
+
+        session.execute = execute
+        session.commit = AsyncMock()
+        session.__aenter__ = AsyncMock(return_value=session)
+        session.__aexit__ = AsyncMock(return_value=False)
+        return session
+
+    return factory, batches
+
+
+class TestTranscriptWriter:
+    """測試 TranscriptWriter"""
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_in_batches(self):
+        """測試依批次大小分批寫入並保持順序"""
+        writer = TranscriptWriter(batch_size=2, flush_interval_ms=60000)
+        factory, batches = _session_factory()
+
+        with patch("app.services.transcript_writer.AsyncSessionLocal", factory):
+            for i in range(5):
+                writer.add("course_1", f"0:00:0{i}", f"第 {i} 句", 0.9)
+            await writer.stop()
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert [row["text"] for batch in batches for row in batch] == [f"第 {i} 句" for i in range(5)]
+        stats = writer.stats()
+        assert stats["written"] == 5
+        assert stats["buffered"] == 0
+
+    @pytest.mark.asyncio
+    async def test_background_flush_on_interval(self):
+        """測試未達批次大小時依時間間隔寫入"""
+        writer = TranscriptWriter(batch_size=100, flush_interval_ms=10)
+        factory, batches = _session_factory()
+
+        with patch("app.services.transcript_writer.AsyncSessionLocal", factory):
+            writer.add("course_1", "0:00:01", "你好", 0.9)
+            for _ in range(50):
+                await asyncio.sleep(0.01)
+                if batches:
+                    break
+            await writer.stop()
+
+        assert len(batches) == 1
+        assert batches[0][0]["course_id"] == "course_1"
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_rows(self):
+        """測試寫入失敗時轉錄保留在緩衝區"""
+        writer = TranscriptWriter(batch_size=10, flush_interval_ms=60000, max_buffer=10)
+        factory, _ = _session_factory(fail=True)
+
+        for i in range(3):
+            writer.add("course_1", "0:00:01", f"第 {i} 句")
+
+        with patch("app.services.transcript_writer.AsyncSessionLocal", factory):
+            with pytest.raises(RuntimeError):
+                await writer.flush()
+
+        assert [row["text"] for row in writer._buffer] == ["第 0 句", "第 1 句", "第 2 句"]
+        assert writer.stats()["flush_errors"] == 1
+        writer._task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_drops_oldest_over_max_buffer(self):
+        """測試超過緩衝上限時捨棄最舊的轉錄"""
+        writer = TranscriptWriter(batch_size=2, flush_interval_ms=60000, max_buffer=3)
+        writer.start = MagicMock()
+
+        for i in range(5):
+            writer.add("course_1", "0:00:01", f"第 {i} 句")
+
+        assert [row["text"] for row in writer._buffer] == ["第 2 句", "第 3 句", "第 4 句"]
+        assert writer.dropped == 2
@@ -0,0 +1,89 @@
+"""測試 Whisper 批次推論排程"""
+import asyncio
+import threading
+import numpy as np
+import pytest
+from app.services.whisper_scheduler import WhisperBatchScheduler
+
+
+def _audio(value: float) -> np.ndarray:
+    return np.full(10, value, dtype=np.float32)
+
+
+class TestWhisperBatchScheduler:
+    """測試 WhisperBatchScheduler"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_batched(self):
+        """測試同時送入的區段合併成一個批次並各自取回結果"""
+        calls = []
+
+        def transcribe_batch(audios, language):
+            calls.append((len(audios), language))
+            return [f"區段{int(audio[0])}" for audio in audios]
+
+        scheduler = WhisperBatchScheduler(transcribe_batch, max_batch_size=8, max_wait_ms=50)
+        texts = await asyncio.gather(*(scheduler.transcribe(_audio(i), "zh") for i in range(5)))
+        await scheduler.stop()
+
+        assert texts == [f"區段{i}" for i in range(5)]
+        assert calls == [(5, "zh")]
+        stats = scheduler.stats()
+        assert stats["batches"] == 1
+        assert stats["average_batch_size"] == 5
+        assert stats["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_batch_size_limit_and_language_grouping(self):
+        """測試批次大小上限與依語言分批"""
+        calls = []
+
+        def transcribe_batch(audios, language):
+            calls.append((len(audios), language))
+            return [language] * len(audios)
+
+        scheduler = WhisperBatchScheduler(transcribe_batch, max_batch_size=2, max_wait_ms=20)
+        requests = [("zh", 0), ("en", 1), ("zh", 2), ("zh", 3)]
+        texts = await asyncio.gather(*(scheduler.transcribe(_audio(i), lang) for lang, i in requests))
+        await scheduler.stop()
+
+        assert texts == ["zh", "en", "zh", "zh"]
+        assert sorted(calls) == [(1, "en"), (1, "zh"), (2, "zh")]
+
+    @pytest.mark.asyncio
+    async def test_requests_arriving_during_batch_join_next_batch(self):
+        """測試推論期間送入的區段在下一個批次一起處理"""
+        release = threading.Event()
+        sizes = []
+
+        def transcribe_batch(audios, language):
+            sizes.append(len(audios))
+            if len(sizes) == 1:
+                release.wait(1.0)
+            return ["ok"] * len(audios)
+
+        scheduler = WhisperBatchScheduler(transcribe_batch, max_batch_size=8, max_wait_ms=0)
+        first = asyncio.create_task(scheduler.transcribe(_audio(0), "zh"))
+        await asyncio.sleep(0.02)
+        rest = [asyncio.create_task(scheduler.transcribe(_audio(i), "zh")) for i in range(3)]
+        await asyncio.sleep(0.02)
+        release.set()
+        await asyncio.gather(first, *rest)
+        await scheduler.stop()
+
+        assert sizes == [1, 3]
+
+    @pytest.mark.asyncio
+    async def test_batch_error_propagates(self):
+        """測試批次失敗時所有等待者都收到例外"""
+        def transcribe_batch(audios, language):
+            raise RuntimeError("GPU 記憶體不足")
+
+        scheduler = WhisperBatchScheduler(transcribe_batch, max_wait_ms=10)
+        results = await asyncio.gather(
+            *(scheduler.transcribe(_audio(i), "zh") for i in range(2)),
+            return_exceptions=True,
+        )
+        await scheduler.stop()
+
+        assert all(isinstance(r, RuntimeError) for r in results)